@@ -7,15 +7,14 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
 from flask import Flask, request, jsonify
-from flask_restful import Api, Resource
+from flask_restful import Resource
 from flask_jwt_extended import (
     JWTManager, jwt_required, create_access_token, create_refresh_token,
     get_jwt_identity, get_jwt
 )
 from marshmallow import Schema, fields, ValidationError, validate
-from sqlalchemy import create_engine, Column, String, Boolean, DateTime, Integer, UUID
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, UUID, select, bindparam
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from werkzeug.security import generate_password_hash, check_password_hash
 from email_validator import validate_email, EmailNotValidError
@@ -24,8 +23,22 @@ from email.mime.text import MimeText
 from email.mime.multipart import MimeMultipart
 import secrets
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
+from shared.log_pipeline import configure_logging
+from shared.health import HealthMonitor, LivenessResource, ReadinessResource
+from shared.cache import TTLCache
+from shared.sharding import ShardRouter
+from shared.i18n import Translator
+from shared.statements import StatementCache
+from shared.profiler import RequestProfiler
+from shared.tokens import JWTApi, TokenVersions
+from shared.invalidation import InvalidationBus
+from login_tracker import FailedLoginTracker
+
 # Load environment variables
 DATABASE_URL = os.getenv(
     'DATABASE_URL', 
@@ -39,6 +52,31 @@ SMTP_USERNAME = os.getenv('SMTP_USERNAME')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 EMAIL_FROM = os.getenv('EMAIL_FROM', 'noreply@ecommerce.com')
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+EMAIL_QUEUE_SIZE = int(os.getenv('EMAIL_QUEUE_SIZE', 1000))
+HASH_POOL_SIZE = int(os.getenv('HASH_POOL_SIZE', os.cpu_count() or 2))
+# Calibrate with `python calibrate_hashing.py --target-ms 250` on the deployment machine
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', 10))
+LOGIN_LOCK_THRESHOLD = float(os.getenv('LOGIN_LOCK_THRESHOLD', 5))
+LOGIN_IP_THRESHOLD = float(os.getenv('LOGIN_IP_THRESHOLD', 50))
+LOGIN_FAILURE_HALF_LIFE = float(os.getenv('LOGIN_FAILURE_HALF_LIFE', 900))
+TOKEN_VERSION_CACHE_TTL = float(os.getenv('TOKEN_VERSION_CACHE_TTL', 30))
+# Claims embedded in access tokens so downstream services can skip user/profile lookups
+TOKEN_CLAIMS = [
+    claim.strip() for claim in
+    os.getenv('TOKEN_CLAIMS', 'email,preferred_language,preferred_currency').split(',')
+    if claim.strip()
+]
+CLAIMS_CACHE_TTL = float(os.getenv('CLAIMS_CACHE_TTL', 300))
+CACHE_INVALIDATION_CHANNEL = os.getenv('CACHE_INVALIDATION_CHANNEL', 'cache_invalidation')
+I18N_RELOAD_INTERVAL = float(os.getenv('I18N_RELOAD_INTERVAL', 5))
+# Disable behind transaction-pooling proxies (PgBouncer) that drop session state
+SQL_PREPARED_STATEMENTS = os.getenv('SQL_PREPARED_STATEMENTS', 'true').lower() in ('1', 'true', 'yes')
+# Request profiling: admin-signed X-Profile-Signature requests and/or 1 in N sampled requests
+PROFILER_SECRET = os.getenv('PROFILER_SECRET')
+PROFILER_SAMPLE_EVERY = int(os.getenv('PROFILER_SAMPLE_EVERY', 0))
+PROFILER_DIR = os.getenv('PROFILER_DIR', '/tmp/profiles')
+PROFILER_FORMAT = os.getenv('PROFILER_FORMAT', 'speedscope')
 
 # Flask app configuration
 app = Flask(__name__)
@@ -48,29 +86,48 @@ app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
 app.config['JWT_BLACKLIST_ENABLED'] = True
 app.config['JWT_BLACKLIST_TOKEN_CHECKS'] = ['access', 'refresh']
 
-# Initialize extensions
-api = Api(app)
+# Initialize extensions (JWTApi leaves revoked/expired token errors to flask-jwt-extended's 401s)
+api = JWTApi(app)
 jwt = JWTManager(app)
 
-# Database setup
-engine = create_engine(DATABASE_URL, echo=(FLASK_ENV == 'development'))
-Session = scoped_session(sessionmaker(bind=engine))
+# Responses are translated into the Accept-Language locale (catalogs in shared/locales)
+i18n = Translator(reload_interval=I18N_RELOAD_INTERVAL)
+i18n.init_app(app)
+_ = i18n.gettext
+
+# Database setup: user data is routed to shards by user_id (SHARD_URLS), a single
+# DATABASE_URL is the only shard when sharding is not configured
+# SQL echo goes through the logging pipeline (sqlalchemy.engine logger) instead of echo=True
+router = ShardRouter.from_env(DATABASE_URL)
+engine = router.directory_engine
 Base = declarative_base()
 
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO if FLASK_ENV == 'production' else logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Logging setup: queue-based JSON pipeline, request threads only enqueue records
+configure_logging(
+    service='auth-service',
+    level='INFO' if FLASK_ENV == 'production' else 'DEBUG',
+    logger_levels={'sqlalchemy.engine': 'INFO' if FLASK_ENV == 'development' else 'WARNING'},
+    sample_rates={'auth.login': 1 if FLASK_ENV == 'development' else 10},
 )
 logger = logging.getLogger(__name__)
 
+# Opt-in profiler writing flamegraphs of single requests to PROFILER_DIR
+profiler = RequestProfiler(
+    'auth-service', router.engines.values(), output_dir=PROFILER_DIR, secret=PROFILER_SECRET,
+    sample_every=PROFILER_SAMPLE_EVERY, output_format=PROFILER_FORMAT
+)
+profiler.init_app(app)
+
 # Blacklisted tokens storage (use Redis in production)
 blacklisted_tokens = set()
 
-@jwt.token_in_blocklist_loader
-def check_if_token_revoked(jwt_header, jwt_payload):
-    jti = jwt_payload['jti']
-    return jti in blacklisted_tokens
+# Failed login counters per account and per IP (use Redis in production)
+login_tracker = FailedLoginTracker(
+    account_threshold=LOGIN_LOCK_THRESHOLD,
+    ip_threshold=LOGIN_IP_THRESHOLD,
+    half_life=LOGIN_FAILURE_HALF_LIFE,
+    lock_duration=timedelta(minutes=30)
+)
 
 # Database Models
 class User(Base):
@@ -88,9 +145,20 @@ class User(Base):
     last_login = Column(DateTime)
     failed_login_attempts = Column(Integer, default=0)
     account_locked_until = Column(DateTime)
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class Profile(Base):
+    """Read-only view of user_service.profiles used for token claims"""
+    __tablename__ = 'profiles'
+    __table_args__ = {'schema': 'user_service'}
+    
+    id = Column(PGUUID(as_uuid=True), primary_key=True)
+    user_id = Column(PGUUID(as_uuid=True), unique=True, nullable=False)
+    preferred_language = Column(String(10))
+    preferred_currency = Column(String(3))
+
 class RefreshToken(Base):
     __tablename__ = 'refresh_tokens'
     __table_args__ = {'schema': 'auth_service'}
@@ -102,6 +170,37 @@ class RefreshToken(Base):
     is_revoked = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+# Hot lookups, built once and prepared per connection
+statements = StatementCache(prepare=SQL_PREPARED_STATEMENTS)
+USER_BY_ID = statements.add('auth_user_by_id', select(User).where(User.id == bindparam('user_id')))
+USER_BY_EMAIL = statements.add('auth_user_by_email', select(User).where(User.email == bindparam('email')))
+USER_TOKEN_VERSION = statements.add(
+    'auth_user_token_version', select(User.token_version).where(User.id == bindparam('user_id'))
+)
+PROFILE_BY_USER = statements.add('auth_profile_by_user', select(Profile).where(Profile.user_id == bindparam('user_id')))
+
+def load_token_version(user_id: str) -> Optional[int]:
+    session = router.session_for_user(user_id)
+    try:
+        return USER_TOKEN_VERSION.execute(session, user_id=user_id).scalar()
+    finally:
+        session.close()
+
+# Per-user token generation: tokens carry a 'ver' claim, bumping the user's
+# token_version revokes all of their sessions at once (bounded user_id -> version cache)
+token_versions = TokenVersions(router, ttl=TOKEN_VERSION_CACHE_TTL, load=load_token_version)
+
+# Version bumps and profile edits (user-service) evict cached versions and claims on every worker
+invalidation_bus = InvalidationBus(router.engines.values(), channel=CACHE_INVALIDATION_CHANNEL)
+token_versions.subscribe(invalidation_bus)
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    jti = jwt_payload['jti']
+    if jti in blacklisted_tokens:
+        return True
+    return token_versions.is_revoked(jwt_payload)
+
 # Validation Schemas
 class UserRegistrationSchema(Schema):
     email = fields.Email(required=True)
@@ -114,7 +213,7 @@ class UserRegistrationSchema(Schema):
     
     def validate_passwords_match(self, data, **kwargs):
         if data.get('password') != data.get('confirm_password'):
-            raise ValidationError('Passwords do not match')
+            raise ValidationError(_('auth.passwords_mismatch'))
 
 class UserLoginSchema(Schema):
     email = fields.Email(required=True)
@@ -155,12 +254,120 @@ def send_email(to_email: str, subject: str, html_content: str) -> bool:
             server.login(SMTP_USERNAME, SMTP_PASSWORD)
             server.send_message(msg)
         
-        logger.info(f"Email sent successfully to {to_email}")
+        logger.info("Email sent to %s", to_email, extra={'event': 'auth.email_sent'})
         return True
     except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {str(e)}")
+        logger.error("Failed to send email to %s: %s", to_email, e, extra={'event': 'auth.email_failed'})
+        return False
+
+# Background email delivery: request threads enqueue, one worker talks to SMTP
+email_queue = queue.Queue(maxsize=EMAIL_QUEUE_SIZE)
+
+def email_worker():
+    """Deliver queued emails outside the request thread"""
+    while True:
+        to_email, subject, html_content = email_queue.get()
+        try:
+            send_email(to_email, subject, html_content)
+        except Exception:
+            logger.exception("Email worker error")
+        finally:
+            email_queue.task_done()
+
+email_thread = threading.Thread(target=email_worker, name='email-worker', daemon=True)
+email_thread.start()
+
+def queue_email(to_email: str, subject: str, html_content: str) -> bool:
+    """Queue an email for background delivery; returns False when the queue is full"""
+    try:
+        email_queue.put_nowait((to_email, subject, html_content))
+        return True
+    except queue.Full:
+        logger.warning("Email queue full, dropping email to %s", to_email)
         return False
 
+def email_queue_stats() -> Dict[str, Any]:
+    """Email queue depth for the readiness probe"""
+    depth = email_queue.qsize()
+    return {
+        'depth': depth,
+        'capacity': EMAIL_QUEUE_SIZE,
+        'worker_alive': email_thread.is_alive(),
+        'ready': email_thread.is_alive() and depth < EMAIL_QUEUE_SIZE
+    }
+
+class HashingPool:
+    """Bounded worker pool for password hashing with saturation tracking"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hash')
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Schedule work on the pool without waiting for it"""
+        with self._lock:
+            self.pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        pending = self.pending
+        return {
+            'max_workers': self.max_workers,
+            'pending': pending,
+            'saturation': round(pending / self.max_workers, 2),
+            # More than 4 queued hashes per worker means login latency is queueing-bound
+            'ready': pending < self.max_workers * 4
+        }
+
+hashing_pool = HashingPool(HASH_POOL_SIZE)
+
+def hash_password(password: str) -> str:
+    """Hash a password on the bounded hashing pool"""
+    return hashing_pool.run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check a password on the bounded hashing pool"""
+    return hashing_pool.run(check_password_hash, password_hash, password)
+
+# Normalized parameters of the configured method, e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000'
+CURRENT_HASH_PARAMS = generate_password_hash('', PASSWORD_HASH_METHOD).split('$', 1)[0]
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if a stored hash was made with other parameters than PASSWORD_HASH_METHOD"""
+    return password_hash.split('$', 1)[0] != CURRENT_HASH_PARAMS
+
+def rehash_password(user_id, old_hash: str, password: str):
+    """Upgrade a stored hash to the current parameters (runs on the hashing pool)"""
+    new_hash = generate_password_hash(password, PASSWORD_HASH_METHOD)
+    session = router.session_for_user(user_id)
+    try:
+        # Compare-and-set so a concurrent password reset is never overwritten
+        updated = session.query(User).filter_by(id=user_id, password_hash=old_hash).update(
+            {'password_hash': new_hash}, synchronize_session=False
+        )
+        session.commit()
+        if updated:
+            logger.info(
+                "Password hash upgraded to %s", CURRENT_HASH_PARAMS,
+                extra={'event': 'auth.rehash', 'user_id': str(user_id)}
+            )
+    except Exception:
+        session.rollback()
+        logger.exception("Password rehash failed for user %s", user_id)
+    finally:
+        session.close()
+
 def generate_secure_token() -> str:
     """Generate a secure random token"""
     return secrets.token_urlsafe(32)
@@ -175,21 +382,82 @@ def is_account_locked(user: User) -> bool:
         return True
     return False
 
-def handle_failed_login(session, user: User) -> bool:
-    """Handle failed login attempt and return if account should be locked"""
-    user.failed_login_attempts += 1
+def revoke_all_sessions(session, user: User):
+    """Invalidate every outstanding access and refresh token of the user"""
+    user.token_version = User.token_version + 1
+    session.query(RefreshToken).filter_by(user_id=user.id, is_revoked=False).update(
+        {'is_revoked': True}, synchronize_session=False
+    )
+    invalidation_bus.publish(session, 'user', user.id)
+    session.commit()
+    token_versions.set(str(user.id), user.token_version)
+
+# Token claim enrichment: claim name -> (source, attribute, default)
+CLAIM_SOURCES = {
+    'email': ('user', 'email', None),
+    'email_verified': ('user', 'email_verified', False),
+    'preferred_language': ('profile', 'preferred_language', 'en'),
+    'preferred_currency': ('profile', 'preferred_currency', 'USD'),
+}
+claims_cache = TTLCache(ttl=CLAIMS_CACHE_TTL, max_entries=100000)
+for entity in ('user', 'profile'):
+    invalidation_bus.subscribe(entity, lambda user_id, version: claims_cache.invalidate(user_id), reset=claims_cache.clear)
+
+def build_token_claims(session, user: User) -> Dict[str, Any]:
+    """Collect the configured TOKEN_CLAIMS for a user and cache them for refreshes"""
+    profile = None
+    if any(CLAIM_SOURCES.get(name, ('',))[0] == 'profile' for name in TOKEN_CLAIMS):
+        profile = PROFILE_BY_USER.execute(session, user_id=user.id).scalars().first()
     
-    # Lock account after 5 failed attempts for 30 minutes
-    if user.failed_login_attempts >= 5:
-        user.account_locked_until = datetime.utcnow() + timedelta(minutes=30)
-        session.commit()
-        return True
+    claims = {}
+    for name in TOKEN_CLAIMS:
+        if name not in CLAIM_SOURCES:
+            continue
+        source, attribute, default = CLAIM_SOURCES[name]
+        record = user if source == 'user' else profile
+        value = getattr(record, attribute, None) if record is not None else None
+        claims[name] = default if value is None else value
+    claims_cache.set(str(user.id), claims)
+    return claims
+
+def get_cached_claims(user_id: str) -> Dict[str, Any]:
+    """Token claims for a refresh, read from the cache and only rebuilt on a miss"""
+    claims = claims_cache.get(user_id)
+    if claims is None:
+        session = router.session_for_user(user_id)
+        try:
+            user = USER_BY_ID.execute(session, user_id=user_id).scalars().first()
+            claims = build_token_claims(session, user) if user else {}
+        finally:
+            session.close()
+    return claims
+
+def get_client_ip() -> str:
+    """Client IP as forwarded by the reverse proxy"""
+    return request.environ.get('HTTP_X_REAL_IP', request.remote_addr)
+
+def handle_failed_login(session, user: User) -> bool:
+    """Handle failed login attempt and return if account should be locked
+
+    Attempts are counted in login_tracker; the database is only written when
+    the account crosses the lock threshold.
+    """
+    if not login_tracker.record_failure(user.email, get_client_ip()):
+        return False
     
+    # Lock account for 30 minutes once the decayed failure score reaches the threshold
+    user.failed_login_attempts = int(LOGIN_LOCK_THRESHOLD)
+    user.account_locked_until = login_tracker.lock(user.email)
     session.commit()
-    return False
+    logger.warning(
+        "Account locked after repeated failed logins: %s", user.email,
+        extra={'event': 'auth.account_locked', 'user_id': str(user.id)}
+    )
+    return True
 
 def reset_failed_login_attempts(session, user: User):
     """Reset failed login attempts after successful login"""
+    login_tracker.reset(user.email)
     user.failed_login_attempts = 0
     user.account_locked_until = None
     user.last_login = datetime.utcnow()
@@ -203,7 +471,7 @@ def rate_limit(max_requests: int = 5, time_window: int = 300):
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            client_ip = request.environ.get('HTTP_X_REAL_IP', request.remote_addr)
+            client_ip = get_client_ip()
             current_time = datetime.utcnow()
             
             # Clean old entries
@@ -220,7 +488,7 @@ def rate_limit(max_requests: int = 5, time_window: int = 300):
                 request_counts[client_ip] = []
             
             if len(request_counts[client_ip]) >= max_requests:
-                return jsonify({'error': 'Rate limit exceeded'}), 429
+                return jsonify({'error': _('common.rate_limited')}), 429
             
             request_counts[client_ip].append(current_time)
             return f(*args, **kwargs)
@@ -238,20 +506,26 @@ class RegisterResource(Resource):
             
             # Validate passwords match
             if data['password'] != data['confirm_password']:
-                return {'error': 'Passwords do not match'}, 400
+                return {'error': _('auth.passwords_mismatch')}, 400
+            
+            # Claim the email in the shard directory, then create the user on its shard
+            user_id = uuid.uuid4()
+            if not router.register_email(data['email'], user_id):
+                return {'error': _('auth.email_taken')}, 400
             
-            session = Session()
+            session = router.session_for_user(user_id)
             try:
                 # Check if user already exists
-                existing_user = session.query(User).filter_by(email=data['email']).first()
+                existing_user = USER_BY_EMAIL.execute(session, email=data['email']).scalars().first()
                 if existing_user:
-                    return {'error': 'User with this email already exists'}, 400
+                    return {'error': _('auth.email_taken')}, 400
                 
                 # Create new user
                 verification_token = generate_secure_token()
                 new_user = User(
+                    id=user_id,
                     email=data['email'],
-                    password_hash=generate_password_hash(data['password']),
+                    password_hash=hash_password(data['password']),
                     verification_token=verification_token
                 )
                 
@@ -267,28 +541,32 @@ class RegisterResource(Resource):
                 <p>This link will expire in 24 hours.</p>
                 """
                 
-                send_email(
+                queue_email(
                     to_email=data['email'],
                     subject="Verify Your Email Address",
                     html_content=email_html
                 )
                 
-                logger.info(f"User registered successfully: {data['email']}")
+                logger.info(
+                    "User registered successfully: %s", data['email'],
+                    extra={'event': 'auth.register', 'user_id': str(new_user.id)}
+                )
                 
                 return {
-                    'message': 'User registered successfully. Please check your email for verification.',
+                    'message': _('auth.registered'),
                     'user_id': str(new_user.id)
                 }, 201
                 
             except Exception as e:
                 session.rollback()
-                logger.error(f"Registration error: {str(e)}")
-                return {'error': 'Internal server error'}, 500
+                router.unregister_email(data['email'])
+                logger.error("Registration error: %s", e, exc_info=True)
+                return {'error': _('common.internal_error')}, 500
             finally:
                 session.close()
                 
         except ValidationError as err:
-            return {'error': 'Validation failed', 'details': err.messages}, 400
+            return {'error': _('common.validation_failed'), 'details': err.messages}, 400
 
 class LoginResource(Resource):
     @rate_limit(max_requests=5, time_window=300)  # 5 attempts per 5 minutes
@@ -297,44 +575,62 @@ class LoginResource(Resource):
         try:
             schema = UserLoginSchema()
             data = schema.load(request.get_json())
+            client_ip = get_client_ip()
             
-            session = Session()
+            # Reject known-locked accounts and abusive IPs before any DB or hashing work
+            if login_tracker.ip_blocked(client_ip):
+                return {'error': _('auth.too_many_attempts')}, 429
+            if login_tracker.locked_until(data['email']):
+                return {
+                    'error': _('auth.account_locked')
+                }, 423
+            
+            session = router.session_for_email(data['email'])
             try:
                 # Find user
-                user = session.query(User).filter_by(email=data['email']).first()
+                user = USER_BY_EMAIL.execute(session, email=data['email']).scalars().first()
                 if not user:
-                    return {'error': 'Invalid credentials'}, 401
+                    login_tracker.record_failure(None, client_ip)
+                    return {'error': _('auth.invalid_credentials')}, 401
                 
                 # Check if account is locked
                 if is_account_locked(user):
+                    login_tracker.lock(user.email, user.account_locked_until)
                     return {
-                        'error': 'Account temporarily locked due to multiple failed login attempts'
+                        'error': _('auth.account_locked')
                     }, 423
                 
                 # Check if account is active
                 if not user.is_active:
-                    return {'error': 'Account is deactivated'}, 403
+                    return {'error': _('auth.account_deactivated')}, 403
                 
                 # Validate password
-                if not check_password_hash(user.password_hash, data['password']):
+                if not verify_password(user.password_hash, data['password']):
                     handle_failed_login(session, user)
-                    return {'error': 'Invalid credentials'}, 401
+                    return {'error': _('auth.invalid_credentials')}, 401
                 
                 # Check if email is verified
                 if not user.email_verified:
                     return {
-                        'error': 'Email not verified. Please check your email for verification link.'
+                        'error': _('auth.email_not_verified')
                     }, 403
                 
                 # Successful login
                 reset_failed_login_attempts(session, user)
                 
+                # Upgrade outdated hash parameters in the background
+                if needs_rehash(user.password_hash):
+                    hashing_pool.submit(rehash_password, user.id, user.password_hash, data['password'])
+                
                 # Create JWT tokens
                 access_token = create_access_token(
                     identity=str(user.id),
-                    additional_claims={'email': user.email}
+                    additional_claims={**build_token_claims(session, user), 'ver': user.token_version}
+                )
+                refresh_token = create_refresh_token(
+                    identity=str(user.id),
+                    additional_claims={'ver': user.token_version}
                 )
-                refresh_token = create_refresh_token(identity=str(user.id))
                 
                 # Store refresh token
                 refresh_token_hash = hash_token(refresh_token)
@@ -346,7 +642,10 @@ class LoginResource(Resource):
                 session.add(db_refresh_token)
                 session.commit()
                 
-                logger.info(f"User logged in successfully: {user.email}")
+                logger.info(
+                    "User logged in successfully: %s", user.email,
+                    extra={'event': 'auth.login', 'user_id': str(user.id)}
+                )
                 
                 return {
                     'access_token': access_token,
@@ -362,10 +661,10 @@ class LoginResource(Resource):
                 session.close()
                 
         except ValidationError as err:
-            return {'error': 'Validation failed', 'details': err.messages}, 400
+            return {'error': _('common.validation_failed'), 'details': err.messages}, 400
         except Exception as e:
-            logger.error(f"Login error: {str(e)}")
-            return {'error': 'Internal server error'}, 500
+            logger.error("Login error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
 
 class LogoutResource(Resource):
     @jwt_required()
@@ -376,12 +675,36 @@ class LogoutResource(Resource):
             blacklisted_tokens.add(jti)
             
             user_id = get_jwt_identity()
-            logger.info(f"User logged out: {user_id}")
+            logger.info("User logged out: %s", user_id, extra={'event': 'auth.logout', 'user_id': user_id})
             
-            return {'message': 'Successfully logged out'}, 200
+            return {'message': _('auth.logged_out')}, 200
         except Exception as e:
-            logger.error(f"Logout error: {str(e)}")
-            return {'error': 'Internal server error'}, 500
+            logger.error("Logout error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
+
+class LogoutAllResource(Resource):
+    @jwt_required()
+    def post(self):
+        """Log out everywhere - revoke every session of the current user"""
+        try:
+            user_id = get_jwt_identity()
+            session = router.session_for_user(user_id)
+            try:
+                user = USER_BY_ID.execute(session, user_id=user_id).scalars().first()
+                if not user:
+                    return {'error': _('auth.user_not_found')}, 404
+                revoke_all_sessions(session, user)
+            finally:
+                session.close()
+            
+            logger.info(
+                "User logged out of all sessions: %s", user_id,
+                extra={'event': 'auth.logout_all', 'user_id': user_id}
+            )
+            return {'message': _('auth.logged_out_all')}, 200
+        except Exception as e:
+            logger.error("Logout-all error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
 
 class RefreshTokenResource(Resource):
     @jwt_required(refresh=True)
@@ -390,17 +713,17 @@ class RefreshTokenResource(Resource):
         try:
             current_user_id = get_jwt_identity()
             
-            # Create new access token
+            # Create new access token in the same token generation as the refresh token
             access_token = create_access_token(
                 identity=current_user_id,
-                additional_claims={'email': ''}  # Could fetch from DB if needed
+                additional_claims={**get_cached_claims(current_user_id), 'ver': get_jwt().get('ver', 0)}
             )
             
             return {'access_token': access_token}, 200
             
         except Exception as e:
-            logger.error(f"Token refresh error: {str(e)}")
-            return {'error': 'Internal server error'}, 500
+            logger.error("Token refresh error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
 
 class VerifyEmailResource(Resource):
     def post(self):
@@ -409,35 +732,40 @@ class VerifyEmailResource(Resource):
             schema = EmailVerificationSchema()
             data = schema.load(request.get_json())
             
-            session = Session()
+            session = router.session_where(User, verification_token=data['token'])
             try:
                 user = session.query(User).filter_by(
                     verification_token=data['token']
                 ).first()
                 
                 if not user:
-                    return {'error': 'Invalid verification token'}, 400
+                    return {'error': _('auth.invalid_verification_token')}, 400
                 
                 if user.email_verified:
-                    return {'message': 'Email already verified'}, 200
+                    return {'message': _('auth.email_already_verified')}, 200
                 
                 # Verify email
                 user.email_verified = True
                 user.verification_token = None
+                invalidation_bus.publish(session, 'user', user.id)
                 session.commit()
+                claims_cache.invalidate(str(user.id))
                 
-                logger.info(f"Email verified for user: {user.email}")
+                logger.info(
+                    "Email verified for user: %s", user.email,
+                    extra={'event': 'auth.verify_email', 'user_id': str(user.id)}
+                )
                 
-                return {'message': 'Email verified successfully'}, 200
+                return {'message': _('auth.email_verified')}, 200
                 
             finally:
                 session.close()
                 
         except ValidationError as err:
-            return {'error': 'Validation failed', 'details': err.messages}, 400
+            return {'error': _('common.validation_failed'), 'details': err.messages}, 400
         except Exception as e:
-            logger.error(f"Email verification error: {str(e)}")
-            return {'error': 'Internal server error'}, 500
+            logger.error("Email verification error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
 
 class PasswordResetRequestResource(Resource):
     @rate_limit(max_requests=3, time_window=600)  # 3 attempts per 10 minutes
@@ -447,9 +775,9 @@ class PasswordResetRequestResource(Resource):
             schema = PasswordResetRequestSchema()
             data = schema.load(request.get_json())
             
-            session = Session()
+            session = router.session_for_email(data['email'])
             try:
-                user = session.query(User).filter_by(email=data['email']).first()
+                user = USER_BY_EMAIL.execute(session, email=data['email']).scalars().first()
                 
                 # Always return success to prevent email enumeration
                 if user and user.is_active:
@@ -468,24 +796,24 @@ class PasswordResetRequestResource(Resource):
                     <p>If you didn't request this, please ignore this email.</p>
                     """
                     
-                    send_email(
+                    queue_email(
                         to_email=data['email'],
                         subject="Password Reset Request",
                         html_content=email_html
                     )
                 
                 return {
-                    'message': 'If an account with that email exists, a password reset link has been sent.'
+                    'message': _('auth.reset_link_sent')
                 }, 200
                 
             finally:
                 session.close()
                 
         except ValidationError as err:
-            return {'error': 'Validation failed', 'details': err.messages}, 400
+            return {'error': _('common.validation_failed'), 'details': err.messages}, 400
         except Exception as e:
-            logger.error(f"Password reset request error: {str(e)}")
-            return {'error': 'Internal server error'}, 500
+            logger.error("Password reset request error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
 
 class PasswordResetResource(Resource):
     def post(self):
@@ -495,38 +823,42 @@ class PasswordResetResource(Resource):
             data = schema.load(request.get_json())
             
             if data['password'] != data['confirm_password']:
-                return {'error': 'Passwords do not match'}, 400
+                return {'error': _('auth.passwords_mismatch')}, 400
             
-            session = Session()
+            session = router.session_where(User, reset_token=data['token'])
             try:
                 user = session.query(User).filter_by(reset_token=data['token']).first()
                 
                 if not user or not user.reset_token_expires:
-                    return {'error': 'Invalid reset token'}, 400
+                    return {'error': _('auth.invalid_reset_token')}, 400
                 
                 if user.reset_token_expires < datetime.utcnow():
-                    return {'error': 'Reset token has expired'}, 400
+                    return {'error': _('auth.reset_token_expired')}, 400
                 
                 # Reset password
-                user.password_hash = generate_password_hash(data['password'])
+                user.password_hash = hash_password(data['password'])
                 user.reset_token = None
                 user.reset_token_expires = None
                 user.failed_login_attempts = 0
                 user.account_locked_until = None
-                session.commit()
+                revoke_all_sessions(session, user)
+                login_tracker.reset(user.email)
                 
-                logger.info(f"Password reset for user: {user.email}")
+                logger.info(
+                    "Password reset for user: %s", user.email,
+                    extra={'event': 'auth.password_reset', 'user_id': str(user.id)}
+                )
                 
-                return {'message': 'Password reset successfully'}, 200
+                return {'message': _('auth.password_reset')}, 200
                 
             finally:
                 session.close()
                 
         except ValidationError as err:
-            return {'error': 'Validation failed', 'details': err.messages}, 400
+            return {'error': _('common.validation_failed'), 'details': err.messages}, 400
         except Exception as e:
-            logger.error(f"Password reset error: {str(e)}")
-            return {'error': 'Internal server error'}, 500
+            logger.error("Password reset error: %s", e, exc_info=True)
+            return {'error': _('common.internal_error')}, 500
 
 class ProtectedResource(Resource):
     @jwt_required()
@@ -534,7 +866,7 @@ class ProtectedResource(Resource):
         """Protected endpoint for testing"""
         current_user_id = get_jwt_identity()
         return {
-            'message': 'Access granted to protected resource',
+            'message': _('auth.protected_access'),
             'user_id': current_user_id
         }, 200
 
@@ -548,25 +880,44 @@ class HealthResource(Resource):
             'timestamp': datetime.utcnow().isoformat()
         }, 200
 
+# Health monitoring: probes read a snapshot refreshed in the background
+i18n.start()
+invalidation_bus.start()
+
+health_monitor = HealthMonitor('auth-service', engine, interval=HEALTH_CHECK_INTERVAL)
+health_monitor.register('email_queue', email_queue_stats)
+health_monitor.register('hashing_pool', hashing_pool.stats)
+health_monitor.register('login_tracker', login_tracker.stats)
+health_monitor.register('shards', router.stats)
+health_monitor.register('i18n', i18n.stats)
+health_monitor.register('statements', statements.stats)
+health_monitor.register('token_versions', token_versions.stats)
+health_monitor.register('invalidation_bus', invalidation_bus.stats)
+health_monitor.register('profiler', profiler.stats)
+health_monitor.start()
+
 # Register API routes
 api.add_resource(RegisterResource, '/register')
 api.add_resource(LoginResource, '/login')
 api.add_resource(LogoutResource, '/logout')
+api.add_resource(LogoutAllResource, '/logout-all')
 api.add_resource(RefreshTokenResource, '/refresh')
 api.add_resource(VerifyEmailResource, '/verify-email')
 api.add_resource(PasswordResetRequestResource, '/password-reset-request')
 api.add_resource(PasswordResetResource, '/password-reset')
 api.add_resource(ProtectedResource, '/protected')
 api.add_resource(HealthResource, '/health')
+api.add_resource(LivenessResource, '/livez', resource_class_kwargs={'monitor': health_monitor})
+api.add_resource(ReadinessResource, '/readyz', resource_class_kwargs={'monitor': health_monitor})
 
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return jsonify({'error': _('common.endpoint_not_found')}), 404
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
+    return jsonify({'error': _('common.internal_error')}), 500
 
 if __name__ == '__main__':
     logger.info("🚀 Production Auth Service Starting")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Password hash cost calibration
+Benchmarks the configured werkzeug hashing algorithm on this machine and picks the
+strongest parameters whose median hash time stays within the target login latency.
+
+Usage:
+    python calibrate_hashing.py --target-ms 250
+    python calibrate_hashing.py --method pbkdf2:sha256 --target-ms 100 --samples 7
+
+Set the printed value as PASSWORD_HASH_METHOD; existing hashes are upgraded
+transparently on the next successful login.
+"""
+import os
+import time
+import argparse
+import statistics
+
+from werkzeug.security import generate_password_hash
+
+def measure(method: str, samples: int) -> float:
+    """Median seconds per hash for a werkzeug method string"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        generate_password_hash('calibration-password', method)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def calibrate_scrypt(target: float, samples: int, r: int = 8, p: int = 1):
+    """Double scrypt's N (cost and memory) until the target latency is exceeded"""
+    n, best = 2 ** 14, None
+    while n <= 2 ** 20:
+        method = f'scrypt:{n}:{r}:{p}'
+        try:
+            elapsed = measure(method, samples)
+        except ValueError:
+            # OpenSSL refuses N beyond its memory limit
+            break
+        print(f"  {method:<28} {elapsed * 1000:8.1f}ms  memory={128 * n * r // 1024 // 1024}MiB")
+        if elapsed > target:
+            break
+        best = (method, elapsed)
+        n *= 2
+    return best
+
+def calibrate_pbkdf2(target: float, samples: int, digest: str = 'sha256'):
+    """Scale PBKDF2 iterations linearly from a probe measurement"""
+    probe_iterations = 100000
+    elapsed = measure(f'pbkdf2:{digest}:{probe_iterations}', samples)
+    iterations = int(probe_iterations * target / elapsed) // 10000 * 10000
+    method = f'pbkdf2:{digest}:{max(iterations, probe_iterations)}'
+    elapsed = measure(method, samples)
+    print(f"  {method:<28} {elapsed * 1000:8.1f}ms")
+    return method, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--method', default=os.getenv('PASSWORD_HASH_METHOD', 'scrypt').split(':')[0],
+        help="algorithm to calibrate: 'scrypt' or 'pbkdf2:<digest>'"
+    )
+    parser.add_argument('--target-ms', type=float, default=250, help='target hash time per login')
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    target = args.target_ms / 1000
+    print(f"🔐 Calibrating {args.method} for ~{args.target_ms:.0f}ms per hash on {os.cpu_count()} CPUs")
+    if args.method.startswith('pbkdf2'):
+        digest = args.method.split(':')[1] if ':' in args.method else 'sha256'
+        best = calibrate_pbkdf2(target, args.samples, digest)
+    else:
+        best = calibrate_scrypt(target, args.samples)
+
+    if not best:
+        print("❌ Even the minimum parameters exceed the target latency")
+        return
+    method, elapsed = best
+    print("=" * 60)
+    print(f"✅ PASSWORD_HASH_METHOD={method}  ({elapsed * 1000:.1f}ms per hash)")
+    print(f"   Max hashing throughput per worker: ~{1 / elapsed:.1f} logins/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Failed login attempt tracking with decaying counters
+# In-process stand-in for a shared fast store (e.g. Redis INCRBYFLOAT + EXPIRE per key).
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+class FailedLoginTracker:
+    """Count failed logins per account and per IP with exponentially decaying scores
+
+    Each failure adds 1 to the key's score; scores halve every `half_life` seconds,
+    so a burst of failures locks an account while occasional typos never do.
+    Only the lock itself is persisted by the caller, keeping brute-force
+    attempts off the primary database. `clock` (seconds, for decay) and `utcnow`
+    (for lock expiry) can be replaced in tests.
+    """
+
+    def __init__(
+        self,
+        account_threshold: float = 5,
+        ip_threshold: float = 50,
+        half_life: float = 900,
+        lock_duration: timedelta = timedelta(minutes=30),
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+        utcnow: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.account_threshold = account_threshold
+        self.ip_threshold = ip_threshold
+        self.half_life = half_life
+        self.lock_duration = lock_duration
+        self.max_keys = max_keys
+        self._clock = clock
+        self._utcnow = utcnow
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._locks: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, key: str, now: float) -> float:
+        entry = self._scores.get(key)
+        if entry is None:
+            return 0.0
+        score, updated = entry
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def _hit(self, key: str, now: float) -> float:
+        score = self._decayed(key, now) + 1
+        self._scores[key] = (score, now)
+        return score
+
+    @staticmethod
+    def _over(score: float, threshold: float) -> bool:
+        # Scores decay between hits, so N rapid failures sum to slightly less than N
+        return score + 0.5 >= threshold
+
+    def _prune(self, now: float):
+        """Drop keys whose score has decayed to noise once the store is full"""
+        if len(self._scores) <= self.max_keys:
+            return
+        for key in [k for k in self._scores if self._decayed(k, now) < 0.5]:
+            del self._scores[key]
+        for email in [e for e, until in self._locks.items() if until <= self._utcnow()]:
+            del self._locks[email]
+
+    def record_failure(self, email: Optional[str], ip: str) -> bool:
+        """Record a failed attempt; returns True when the account crossed the lock threshold"""
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            self._hit(f'ip:{ip}', now)
+            if email is None:
+                return False
+            score = self._hit(f'account:{email}', now)
+            return self._over(score, self.account_threshold) and email not in self._locks
+
+    def ip_blocked(self, ip: str) -> bool:
+        with self._lock:
+            return self._over(self._decayed(f'ip:{ip}', self._clock()), self.ip_threshold)
+
+    def lock(self, email: str, until: Optional[datetime] = None) -> datetime:
+        """Remember an account lock so later attempts are rejected before any DB or hashing work"""
+        until = until or self._utcnow() + self.lock_duration
+        with self._lock:
+            self._locks[email] = until
+        return until
+
+    def locked_until(self, email: str) -> Optional[datetime]:
+        with self._lock:
+            until = self._locks.get(email)
+            if until is None:
+                return None
+            if until <= self._utcnow():
+                del self._locks[email]
+                self._scores.pop(f'account:{email}', None)
+                return None
+            return until
+
+    def reset(self, email: str):
+        """Forget failures and locks after a successful login or password reset"""
+        with self._lock:
+            self._scores.pop(f'account:{email}', None)
+            self._locks.pop(email, None)
+
+    def stats(self) -> dict:
+        return {'tracked_keys': len(self._scores), 'locked_accounts': len(self._locks)}
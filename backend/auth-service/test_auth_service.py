@@ -10,10 +10,13 @@ import sys
 
 BASE_URL = "http://localhost:5000"
 
+# One keep-alive session for all calls instead of a new TCP connection per request
+http = requests.Session()
+
 def test_health_check():
     """Test health endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = http.get(f"{BASE_URL}/health")
         print(f"✅ Health Check: {response.status_code} - {response.json()}")
         return response.status_code == 200
     except Exception as e:
@@ -27,7 +30,7 @@ def test_user_registration():
             "email": "test@example.com",
             "password": "securepassword123"
         }
-        response = requests.post(f"{BASE_URL}/register", json=user_data)
+        response = http.post(f"{BASE_URL}/register", json=user_data)
         print(f"✅ User Registration: {response.status_code} - {response.json()}")
         return response.status_code == 201
     except Exception as e:
@@ -41,7 +44,7 @@ def test_user_login():
             "email": "test@example.com", 
             "password": "securepassword123"
         }
-        response = requests.post(f"{BASE_URL}/login", json=login_data)
+        response = http.post(f"{BASE_URL}/login", json=login_data)
         print(f"✅ User Login: {response.status_code} - {response.json()}")
         
         if response.status_code == 200:
@@ -57,7 +60,7 @@ def test_jwt_validation(token):
     """Test JWT token validation"""
     try:
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(f"{BASE_URL}/protected", headers=headers)
+        response = http.get(f"{BASE_URL}/protected", headers=headers)
         print(f"✅ JWT Validation: {response.status_code} - {response.json()}")
         return response.status_code == 200
     except Exception as e:
@@ -68,7 +71,7 @@ def test_token_verification(token):
     """Test token verification endpoint for API Gateway"""
     try:
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(f"{BASE_URL}/verify", headers=headers)
+        response = http.get(f"{BASE_URL}/verify", headers=headers)
         print(f"✅ Token Verification: {response.status_code} - {response.json()}")
         return response.status_code == 200
     except Exception as e:
@@ -83,7 +86,7 @@ def test_marshmallow_validation():
             "email": "invalid-email",
             "password": "short"
         }
-        response = requests.post(f"{BASE_URL}/register", json=invalid_data)
+        response = http.post(f"{BASE_URL}/register", json=invalid_data)
         print(f"✅ Marshmallow Validation (Invalid): {response.status_code} - {response.json()}")
         return response.status_code == 400
     except Exception as e:
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Failed login tracker tests
+The tracker runs on a fake clock, so decay and lock expiry are checked without sleeping.
+
+Usage:
+    python -m pytest backend/auth-service/test_login_tracker.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from login_tracker import FailedLoginTracker
+
+HALF_LIFE = 900
+
+class FakeClock:
+    """Monotonic seconds and wall time that only move when advanced"""
+
+    def __init__(self):
+        self.seconds = 1000.0
+        self.wall = datetime(2026, 1, 1, 12, 0)
+
+    def monotonic(self) -> float:
+        return self.seconds
+
+    def utcnow(self) -> datetime:
+        return self.wall
+
+    def advance(self, seconds: float):
+        self.seconds += seconds
+        self.wall += timedelta(seconds=seconds)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def tracker(clock: FakeClock, **kwargs) -> FailedLoginTracker:
+    options = dict(account_threshold=5, ip_threshold=50, half_life=HALF_LIFE, lock_duration=timedelta(minutes=30))
+    options.update(kwargs)
+    return FailedLoginTracker(clock=clock.monotonic, utcnow=clock.utcnow, **options)
+
+def fail(tracker: FailedLoginTracker, clock: FakeClock, count: int, email='ana@example.com', ip='10.0.0.1', every=0.0):
+    """Results of `count` failed attempts `every` seconds apart"""
+    results = []
+    for _ in range(count):
+        results.append(tracker.record_failure(email, ip))
+        clock.advance(every)
+    return results
+
+def test_burst_of_failures_locks_the_account(clock):
+    logins = tracker(clock)
+    assert fail(logins, clock, 5) == [False, False, False, False, True]
+    until = logins.lock('ana@example.com')
+    assert until == clock.wall + timedelta(minutes=30)
+    assert logins.locked_until('ana@example.com') == until
+    # Already locked: further failures do not ask for another lock
+    assert fail(logins, clock, 3) == [False, False, False]
+    assert logins.locked_until('bo@example.com') is None
+
+def test_rapid_failures_that_decay_slightly_still_reach_the_threshold(clock):
+    logins = tracker(clock)
+    # Ten seconds apart, five failures sum to a little under 5
+    assert fail(logins, clock, 5, every=10) == [False, False, False, False, True]
+    score = logins._decayed('account:ana@example.com', clock.monotonic() - 10)
+    assert 4.9 < score < 5
+
+@pytest.mark.parametrize('score, expected', [(4.5, True), (4.49, False), (5.0, True), (3.99, False)])
+def test_threshold_rounds_half_a_failure_up(score, expected):
+    assert FailedLoginTracker._over(score, 5) is expected
+
+def test_occasional_typos_never_lock(clock):
+    logins = tracker(clock)
+    # One failure per half-life converges on a score of 2
+    assert not any(fail(logins, clock, 200, every=HALF_LIFE))
+    assert logins._decayed('account:ana@example.com', clock.monotonic()) < 2
+
+def test_lock_expires_and_failures_start_over(clock):
+    logins = tracker(clock)
+    assert fail(logins, clock, 5)[-1]
+    logins.lock('ana@example.com')
+
+    clock.advance(29 * 60)
+    assert logins.locked_until('ana@example.com') is not None
+    clock.advance(60)
+    assert logins.locked_until('ana@example.com') is None
+    # The expired lock took the account's score with it
+    assert fail(logins, clock, 4) == [False, False, False, False]
+    assert fail(logins, clock, 1) == [True]
+
+def test_score_decays_below_the_threshold_between_bursts(clock):
+    logins = tracker(clock)
+    assert fail(logins, clock, 4) == [False] * 4
+    clock.advance(HALF_LIFE)
+    # 4 decayed to 2, so three more failures are needed instead of one
+    assert fail(logins, clock, 3) == [False, False, True]
+
+def test_reset_forgets_failures_and_locks(clock):
+    logins = tracker(clock)
+    fail(logins, clock, 5)
+    logins.lock('ana@example.com')
+    logins.reset('ana@example.com')
+    assert logins.locked_until('ana@example.com') is None
+    assert fail(logins, clock, 4) == [False] * 4
+
+def test_one_ip_spraying_many_accounts_is_blocked(clock):
+    logins = tracker(clock)
+    locks = [logins.record_failure(f'user{n}@example.com', '203.0.113.9') for n in range(49)]
+    assert not any(locks)
+    assert not logins.ip_blocked('203.0.113.9')
+    # Unknown emails count against the IP too
+    logins.record_failure(None, '203.0.113.9')
+    assert logins.ip_blocked('203.0.113.9')
+    assert not logins.ip_blocked('203.0.113.10')
+
+    clock.advance(HALF_LIFE)
+    assert not logins.ip_blocked('203.0.113.9')
+
+def test_prune_drops_decayed_keys_and_expired_locks(clock):
+    logins = tracker(clock, max_keys=4)
+    fail(logins, clock, 1, email='old@example.com', ip='10.0.0.2')
+    logins.lock('old@example.com')
+    clock.advance(10 * HALF_LIFE)
+    fail(logins, clock, 3, email=None, ip='10.0.0.3')
+    fail(logins, clock, 1, email='new@example.com', ip='10.0.0.4')
+    assert logins.stats() == {'tracked_keys': 5, 'locked_accounts': 1}
+
+    fail(logins, clock, 1, email='new@example.com', ip='10.0.0.4')
+    assert logins.stats() == {'tracked_keys': 3, 'locked_accounts': 0}
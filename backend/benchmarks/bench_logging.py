@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark
+Compares per-request logging cost of the synchronous basicConfig stream handler
+with the queue-based JSON pipeline from shared/log_pipeline.py under concurrent load.
+
+Usage:
+    python backend/benchmarks/bench_logging.py --threads 16 --requests 2000 --sink-latency-ms 0.2
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from shared.log_pipeline import configure_logging, shutdown_logging
+
+class SlowSink:
+    """File-like sink that simulates a slow terminal, pipe or log shipper"""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self._devnull = open(os.devnull, 'w')
+
+    def write(self, data):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._devnull.write(data)
+
+    def flush(self):
+        self._devnull.flush()
+
+def reset_logging():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+def simulate_request(logger: logging.Logger, i: int):
+    """Log calls issued by a typical login request"""
+    logger.debug("Looking up user %s", i)
+    logger.info(
+        "User logged in successfully: %s", f"user{i}@example.com",
+        extra={'event': 'auth.login', 'user_id': str(i)}
+    )
+    logger.debug("Refresh token stored for %s", i)
+
+def run(threads: int, requests_per_thread: int) -> list:
+    logger = logging.getLogger('bench.auth')
+    timings = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = []
+        for i in range(requests_per_thread):
+            start = time.perf_counter()
+            simulate_request(logger, offset + i)
+            local.append(time.perf_counter() - start)
+        with lock:
+            timings.extend(local)
+
+    workers = [
+        threading.Thread(target=worker, args=(t * requests_per_thread,))
+        for t in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return timings
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    mean = statistics.mean(timings) * 1e6
+    print(f"{name:<28} mean={mean:9.1f}us  p50={p50:9.1f}us  p99={p99:9.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000, help='requests per thread')
+    parser.add_argument('--sink-latency-ms', type=float, default=0.05)
+    parser.add_argument('--sample-rate', type=int, default=10, help='keep 1 in N auth.login events')
+    args = parser.parse_args()
+
+    total = args.threads * args.requests
+    print(f"🧪 Logging overhead: {args.threads} threads x {args.requests} requests, "
+          f"sink latency {args.sink_latency_ms}ms")
+    print("=" * 80)
+
+    # Baseline: logging.basicConfig with DEBUG level, as the auth service used to do
+    reset_logging()
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=SlowSink(args.sink_latency_ms / 1000),
+        force=True,
+    )
+    report('basicConfig (sync)', run(args.threads, args.requests))
+
+    for name, rates in (('queue pipeline', {}), ('queue pipeline + sampling', {'auth.login': args.sample_rate})):
+        reset_logging()
+        configure_logging(
+            service='bench',
+            level='DEBUG',
+            sample_rates=rates,
+            queue_size=total * 3,
+            stream=SlowSink(args.sink_latency_ms / 1000),
+        )
+        report(name, run(args.threads, args.requests))
+        drain_start = time.perf_counter()
+        shutdown_logging()
+        print(f"{'':<28} listener drained backlog in {time.perf_counter() - drain_start:.2f}s")
+
+    reset_logging()
+    configure_logging(
+        service='bench',
+        level='INFO',
+        logger_levels={'bench.auth': 'INFO'},
+        sample_rates={'auth.login': args.sample_rate},
+        queue_size=total * 3,
+        stream=SlowSink(args.sink_latency_ms / 1000),
+    )
+    report('queue + sampling, INFO', run(args.threads, args.requests))
+    shutdown_logging()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Inter-service client benchmark
+Runs a local stand-in for auth-service and compares bare `requests.get` calls
+(new TCP connection each time) with the pooled ServiceClient under concurrent load,
+then makes the upstream hang and measures how quickly callers fail.
+
+Usage:
+    python backend/benchmarks/bench_service_client.py --threads 16 --requests 200
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from shared.service_client import ServiceClient
+
+class StubAuthHandler(BaseHTTPRequestHandler):
+    """Answers like /protected with ~1ms latency and an occasional slow tail"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    hang = False
+
+    def do_GET(self):
+        if StubAuthHandler.hang:
+            time.sleep(5)
+        elif random.random() < 0.02:
+            time.sleep(0.25)
+        else:
+            time.sleep(0.001)
+        body = b'{"message": "Access granted", "user_id": "bench"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def load(call, threads: int, requests_per_thread: int) -> list:
+    timings, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            try:
+                call()
+            except Exception as e:
+                errors.append(type(e).__name__)
+            local.append(time.perf_counter() - start)
+        with lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sorted(timings), errors
+
+def report(name: str, timings: list, errors: list):
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[int(len(timings) * 0.99)] * 1000
+    print(f"{name:<30} p50={p50:8.2f}ms  p99={p99:8.2f}ms  max={timings[-1] * 1000:8.2f}ms  errors={len(errors)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='requests per thread')
+    args = parser.parse_args()
+    logging.getLogger('shared.service_client').setLevel(logging.ERROR)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAuthHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"🧪 Service client: {args.threads} threads x {args.requests} requests against {base_url}")
+    print("=" * 90)
+
+    report('bare requests.get', *load(
+        lambda: requests.get(f"{base_url}/protected", timeout=(0.5, 3.0)),
+        args.threads, args.requests
+    ))
+
+    pooled = ServiceClient('auth-stub', base_url, pool_size=args.threads)
+    report('pooled client', *load(lambda: pooled.get('/protected'), args.threads, args.requests))
+
+    hedged = ServiceClient('auth-stub', base_url, pool_size=args.threads * 2, hedge_after=0.02)
+    report('pooled client + hedging', *load(lambda: hedged.get('/protected'), args.threads, args.requests))
+    print(f"{'':<30} hedged requests sent: {hedged.hedges}")
+
+    # Upstream hangs: bare calls wait for the read timeout, the breaker fails fast once open
+    StubAuthHandler.hang = True
+    failing_calls = 20
+    report('bare requests.get (hung)', *load(
+        lambda: requests.get(f"{base_url}/protected", timeout=(0.5, 0.3)), 4, failing_calls // 4
+    ))
+    breaker_client = ServiceClient('auth-stub', base_url, timeout=(0.5, 0.3), retries=0)
+    report('pooled client (hung)', *load(lambda: breaker_client.get('/protected'), 4, failing_calls // 4))
+    print(f"{'':<30} circuit state: {breaker_client.breaker.state}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# Cart working set with write-behind persistence
+# Active carts live in memory and are mutated under a lock; a flusher thread writes
+# changed carts to PostgreSQL in one batched upsert per interval, so many clicks on
+# the same cart coalesce into a single row write. Checkout flushes synchronously.
+import json
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class Cart:
+    __slots__ = ('items', 'version', 'dirty')
+
+    def __init__(self, items: Optional[Dict[str, int]] = None, version: int = 0):
+        self.items = dict(items or {})
+        self.version = version
+        self.dirty = False
+
+    def to_dict(self) -> dict:
+        return {
+            'items': [{'product_id': pid, 'quantity': qty} for pid, qty in self.items.items()],
+            'version': self.version
+        }
+
+class CartLimitError(Exception):
+    """Cart would exceed the configured number of lines"""
+
+    def __init__(self, limit: int):
+        super().__init__(f'A cart holds at most {limit} products')
+        self.limit = limit
+
+class CartStore:
+    """Bounded in-memory carts keyed by owner, persisted write-behind
+
+    Owners are user ids for signed-in users and 'guest:<id>' for guests.
+    A crash loses at most `flush_interval` seconds of cart edits; checkout
+    always calls flush() for its cart first.
+
+    Args:
+        engine: database holding cart_service.carts
+        max_entries: carts kept in memory; least recently used clean carts are evicted
+        flush_interval: seconds between write-behind flushes
+        max_lines: distinct products per cart
+        max_quantity: units per line
+    """
+
+    def __init__(
+        self,
+        engine,
+        max_entries: int = 100000,
+        flush_interval: float = 2.0,
+        max_lines: int = 100,
+        max_quantity: int = 1000
+    ):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self.max_quantity = max_quantity
+        self._carts: 'OrderedDict[str, Cart]' = OrderedDict()
+        self._dirty = set()
+        self._flushing = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.loads = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.mutations = 0
+
+    def start(self):
+        """Start the write-behind flusher (idempotent) and flush on interpreter exit"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cart-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Cart flush failed: %s", e)
+
+    # Working set
+    def _ensure_loaded(self, owner: str):
+        """Bring a cart into memory; the database is read outside the lock"""
+        with self._lock:
+            if owner in self._carts:
+                return
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text('SELECT items, version FROM cart_service.carts WHERE owner_key = :owner'),
+                {'owner': owner}
+            ).first()
+        with self._lock:
+            if owner not in self._carts:
+                self._carts[owner] = Cart(row.items, row.version) if row else Cart()
+                self.loads += 1
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used clean carts; dirty ones stay until flushed"""
+        excess = len(self._carts) - self.max_entries
+        if excess <= 0:
+            return
+        victims = []
+        for owner, cart in self._carts.items():
+            if len(victims) >= excess:
+                break
+            if not cart.dirty and owner not in self._flushing:
+                victims.append(owner)
+        for owner in victims:
+            del self._carts[owner]
+
+    def _locked(self, owner: str, action):
+        """Run `action(cart)` under the lock once the cart is in memory"""
+        while True:
+            self._ensure_loaded(owner)
+            with self._lock:
+                cart = self._carts.get(owner)
+                if cart is not None:
+                    self._carts.move_to_end(owner)
+                    return action(cart)
+
+    def get(self, owner: str) -> dict:
+        return self._locked(owner, Cart.to_dict)
+
+    def _mutate(self, owner: str, apply) -> dict:
+        """Apply `apply(items)` to a copy of the cart's lines and mark the cart dirty if it changed"""
+        def action(cart: Cart) -> dict:
+            items = dict(cart.items)
+            apply(items)
+            if len(items) > self.max_lines:
+                raise CartLimitError(self.max_lines)
+            if items != cart.items:
+                cart.items = items
+                cart.version += 1
+                cart.dirty = True
+                self._dirty.add(owner)
+                self.mutations += 1
+            return cart.to_dict()
+        return self._locked(owner, action)
+
+    def add(self, owner: str, product_id: str, quantity: int) -> dict:
+        def apply(items):
+            items[product_id] = min(items.get(product_id, 0) + quantity, self.max_quantity)
+        return self._mutate(owner, apply)
+
+    def set_quantity(self, owner: str, product_id: str, quantity: int) -> dict:
+        def apply(items):
+            if quantity > 0:
+                items[product_id] = min(quantity, self.max_quantity)
+            else:
+                items.pop(product_id, None)
+        return self._mutate(owner, apply)
+
+    def clear(self, owner: str) -> dict:
+        return self._mutate(owner, lambda items: items.clear())
+
+    def remove_lines(self, owner: str, lines: list) -> dict:
+        """Take ordered (product_id, quantity) lines out of the cart
+
+        Lines added, and units added to ordered lines, after the cart was read for
+        checkout stay in the cart.
+        """
+        def apply(items):
+            for line in lines:
+                remaining = items.get(line['product_id'], 0) - line['quantity']
+                if remaining > 0:
+                    items[line['product_id']] = remaining
+                else:
+                    items.pop(line['product_id'], None)
+        return self._mutate(owner, apply)
+
+    def merge(self, guest_owner: str, owner: str) -> dict:
+        """Fold a guest cart into the user's cart at login and drop the guest cart"""
+        guest_items = self._locked(guest_owner, lambda cart: dict(cart.items))
+        if not guest_items:
+            return self.get(owner)
+
+        def apply(items):
+            for product_id, quantity in guest_items.items():
+                items[product_id] = min(items.get(product_id, 0) + quantity, self.max_quantity)
+        result = self._mutate(owner, apply)
+        # Persist the merged cart before the guest cart disappears
+        self.flush(owner)
+        with self._lock:
+            self._carts.pop(guest_owner, None)
+            self._dirty.discard(guest_owner)
+        with self.engine.begin() as conn:
+            conn.execute(text('DELETE FROM cart_service.carts WHERE owner_key = :owner'), {'owner': guest_owner})
+        return result
+
+    # Write-behind
+    def flush(self, owner: Optional[str] = None) -> int:
+        """Write dirty carts (or just `owner`'s) in one upsert; returns rows written"""
+        with self._lock:
+            owners = [owner] if owner is not None else list(self._dirty)
+            batch = []
+            for key in owners:
+                cart = self._carts.get(key)
+                if cart is not None and cart.dirty:
+                    batch.append((key, json.dumps(cart.items), cart.version))
+                    cart.dirty = False
+                self._dirty.discard(key)
+            # Carts being written must not be evicted and reloaded from the old row
+            self._flushing.update(b[0] for b in batch)
+        if not batch:
+            return 0
+        try:
+            with self.engine.begin() as conn:
+                # The version guard keeps an older snapshot from overwriting a newer one
+                conn.execute(text(
+                    'INSERT INTO cart_service.carts (owner_key, items, version, updated_at) '
+                    'SELECT v.owner_key, CAST(v.items AS jsonb), v.version, NOW() '
+                    'FROM unnest(CAST(:owners AS varchar[]), CAST(:items AS text[]), CAST(:versions AS bigint[])) '
+                    'AS v(owner_key, items, version) '
+                    'ON CONFLICT (owner_key) DO UPDATE SET items = EXCLUDED.items, version = EXCLUDED.version, '
+                    'updated_at = EXCLUDED.updated_at WHERE cart_service.carts.version < EXCLUDED.version'
+                ), {
+                    'owners': [b[0] for b in batch],
+                    'items': [b[1] for b in batch],
+                    'versions': [b[2] for b in batch]
+                })
+        except Exception:
+            # Mark the carts dirty again so the next flush retries them
+            with self._lock:
+                for key, _, version in batch:
+                    cart = self._carts.get(key)
+                    if cart is not None and cart.version == version:
+                        cart.dirty = True
+                        self._dirty.add(key)
+            raise
+        finally:
+            with self._lock:
+                self._flushing.difference_update(b[0] for b in batch)
+        self.flushes += 1
+        self.rows_written += len(batch)
+        return len(batch)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            dirty = len(self._dirty)
+            cached = len(self._carts)
+        return {
+            'cached': cached,
+            'dirty': dirty,
+            'loads': self.loads,
+            'mutations': self.mutations,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
@@ -0,0 +1,150 @@
+# Materialized localized price lists
+# product_prices holds every product's base_price converted into each active currency
+# and rounded to the currency's decimal places. A background job keeps it current:
+# products changed since a currency's watermark are repriced (a trigger bumps
+# products.updated_at on every UPDATE), and when a currency's rate in effect changes
+# its whole list is recomputed in one statement that only rewrites rows whose rounded
+# price actually moved.
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from sqlalchemy import text
+
+from shared.rates import RateIndex, WATERMARK_SQL
+
+logger = logging.getLogger(__name__)
+
+REPRICE_SQL = '''
+INSERT INTO localization_service.product_prices (currency, product_id, price)
+SELECT :currency, p.id, ROUND(p.base_price * :rate, :decimal_places)
+FROM product_service.products p
+{where}
+ON CONFLICT (currency, product_id) DO UPDATE SET price = EXCLUDED.price, updated_at = NOW()
+    WHERE product_prices.price IS DISTINCT FROM EXCLUDED.price
+'''
+
+class PriceListJob:
+    """Keep localization_service.product_prices in step with products and rates
+
+    Args:
+        engine: database holding localization_service and product_service
+        rate_index: point-in-time rates; a list uses the base -> currency rate in effect now
+        base_currency: currency of products.base_price
+        interval: seconds between runs of the background thread
+    """
+
+    def __init__(self, engine, rate_index: RateIndex, base_currency: str = 'USD', interval: float = 10.0):
+        self.engine = engine
+        self.rate_index = rate_index
+        self.base_currency = base_currency
+        self.interval = interval
+        self.runs = 0
+        self.rows_written = 0
+        self.full_reprices = 0
+        self.last_run_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-lists', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Price list run failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def run_once(self) -> int:
+        """Bring every active currency's list up to date; returns rows written"""
+        if not self.rate_index.stats()['ready']:
+            return 0
+        started = time.perf_counter()
+        with self.engine.begin() as conn:
+            currencies = {
+                row.code: row.decimal_places for row in conn.execute(text(
+                    'SELECT code, decimal_places FROM localization_service.currencies WHERE is_active'
+                ))
+            }
+            # Lists of deactivated currencies are dropped (their prices cascade)
+            conn.execute(text(
+                'DELETE FROM localization_service.price_lists WHERE NOT (currency = ANY(:codes))'
+            ), {'codes': list(currencies)})
+            for code in currencies:
+                conn.execute(text(
+                    'INSERT INTO localization_service.price_lists (currency) VALUES (:code) ON CONFLICT DO NOTHING'
+                ), {'code': code})
+
+        written = 0
+        now = datetime.now(timezone.utc)
+        for code, decimal_places in currencies.items():
+            written += self.refresh_currency(code, decimal_places, now)
+        self.runs += 1
+        self.rows_written += written
+        self.last_run_ms = round((time.perf_counter() - started) * 1000, 1)
+        return written
+
+    def refresh_currency(self, currency: str, decimal_places: int, now: datetime) -> int:
+        found = self.rate_index.as_of(self.base_currency, currency, now)
+        if found is None:
+            logger.warning("No %s -> %s rate in effect, %s price list not refreshed", self.base_currency, currency, currency)
+            return 0
+        effective_date, rate = found
+        if currency == self.base_currency:
+            effective_date = None
+
+        with self.engine.begin() as conn:
+            # Another worker refreshing this currency holds the row; skip it this round
+            state = conn.execute(text(
+                'SELECT rate, decimal_places, products_watermark FROM localization_service.price_lists '
+                'WHERE currency = :currency FOR UPDATE SKIP LOCKED'
+            ), {'currency': currency}).one_or_none()
+            if state is None:
+                return 0
+            watermark = conn.execute(text(WATERMARK_SQL)).scalar()
+            full = (
+                state.products_watermark is None
+                or state.rate != rate
+                or state.decimal_places != decimal_places
+            )
+            params = {'currency': currency, 'rate': rate, 'decimal_places': decimal_places}
+            if full:
+                written = conn.execute(text(REPRICE_SQL.format(where='')), params).rowcount
+                self.full_reprices += 1
+            else:
+                written = conn.execute(
+                    text(REPRICE_SQL.format(where='WHERE p.updated_at >= :since')),
+                    {**params, 'since': state.products_watermark}
+                ).rowcount
+            conn.execute(text(
+                'UPDATE localization_service.price_lists SET rate = :rate, rate_effective_date = :effective_date, '
+                'decimal_places = :decimal_places, products_watermark = :watermark, refreshed_at = NOW() '
+                'WHERE currency = :currency'
+            ), {**params, 'effective_date': effective_date, 'watermark': watermark})
+        if full:
+            logger.info("Repriced %s list at rate %s: %d prices changed", currency, rate, written)
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'runs': self.runs,
+            'rows_written': self.rows_written,
+            'full_reprices': self.full_reprices,
+            'last_run_ms': self.last_run_ms,
+            'last_error': self.last_error,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
@@ -0,0 +1,206 @@
+# Exchange-rate feed ingestion
+# Feeds are streamed row by row (CSV, JSON lines or provider snapshots, from files or
+# HTTP), validated in Python, streamed into a temporary staging table with COPY and
+# merged into localization_service.exchange_rates with a single INSERT ... ON CONFLICT.
+# Readers keep seeing the previous rates (MVCC) until the merge commits.
+import re
+import csv
+import json
+import time
+import logging
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, timezone
+from collections import Counter
+from typing import Dict, Any, Iterable, Iterator, Optional, Set
+
+import requests
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MAX_RATE = Decimal(10) ** 12  # DECIMAL(20,8)
+SOURCE_PATTERN = re.compile(r'^[\w.:-]{1,50}$')
+
+STAGING_DDL = (
+    'CREATE TEMP TABLE rate_staging ('
+    '  line_no BIGINT, from_currency VARCHAR(3), to_currency VARCHAR(3),'
+    '  rate DECIMAL(20,8), effective_date TIMESTAMPTZ, source VARCHAR(50)'
+    ') ON COMMIT DROP'
+)
+
+# Last occurrence of a key in the feed wins; unchanged rates are not rewritten
+MERGE_SQL = '''
+WITH merged AS (
+    INSERT INTO localization_service.exchange_rates AS r
+        (from_currency, to_currency, rate, effective_date, source)
+    SELECT DISTINCT ON (from_currency, to_currency, effective_date)
+        from_currency, to_currency, rate, effective_date, source
+    FROM rate_staging
+    ORDER BY from_currency, to_currency, effective_date, line_no DESC
+    ON CONFLICT (from_currency, to_currency, effective_date) DO UPDATE
+        SET rate = EXCLUDED.rate, source = EXCLUDED.source, updated_at = NOW()
+        WHERE r.rate IS DISTINCT FROM EXCLUDED.rate OR r.source IS DISTINCT FROM EXCLUDED.source
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT COUNT(*) FILTER (WHERE inserted) AS inserted, COUNT(*) FILTER (WHERE NOT inserted) AS updated
+FROM merged
+'''
+
+# Readers
+def read_csv_feed(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Rows of a CSV with a from_currency,to_currency,rate,effective_date[,source] header"""
+    return csv.DictReader(lines)
+
+def read_json_feed(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """JSON lines: each line is a rate row or a provider snapshot
+
+    A snapshot ({"base": "USD", "timestamp": ..., "rates": {"EUR": 0.92}}) expands
+    into one row per quoted currency.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield {}
+            continue
+        if isinstance(record, dict) and isinstance(record.get('rates'), dict):
+            effective = record.get('timestamp', record.get('date'))
+            for quote, rate in record['rates'].items():
+                yield {
+                    'from_currency': record.get('base'), 'to_currency': quote, 'rate': rate,
+                    'effective_date': effective, 'source': record.get('source')
+                }
+        else:
+            yield record if isinstance(record, dict) else {}
+
+def open_feed(location: str, feed_format: Optional[str] = None, timeout: float = 30.0) -> Iterator[Dict[str, Any]]:
+    """Stream the rows of a local file or an http(s) URL; the format defaults to the extension"""
+    if feed_format is None:
+        feed_format = 'json' if location.split('?', 1)[0].endswith(('.json', '.jsonl', '.ndjson')) else 'csv'
+    reader = read_json_feed if feed_format == 'json' else read_csv_feed
+    if location.startswith(('http://', 'https://')):
+        response = requests.get(location, stream=True, timeout=timeout)
+        response.raise_for_status()
+        response.encoding = response.encoding or 'utf-8'
+        with response:
+            yield from reader(response.iter_lines(decode_unicode=True))
+    else:
+        with open(location, newline='', encoding='utf-8') as f:
+            yield from reader(f)
+
+# Validation
+def parse_timestamp(value: Any) -> datetime:
+    """ISO 8601 string or unix seconds; naive values are UTC"""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
+        return datetime.fromtimestamp(float(value), tz=timezone.utc)
+    parsed = datetime.fromisoformat(str(value).strip())
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def validate_rates(rows: Iterable[Dict[str, Any]], currencies: Set[str], default_source: str, rejected: Counter):
+    """Normalized (from, to, rate, effective_date, source) tuples; counts rejects by reason"""
+    for row in rows:
+        try:
+            base = str(row['from_currency']).strip().upper()
+            quote = str(row['to_currency']).strip().upper()
+            rate = Decimal(str(row['rate']).strip())
+            effective = parse_timestamp(row['effective_date'])
+        except (KeyError, TypeError, ValueError, InvalidOperation, OverflowError, OSError):
+            rejected['malformed'] += 1
+            continue
+        if base not in currencies or quote not in currencies:
+            rejected['unknown_currency'] += 1
+        elif base == quote:
+            rejected['same_currency'] += 1
+        elif not rate.is_finite() or rate <= 0 or rate >= MAX_RATE:
+            rejected['rate_out_of_range'] += 1
+        else:
+            source = str(row.get('source') or default_source).strip()
+            if not SOURCE_PATTERN.match(source):
+                rejected['bad_source'] += 1
+                continue
+            yield base, quote, rate, effective, source
+
+class _CopyStream:
+    """File-like view of an iterator of COPY text lines, read by psycopg2 in chunks"""
+
+    def __init__(self, lines: Iterator[str], chunk_lines: int = 2000):
+        self._lines = lines
+        self._chunk_lines = chunk_lines
+        self._buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            chunk = [line for _, line in zip(range(self._chunk_lines), self._lines)]
+            if not chunk:
+                break
+            self._buffer += ''.join(chunk)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+class RateIngestor:
+    """Validate, stage and merge rate feeds into localization_service.exchange_rates
+
+    Args:
+        engine: database holding localization_service
+        source: default `source` column for rows that do not name one
+        lock_timeout: seconds the merge waits for row locks held by another writer
+        work_mem: sort memory for the merge's dedupe, so large feeds do not spill to disk
+    """
+
+    def __init__(self, engine, source: str = 'import', lock_timeout: float = 10.0, work_mem: str = '64MB'):
+        self.engine = engine
+        self.source = source
+        self.lock_timeout = lock_timeout
+        self.work_mem = work_mem
+
+    def currencies(self) -> Set[str]:
+        with self.engine.connect() as conn:
+            return set(conn.execute(text('SELECT code FROM localization_service.currencies')).scalars())
+
+    def ingest(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Load one feed in a single transaction and report what changed"""
+        started = time.perf_counter()
+        rejected: Counter = Counter()
+        counts = {'staged': 0}
+        valid = validate_rates(rows, self.currencies(), self.source, rejected)
+
+        def copy_lines():
+            for line_no, (base, quote, rate, effective, source) in enumerate(valid):
+                counts['staged'] = line_no + 1
+                yield f'{line_no}\t{base}\t{quote}\t{rate}\t{effective.isoformat()}\t{source}\n'
+
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{int(self.lock_timeout * 1000)}ms'"))
+            conn.execute(text("SELECT set_config('work_mem', :work_mem, true)"), {'work_mem': self.work_mem})
+            conn.execute(text(STAGING_DDL))
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(
+                'COPY rate_staging (line_no, from_currency, to_currency, rate, effective_date, source) FROM STDIN',
+                _CopyStream(copy_lines())
+            )
+            conn.execute(text('ANALYZE rate_staging'))
+            distinct = conn.execute(text(
+                'SELECT COUNT(*) FROM (SELECT DISTINCT from_currency, to_currency, effective_date FROM rate_staging) k'
+            )).scalar()
+            merged = conn.execute(text(MERGE_SQL)).one()
+
+        seconds = time.perf_counter() - started
+        read = counts['staged'] + sum(rejected.values())
+        report = {
+            'read': read,
+            'rejected': dict(rejected),
+            'staged': counts['staged'],
+            'duplicates': counts['staged'] - distinct,
+            'inserted': merged.inserted,
+            'updated': merged.updated,
+            'unchanged': distinct - merged.inserted - merged.updated,
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(read / seconds) if seconds else None
+        }
+        logger.info("Ingested exchange rates", extra={'event': 'rates.ingest', **report})
+        return report
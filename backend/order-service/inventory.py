@@ -0,0 +1,362 @@
+# Inventory reservation engine
+# A SKU's stock is split across N counter rows (slots) so concurrent checkouts lock
+# different rows; reads merge the slots. Reservations from many requests are allocated
+# in memory and committed together in one transaction by a batcher thread. The order
+# transaction confirms its hold by deleting it (the slot decrement already records the
+# sale), so the table only ever holds in-flight reservations; holds of orders that
+# never committed expire.
+import time
+import queue
+import random
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple, Iterable, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Adds the rows of a `released` CTE (deleted reservations) back to their slots
+RESTOCK_SQL = (
+    "UPDATE product_service.inventory_slots s SET quantity = s.quantity + r.quantity "
+    "FROM (SELECT product_id, slot_no, SUM(quantity) AS quantity FROM released GROUP BY product_id, slot_no) r "
+    "WHERE s.product_id = r.product_id AND s.slot_no = r.slot_no"
+)
+
+class OutOfStockError(Exception):
+    """Not enough unreserved stock for one or more products"""
+
+    def __init__(self, product_ids: List[str]):
+        super().__init__(f"Insufficient stock for {', '.join(product_ids)}")
+        self.product_ids = product_ids
+
+class _ReservationRequest:
+    __slots__ = ('order_id', 'lines', 'future', 'attempts')
+
+    def __init__(self, order_id, lines):
+        self.order_id = order_id
+        self.lines = lines
+        self.future = Future()
+        self.attempts = 0
+
+class InventoryEngine:
+    """Stock counters split across slots with TTL reservations and group commit
+
+    Args:
+        engine: database holding product_service.inventory_slots and stock_reservations
+        slots: counter rows per product created by set_stock
+        reservation_ttl: seconds before a hold that was never confirmed returns to stock
+        batch_window: seconds the batcher waits to gather more requests into a transaction
+        max_batch: reservation requests committed per transaction
+        reap_interval: seconds between passes releasing expired reservations
+        max_attempts: batches a request may wait for slots locked by other workers
+    """
+
+    def __init__(
+        self,
+        engine,
+        slots: int = 8,
+        reservation_ttl: float = 900.0,
+        batch_window: float = 0.005,
+        max_batch: int = 200,
+        reap_interval: float = 5.0,
+        max_attempts: int = 3
+    ):
+        self.engine = engine
+        self.slots = slots
+        self.reservation_ttl = reservation_ttl
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.reap_interval = reap_interval
+        self.max_attempts = max_attempts
+        self._queue: 'queue.Queue[_ReservationRequest]' = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._rng = random.Random()
+        self.batches = 0
+        self.reserved = 0
+        self.rejected = 0
+        self.expired = 0
+        self.timeouts = 0
+
+    def start(self):
+        """Start the batcher and the expiry reaper (idempotent)"""
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run_batcher, name='inventory-batcher', daemon=True),
+            threading.Thread(target=self._run_reaper, name='inventory-reaper', daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # Stock administration and reads
+    def set_stock(self, product_id, quantity: int):
+        """Replace a product's unreserved stock, spread evenly over the slots"""
+        base, remainder = divmod(quantity, self.slots)
+        rows = [
+            {'product_id': str(product_id), 'slot_no': slot, 'quantity': base + (1 if slot < remainder else 0)}
+            for slot in range(self.slots)
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(
+                text('DELETE FROM product_service.inventory_slots WHERE product_id = :product_id'),
+                {'product_id': str(product_id)}
+            )
+            conn.execute(text(
+                'INSERT INTO product_service.inventory_slots (product_id, slot_no, quantity) '
+                'VALUES (:product_id, :slot_no, :quantity)'
+            ), rows)
+
+    def available(self, product_ids: Iterable) -> Dict[str, int]:
+        """Unreserved stock per tracked product (slots merged on read)"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                'SELECT product_id, SUM(quantity) AS quantity FROM product_service.inventory_slots '
+                'WHERE product_id = ANY(CAST(:ids AS uuid[])) GROUP BY product_id'
+            ), {'ids': [str(pid) for pid in product_ids]}).all()
+        return {str(row.product_id): int(row.quantity) for row in rows}
+
+    # Reservations
+    def reserve(self, order_id, lines: List[Tuple], timeout: float = 10.0) -> datetime:
+        """Reserve (product_id, quantity) lines for an order, all or nothing
+
+        Products without inventory slots are not stock-tracked and always succeed.
+        Returns the reservation expiry; raises OutOfStockError, or TimeoutError after
+        which nothing stays held for the order.
+        """
+        request = _ReservationRequest(str(order_id), [(str(pid), qty) for pid, qty in lines])
+        self._queue.put(request)
+        try:
+            return request.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            # Still queued: the batcher drops it. Already in a batch: give the stock back once it commits
+            if not request.future.cancel():
+                request.future.add_done_callback(lambda future: self._release_late(order_id, future))
+            raise
+
+    def _release_late(self, order_id, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            self.release(order_id)
+        except Exception as e:
+            logger.error("Releasing timed-out reservation of order %s failed: %s", order_id, e)
+
+    def confirm(self, order_id, conn=None) -> int:
+        """Turn an order's held reservations into sold stock by dropping the holds
+
+        The slots were decremented when the stock was reserved, so deleting the hold
+        is all a sale needs. Pass the order's open transaction (Session or Connection)
+        so the order and its stock commit together; a hold is never left for the reaper
+        once the order exists.
+        """
+        statement = text(
+            "DELETE FROM product_service.stock_reservations "
+            "WHERE order_id = :order_id AND status = 'held'"
+        )
+        if conn is not None:
+            return conn.execute(statement, {'order_id': str(order_id)}).rowcount
+        with self.engine.begin() as conn:
+            return conn.execute(statement, {'order_id': str(order_id)}).rowcount
+
+    def release(self, order_id) -> int:
+        """Return an order's held reservations to stock"""
+        with self.engine.begin() as conn:
+            return conn.execute(text(
+                "WITH released AS ("
+                "  DELETE FROM product_service.stock_reservations "
+                "  WHERE order_id = :order_id AND status = 'held' "
+                "  RETURNING product_id, slot_no, quantity"
+                ") " + RESTOCK_SQL
+            ), {'order_id': str(order_id)}).rowcount
+
+    def reap_expired(self, limit: int = 1000) -> int:
+        """Release holds past their expiry (orders that never committed); returns slots restocked"""
+        with self.engine.begin() as conn:
+            return conn.execute(text(
+                "WITH released AS ("
+                "  DELETE FROM product_service.stock_reservations WHERE ctid IN ("
+                "    SELECT ctid FROM product_service.stock_reservations "
+                "    WHERE status = 'held' AND expires_at < NOW() LIMIT :limit FOR UPDATE SKIP LOCKED"
+                "  ) RETURNING product_id, slot_no, quantity"
+                ") " + RESTOCK_SQL
+            ), {'limit': limit}).rowcount
+
+    # Background threads
+    def _run_reaper(self):
+        while not self._stop.wait(self.reap_interval):
+            try:
+                restocked = self.reap_expired()
+                if restocked:
+                    self.expired += restocked
+                    logger.info("Released expired reservations on %s slots", restocked)
+            except Exception as e:
+                logger.error("Reservation reaper error: %s", e)
+
+    def _run_batcher(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                logger.error("Reservation batch failed: %s", e)
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _allocate(self, lines, tracked, stock) -> Tuple[Optional[list], list]:
+        """Take each line from a random slot with enough stock, else drain several slots
+
+        Returns (allocations, short product ids); allocations is None when any line is short.
+        """
+        allocations, short = [], []
+        pending = {}
+        for product_id, quantity in lines:
+            if product_id not in tracked:
+                continue
+            slots = pending.setdefault(product_id, dict(stock.get(product_id, {})))
+            order = sorted(slots)
+            if order:
+                offset = self._rng.randrange(len(order))
+                order = order[offset:] + order[:offset]
+            single = next((slot for slot in order if slots[slot] >= quantity), None)
+            if single is not None:
+                slots[single] -= quantity
+                allocations.append((product_id, single, quantity))
+                continue
+            if sum(slots.values()) < quantity:
+                short.append(product_id)
+                continue
+            need = quantity
+            for slot in order:
+                take = min(need, slots[slot])
+                if take:
+                    slots[slot] -= take
+                    allocations.append((product_id, slot, take))
+                    need -= take
+                if not need:
+                    break
+        if short:
+            return None, short
+        stock.update(pending)
+        return allocations, []
+
+    def _commit_batch(self, batch: List[_ReservationRequest]):
+        # Requests whose caller timed out before they were picked up are dropped; retried
+        # requests are already running
+        batch = [r for r in batch if r.future.running() or r.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        product_ids = sorted({pid for request in batch for pid, _ in request.lines})
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.reservation_ttl)
+        done, retry = [], []
+        with self.engine.begin() as conn:
+            tracked = {
+                str(row.product_id): row.slots for row in conn.execute(text(
+                    'SELECT product_id, COUNT(*) AS slots FROM product_service.inventory_slots '
+                    'WHERE product_id = ANY(CAST(:ids AS uuid[])) GROUP BY product_id'
+                ), {'ids': product_ids})
+            }
+            # Slots locked by another worker's batch are skipped rather than waited on
+            stock: Dict[str, Dict[int, int]] = {}
+            for row in conn.execute(text(
+                'SELECT product_id, slot_no, quantity FROM product_service.inventory_slots '
+                'WHERE product_id = ANY(CAST(:ids AS uuid[])) FOR UPDATE SKIP LOCKED'
+            ), {'ids': list(tracked)}):
+                stock.setdefault(str(row.product_id), {})[row.slot_no] = row.quantity
+            original = {pid: dict(slots) for pid, slots in stock.items()}
+
+            reservations = []
+            for request in batch:
+                allocations, short = self._allocate(request.lines, tracked, stock)
+                if allocations is not None:
+                    merged = {}
+                    for product_id, slot, quantity in allocations:
+                        merged[(product_id, slot)] = merged.get((product_id, slot), 0) + quantity
+                    reservations.extend(
+                        {'order_id': request.order_id, 'product_id': pid, 'slot_no': slot, 'quantity': quantity}
+                        for (pid, slot), quantity in merged.items()
+                    )
+                    done.append((request, None))
+                elif any(len(stock.get(pid, {})) < tracked[pid] for pid in short) \
+                        and request.attempts + 1 < self.max_attempts:
+                    request.attempts += 1
+                    retry.append(request)
+                else:
+                    done.append((request, OutOfStockError(short)))
+
+            changed = [
+                (pid, slot, quantity)
+                for pid, slots in stock.items()
+                for slot, quantity in slots.items()
+                if original[pid][slot] != quantity
+            ]
+            if changed:
+                conn.execute(text(
+                    'UPDATE product_service.inventory_slots s SET quantity = v.quantity '
+                    'FROM unnest(CAST(:pids AS uuid[]), CAST(:slots AS int[]), CAST(:quantities AS int[])) '
+                    'AS v(product_id, slot_no, quantity) '
+                    'WHERE s.product_id = v.product_id AND s.slot_no = v.slot_no'
+                ), {
+                    'pids': [c[0] for c in changed],
+                    'slots': [c[1] for c in changed],
+                    'quantities': [c[2] for c in changed]
+                })
+            if reservations:
+                conn.execute(text(
+                    'INSERT INTO product_service.stock_reservations '
+                    '(order_id, product_id, slot_no, quantity, expires_at) '
+                    'SELECT v.order_id, v.product_id, v.slot_no, v.quantity, :expires_at '
+                    'FROM unnest(CAST(:order_ids AS uuid[]), CAST(:pids AS uuid[]), CAST(:slots AS int[]), '
+                    'CAST(:quantities AS int[])) AS v(order_id, product_id, slot_no, quantity)'
+                ), {
+                    'order_ids': [r['order_id'] for r in reservations],
+                    'pids': [r['product_id'] for r in reservations],
+                    'slots': [r['slot_no'] for r in reservations],
+                    'quantities': [r['quantity'] for r in reservations],
+                    'expires_at': expires_at
+                })
+
+        self.batches += 1
+        for request, error in done:
+            if error is None:
+                self.reserved += 1
+                request.future.set_result(expires_at)
+            else:
+                self.rejected += 1
+                request.future.set_exception(error)
+        for request in retry:
+            self._queue.put(request)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'queued': self._queue.qsize(),
+            'batches': self.batches,
+            'reserved': self.reserved,
+            'rejected': self.rejected,
+            'avg_batch': round((self.reserved + self.rejected) / self.batches, 1) if self.batches else 0.0,
+            'expired_slots_restocked': self.expired,
+            'timeouts': self.timeouts,
+            'running': any(t.is_alive() for t in self._threads)
+        }
@@ -0,0 +1,219 @@
+# Payment gateway webhook pipeline
+# Requests only verify the signature and append the raw event; a dispatcher claims
+# stored events in id order and fans them out to worker threads partitioned by payment,
+# so events of one payment are applied in order while different payments run in parallel.
+import hmac
+import time
+import zlib
+import queue
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class SignatureError(Exception):
+    """Webhook signature missing, malformed, stale or wrong"""
+
+def sign_payload(secret: str, body: bytes, timestamp: Optional[int] = None) -> str:
+    """Signature header value for `body`: 't=<unix time>,v1=<hex hmac-sha256>'"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+def verify_signature(secret: str, body: bytes, header: Optional[str], tolerance: float = 300):
+    """Check the HMAC and reject replays older than `tolerance` seconds"""
+    try:
+        parts = dict(item.split('=', 1) for item in (header or '').split(','))
+        timestamp = int(parts['t'])
+        signature = parts['v1']
+    except (KeyError, ValueError):
+        raise SignatureError('Malformed signature header')
+    if abs(time.time() - timestamp) > tolerance:
+        raise SignatureError('Signature timestamp outside tolerance')
+    expected = sign_payload(secret, body, timestamp).split('v1=', 1)[1]
+    if not hmac.compare_digest(expected, signature):
+        raise SignatureError('Signature mismatch')
+
+def store_event(engine, event: Dict[str, Any], payload_json: str) -> bool:
+    """Durably append a verified event; False if the gateway already delivered it"""
+    with engine.begin() as conn:
+        return bool(conn.execute(text(
+            'INSERT INTO payment_service.webhook_events (event_id, payment_ref, event_type, payload) '
+            'VALUES (:event_id, :payment_ref, :event_type, CAST(:payload AS jsonb)) '
+            'ON CONFLICT (event_id) DO NOTHING'
+        ), {
+            'event_id': event['id'],
+            'payment_ref': event['data']['payment_id'],
+            'event_type': event['type'],
+            'payload': payload_json
+        }).rowcount)
+
+class WebhookProcessor:
+    """Apply stored webhook events with per-payment ordering
+
+    Args:
+        engine: database holding payment_service.webhook_events
+        handler: handler(conn, event) applying one event inside its transaction
+        workers: worker threads; a payment always maps to the same worker
+        batch_size: events claimed per dispatch
+        lease: seconds a claim is held before another dispatcher may take the event
+        max_attempts: failed events are parked (processed with last_error) after this many tries
+        poll_interval: seconds between polls when not woken by a new delivery
+    """
+
+    def __init__(
+        self,
+        engine,
+        handler: Callable[[Any, Dict[str, Any]], None],
+        workers: int = 8,
+        batch_size: int = 500,
+        lease: float = 30.0,
+        max_attempts: int = 10,
+        poll_interval: float = 1.0
+    ):
+        self.engine = engine
+        self.handler = handler
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._queues: List[queue.Queue] = [queue.Queue() for _ in range(workers)]
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        self._drained = threading.Condition(self._inflight_lock)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.processed = 0
+        self.failed = 0
+        self.parked = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Start the dispatcher and workers (idempotent)"""
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._dispatch, name='webhook-dispatcher', daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work, args=(q,), name=f'webhook-worker-{i}', daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        """Wake the dispatcher after a delivery instead of waiting for the next poll"""
+        self._wake.set()
+
+    def claim(self) -> List[Dict[str, Any]]:
+        """Lease the oldest unprocessed events"""
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                "UPDATE payment_service.webhook_events SET "
+                "claimed_until = NOW() + (:lease * INTERVAL '1 second'), attempts = attempts + 1 "
+                "WHERE id IN ("
+                "  SELECT id FROM payment_service.webhook_events "
+                "  WHERE processed_at IS NULL AND (claimed_until IS NULL OR claimed_until < NOW()) "
+                "  ORDER BY id LIMIT :limit FOR UPDATE SKIP LOCKED"
+                ") RETURNING id, payment_ref, event_type, payload, attempts"
+            ), {'lease': self.lease, 'limit': self.batch_size}).all()
+        return sorted((dict(row._mapping) for row in rows), key=lambda event: event['id'])
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            # Claim more only once the previous batch has been applied
+            with self._drained:
+                while self._inflight and not self._stop.is_set():
+                    self._drained.wait(timeout=1.0)
+            try:
+                events = self.claim()
+            except Exception as e:
+                logger.error("Webhook claim failed: %s", e)
+                events = []
+            if not events:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            with self._inflight_lock:
+                self._inflight += len(events)
+            for event in events:
+                partition = zlib.crc32(event['payment_ref'].encode()) % len(self._queues)
+                self._queues[partition].put(event)
+
+    def _work(self, events: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                event = events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            # A failure must not end the worker: its partition would stall and _dispatch would wait forever
+            try:
+                self.apply(event)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Webhook worker error on event %s: %s", event['id'], e, exc_info=True)
+            finally:
+                with self._drained:
+                    self._inflight -= 1
+                    self._drained.notify()
+
+    def apply(self, event: Dict[str, Any]):
+        """Run the handler and mark the event processed in the same transaction"""
+        try:
+            with self.engine.begin() as conn:
+                self.handler(conn, event)
+                conn.execute(text(
+                    'UPDATE payment_service.webhook_events SET processed_at = NOW(), last_error = NULL '
+                    'WHERE id = :id'
+                ), {'id': event['id']})
+            with self._inflight_lock:
+                self.processed += 1
+        except Exception as e:
+            with self._inflight_lock:
+                self.failed += 1
+            park = event['attempts'] >= self.max_attempts
+            logger.error(
+                "Webhook event %s failed (attempt %s%s): %s",
+                event['id'], event['attempts'], ', parked' if park else '', e
+            )
+            self.last_error = str(e)
+            # Retry after a backoff, or park the event for manual inspection. If this write
+            # fails too (e.g. the database is down), the claim lease expires and the event is retried
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text(
+                        'UPDATE payment_service.webhook_events SET last_error = :error, '
+                        "claimed_until = NOW() + (:delay * INTERVAL '1 second'), "
+                        'processed_at = CASE WHEN :park THEN NOW() ELSE NULL END WHERE id = :id'
+                    ), {'id': event['id'], 'error': str(e)[:500], 'delay': min(2 ** event['attempts'], 300), 'park': park})
+            except Exception as bookkeeping_error:
+                logger.error("Recording failure of webhook event %s failed: %s", event['id'], bookkeeping_error)
+                return
+            if park:
+                with self._inflight_lock:
+                    self.parked += 1
+
+    def stats(self) -> Dict[str, Any]:
+        dispatcher = bool(self._threads) and self._threads[0].is_alive()
+        workers = sum(t.is_alive() for t in self._threads[1:])
+        return {
+            'inflight': self._inflight,
+            'processed': self.processed,
+            'failed': self.failed,
+            'parked': self.parked,
+            'last_error': self.last_error,
+            'dispatcher_alive': dispatcher,
+            'workers_alive': workers,
+            'workers': len(self._queues),
+            # Every partition needs its worker; one dead thread stalls its payments
+            'ready': dispatcher and workers == len(self._queues)
+        }
@@ -0,0 +1,358 @@
+# Search-as-you-type over product names and SKUs
+# Completion keys (the name, each later word of the name, the SKU) are kept in one
+# sorted list with a parallel array of product slots, so a prefix is a bisected range.
+# Short ranges are ranked on the fly; ranges too large to scan keep a cached ranking per
+# prefix that product changes patch in place. Updates build a new snapshot (keys, slots,
+# products and rankings together) and publish it with one assignment, so queries never
+# lock and never mix slot numbers of two snapshots.
+import re
+import time
+import heapq
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple, Any
+
+from sqlalchemy import text
+
+from shared.rates import WATERMARK_SQL
+
+logger = logging.getLogger(__name__)
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+RANGE_END = '\U0010ffff'
+
+# Active products ranked by order lines in the last 30 days
+PRODUCTS_SQL = '''
+SELECT p.id, p.name, p.sku, p.is_active, COALESCE(s.orders, 0) AS score
+FROM product_service.products p
+LEFT JOIN (
+    SELECT i.product_id, COUNT(*) AS orders
+    FROM order_service.order_items i JOIN order_service.orders o ON o.id = i.order_id
+    WHERE o.created_at > NOW() - INTERVAL '30 days'
+    GROUP BY i.product_id
+) s ON s.product_id = p.id
+'''
+
+# Products deleted since the watermark, shaped like PRODUCTS_SQL rows of inactive products
+TOMBSTONES_SQL = '''
+SELECT t.product_id AS id, NULL AS name, NULL AS sku, FALSE AS is_active, 0 AS score
+FROM product_service.product_tombstones t WHERE t.deleted_at >= :since
+'''
+
+# A refresh older than rebuild_interval rebuilds, so older tombstones are never read
+PRUNE_TOMBSTONES_SQL = '''
+DELETE FROM product_service.product_tombstones WHERE deleted_at < NOW() - (:age * INTERVAL '1 second')
+'''
+
+def normalize(value: str) -> str:
+    """Lowercase ASCII folding with runs of punctuation collapsed to one space"""
+    folded = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode().lower()
+    return NON_ALNUM.sub(' ', folded).strip()
+
+def completion_keys(name: str, sku: str, max_words: int = 6) -> List[str]:
+    """The normalized name, the name from each later word on, and the SKU"""
+    words = normalize(name).split()
+    keys = {' '.join(words[i:]) for i in range(min(len(words), max_words))}
+    keys.add(normalize(sku))
+    keys.discard('')
+    return sorted(keys)
+
+class _Snapshot:
+    __slots__ = ('keys', 'refs', 'top', 'products', 'slots', 'next_slot')
+
+    def __init__(
+        self,
+        keys: List[str],
+        refs: array,
+        top: Dict[str, Tuple[int, ...]],
+        products: Dict[int, Tuple[str, str, str, float]],
+        slots: Dict[str, int],
+        next_slot: int
+    ):
+        self.keys = keys
+        self.refs = refs
+        self.top = top
+        # slot -> (product id, name, sku, score); slots are not reused until the next rebuild
+        self.products = products
+        self.slots = slots
+        self.next_slot = next_slot
+
+class PrefixIndex:
+    """In-process autocomplete over active products
+
+    Args:
+        engine: database holding product_service (and order_service for popularity)
+        max_results: largest k a query may ask for
+        scan_limit: prefix ranges up to this size are ranked per query, larger ones are cached
+        warm_depth: prefixes up to this length are ranked when the index is built
+        refresh_interval: seconds between incremental loads of changed products
+        rebuild_interval: seconds between full rebuilds, which also refresh popularity and
+            prune tombstones of deleted products older than twice this interval
+        rebuild_ratio: an incremental load touching more than this share of products rebuilds instead
+    """
+
+    def __init__(
+        self,
+        engine,
+        max_results: int = 10,
+        scan_limit: int = 256,
+        warm_depth: int = 2,
+        refresh_interval: float = 2.0,
+        rebuild_interval: float = 3600.0,
+        rebuild_ratio: float = 0.05
+    ):
+        self.engine = engine
+        self.max_results = max_results
+        self.scan_limit = scan_limit
+        self.warm_depth = warm_depth
+        # Cached rankings keep spare depth so removals rarely force a recompute
+        self.cache_depth = max_results * 2
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.rebuild_ratio = rebuild_ratio
+        self._snapshot = _Snapshot([], array('l'), {}, {}, {}, 0)
+        self._watermark = None
+        self._built_at = 0.0
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rebuilds = 0
+        self.updates = 0
+        self.last_build_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    # Queries
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Best-ranked products with a completion key starting with `prefix`"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        limit = max(1, min(limit, self.max_results))
+        snapshot = self._snapshot
+        keys = snapshot.keys
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + RANGE_END, lo)
+        if hi - lo <= self.scan_limit:
+            slots = self._rank(snapshot.products, set(snapshot.refs[lo:hi]))
+        else:
+            slots = snapshot.top.get(prefix)
+            if slots is None:
+                slots = snapshot.top[prefix] = self._rank(snapshot.products, set(snapshot.refs[lo:hi]))
+        products = snapshot.products
+        results = []
+        for slot in slots[:limit]:
+            product = products.get(slot)
+            if product is not None:
+                results.append({'product_id': product[0], 'name': product[1], 'sku': product[2]})
+        return results
+
+    @staticmethod
+    def _rank_key(product: Tuple[str, str, str, float]):
+        return -product[3], len(product[1]), product[1], product[2]
+
+    def _rank(self, products: Dict[int, Tuple[str, str, str, float]], slots) -> Tuple[int, ...]:
+        candidates = ((slot, products.get(slot)) for slot in slots)
+        return tuple(slot for slot, _ in heapq.nsmallest(
+            self.cache_depth, ((slot, product) for slot, product in candidates if product is not None),
+            key=lambda item: self._rank_key(item[1])
+        ))
+
+    def _warm(self, snapshot: _Snapshot, prefix: str = '', lo: int = 0, hi: Optional[int] = None):
+        """Rank every prefix up to warm_depth whose range is too large to scan per query"""
+        keys = snapshot.keys
+        hi = len(keys) if hi is None else hi
+        depth = len(prefix) + 1
+        while lo < hi:
+            if len(keys[lo]) < depth:
+                lo += 1
+                continue
+            child = keys[lo][:depth]
+            child_hi = bisect_left(keys, child + RANGE_END, lo, hi)
+            if child_hi - lo > self.scan_limit:
+                snapshot.top[child] = self._rank(snapshot.products, set(snapshot.refs[lo:child_hi]))
+                if depth < self.warm_depth:
+                    self._warm(snapshot, child, lo, child_hi)
+            lo = child_hi
+
+    # Loading
+    def rebuild(self) -> int:
+        """Load every active product and replace the index"""
+        started = time.perf_counter()
+        with self._write_lock, self.engine.connect() as conn:
+            watermark = conn.execute(text(WATERMARK_SQL)).scalar()
+            rows = conn.execution_options(stream_results=True, yield_per=10000).execute(
+                text(PRODUCTS_SQL + ' WHERE p.is_active')
+            )
+            products: Dict[int, Tuple[str, str, str, float]] = {}
+            entries = []
+            for slot, row in enumerate(rows):
+                products[slot] = (str(row.id), row.name, row.sku, float(row.score))
+                entries.extend((key, slot) for key in completion_keys(row.name, row.sku))
+            entries.sort()
+            snapshot = _Snapshot(
+                [key for key, _ in entries], array('l', (slot for _, slot in entries)), {},
+                products, {product[0]: slot for slot, product in products.items()}, len(products)
+            )
+            del entries
+            self._warm(snapshot)
+            self._snapshot = snapshot
+            self._watermark = watermark
+        self._built_at = time.monotonic()
+        with self.engine.begin() as conn:
+            conn.execute(text(PRUNE_TOMBSTONES_SQL), {'age': 2 * self.rebuild_interval})
+        self.rebuilds += 1
+        self.last_build_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Built autocomplete index: %d products, %d keys", len(products), len(snapshot.keys))
+        return len(products)
+
+    def refresh(self) -> int:
+        """Apply products changed or deleted since the watermark; returns the number touched"""
+        if self._watermark is None or time.monotonic() - self._built_at > self.rebuild_interval:
+            return self.rebuild()
+        with self._write_lock, self.engine.connect() as conn:
+            watermark = conn.execute(text(WATERMARK_SQL)).scalar()
+            changed = conn.execute(
+                text(PRODUCTS_SQL + ' WHERE p.updated_at >= :since UNION ALL' + TOMBSTONES_SQL),
+                {'since': self._watermark}
+            ).all()
+            if not changed:
+                self._watermark = watermark
+                return 0
+            if len(changed) > self.rebuild_ratio * max(len(self._snapshot.products), 1):
+                rebuild = True
+            else:
+                rebuild = False
+                self._apply(changed)
+                self._watermark = watermark
+        if rebuild:
+            return self.rebuild()
+        self.updates += len(changed)
+        return len(changed)
+
+    def _apply(self, changed):
+        """Splice a batch of changed products into a new snapshot in one pass
+
+        Only copies are modified; queries keep reading the current snapshot until the
+        new one is published.
+        """
+        snapshot = self._snapshot
+        keys, refs = snapshot.keys, snapshot.refs
+        top = dict(snapshot.top)
+        products, slots = dict(snapshot.products), dict(snapshot.slots)
+        next_slot = snapshot.next_slot
+        drops = set()  # positions in the current arrays
+        adds = []      # (position in the current arrays, key, slot)
+        for row in changed:
+            product_id = str(row.id)
+            slot = slots.get(product_id)
+            old_keys = []
+            if slot is not None:
+                _, old_name, old_sku, _ = products[slot]
+                old_keys = completion_keys(old_name, old_sku)
+                for key in old_keys:
+                    position = bisect_left(keys, key)
+                    while position < len(keys) and keys[position] == key and refs[position] != slot:
+                        position += 1
+                    if position < len(keys) and keys[position] == key:
+                        drops.add(position)
+            new_keys = []
+            if row.is_active:
+                if slot is None:
+                    slot = slots[product_id] = next_slot
+                    next_slot += 1
+                products[slot] = (product_id, row.name, row.sku, float(row.score))
+                new_keys = completion_keys(row.name, row.sku)
+                for key in new_keys:
+                    position = bisect_left(keys, key)
+                    while position < len(keys) and keys[position] == key and refs[position] < slot:
+                        position += 1
+                    adds.append((position, key, slot))
+            elif slot is not None:
+                del products[slot], slots[product_id]
+            if slot is not None:
+                self._patch_rankings(top, products, slot, old_keys, new_keys)
+
+        adds.sort()
+        new_keys, new_refs = [], array('l')
+        cursor = 0
+        pending = iter(adds)
+        add = next(pending, None)
+        for position in sorted(drops | {position for position, _, _ in adds}):
+            new_keys.extend(keys[cursor:position])
+            new_refs.extend(refs[cursor:position])
+            while add is not None and add[0] == position:
+                new_keys.append(add[1])
+                new_refs.append(add[2])
+                add = next(pending, None)
+            cursor = position + 1 if position in drops else position
+        new_keys.extend(keys[cursor:])
+        new_refs.extend(refs[cursor:])
+        self._snapshot = _Snapshot(new_keys, new_refs, top, products, slots, next_slot)
+
+    def _patch_rankings(
+        self,
+        top: Dict[str, Tuple[int, ...]],
+        products: Dict[int, Tuple[str, str, str, float]],
+        slot: int,
+        old_keys: List[str],
+        new_keys: List[str]
+    ):
+        """Move one product within every cached ranking under its old and new keys
+
+        A ranking stays exact while it only loses entries or gains ones that beat its
+        last entry; once it is shorter than max_results it is dropped and recomputed
+        by the next query.
+        """
+        prefixes = lambda keys: {key[:length] for key in keys for length in range(1, len(key) + 1)}
+        new_prefixes = prefixes(new_keys)
+        product = products.get(slot)
+        rank_of = lambda s: self._rank_key(products[s])
+        for prefix in (prefixes(old_keys) | new_prefixes) & top.keys():
+            ranking = [s for s in top[prefix] if s != slot]
+            if prefix in new_prefixes and product is not None:
+                rank = self._rank_key(product)
+                # Past the tail of a ranking that has lost entries, the position is unknown
+                if not ranking or len(ranking) == self.cache_depth or rank < rank_of(ranking[-1]):
+                    insort(ranking, slot, key=rank_of)
+                    del ranking[self.cache_depth:]
+            if len(ranking) < self.max_results:
+                del top[prefix]
+            else:
+                top[prefix] = tuple(ranking)
+
+    def start(self):
+        """Build once, then follow product changes in the background (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='autocomplete-index', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Autocomplete refresh failed: %s", e)
+            self._stop.wait(self.refresh_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'products': len(snapshot.products),
+            'keys': len(snapshot.keys),
+            'cached_prefixes': len(snapshot.top),
+            'rebuilds': self.rebuilds,
+            'updates': self.updates,
+            'last_build_ms': self.last_build_ms,
+            'last_error': self.last_error,
+            'ready': self._watermark is not None
+        }
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Autocomplete index tests
+PrefixIndex runs against a stub engine serving rows from memory, so no database is needed.
+
+Usage:
+    python -m pytest backend/product-service/test_autocomplete.py
+"""
+import os
+import sys
+import random
+from collections import namedtuple
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from autocomplete import PrefixIndex, completion_keys, normalize
+
+Row = namedtuple('Row', 'id name sku is_active score')
+
+class StubResult:
+    def __init__(self, rows=(), scalar=None):
+        self._rows = list(rows)
+        self._scalar = scalar
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def all(self):
+        return list(self._rows)
+
+    def scalar(self):
+        return self._scalar
+
+class StubConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execution_options(self, **options):
+        return self
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if 'pg_stat_activity' in sql:
+            self.engine.clock += 1
+            return StubResult(scalar=self.engine.clock)
+        if 'product_tombstones' in sql and 'DELETE' in sql:
+            return StubResult()
+        if 'updated_at >=' in sql:
+            since = params['since']
+            changed = [row for row, changed_at in self.engine.rows.values() if changed_at >= since]
+            return StubResult(changed + [
+                Row(product_id, None, None, False, 0)
+                for product_id, deleted_at in self.engine.tombstones.items() if deleted_at >= since
+            ])
+        return StubResult(row for row, _ in self.engine.rows.values() if row.is_active)
+
+class StubEngine:
+    """products keyed by id with the watermark tick of their last change or deletion"""
+
+    def __init__(self, rows=()):
+        self.clock = 0
+        self.rows = {}
+        self.tombstones = {}
+        for row in rows:
+            self.put(row)
+
+    def put(self, row: Row):
+        self.rows[row.id] = (row, self.clock)
+
+    def delete(self, product_id: str):
+        del self.rows[product_id]
+        self.tombstones[product_id] = self.clock
+
+    def connect(self):
+        return StubConnection(self)
+
+    def begin(self):
+        return StubConnection(self)
+
+def product(n: int, name: str, score: float = 0, is_active: bool = True) -> Row:
+    return Row(f'id{n}', name, f'SKU{n}', is_active, score)
+
+def catalog(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = ['alpha', 'beta', 'gamma', 'alpine', 'amber', 'basket', 'blue', 'glass']
+    return [
+        product(n, ' '.join(rng.choice(words) for _ in range(rng.randint(1, 3))), rng.randint(0, 20))
+        for n in range(count)
+    ]
+
+def ids(results):
+    return [result['product_id'] for result in results]
+
+def build(rows, **kwargs) -> PrefixIndex:
+    index = PrefixIndex(StubEngine(rows), **kwargs)
+    index.rebuild()
+    return index
+
+PREFIXES = ['a', 'al', 'alp', 'alpha', 'b', 'ba', 'bl', 'g', 'gl', 'sku', 'sku1', 'sku4', 'amber b', 'zz']
+
+def test_completion_keys_cover_later_words_and_sku():
+    assert completion_keys('Blue Glass-Mug', 'BG-01') == ['bg 01', 'blue glass mug', 'glass mug', 'mug']
+    assert normalize('  Café  Crème! ') == 'cafe creme'
+
+def test_complete_ranks_by_popularity_then_name_length():
+    index = build([
+        product(1, 'Alpha Mug', score=1),
+        product(2, 'Alpha', score=1),
+        product(3, 'Alpha Mug Large', score=5),
+        product(4, 'Beta Alpha', score=0),
+    ])
+    assert ids(index.complete('alp')) == ['id3', 'id2', 'id1', 'id4']
+    assert ids(index.complete('ALPHA mug', limit=1)) == ['id3']
+    assert ids(index.complete('sku4')) == ['id4']
+    assert index.complete('') == [] and index.complete('zzz') == []
+
+def test_large_ranges_use_cached_rankings_equal_to_a_scan():
+    rows = catalog(300)
+    cached = build(rows, scan_limit=8)
+    scanned = build(rows, scan_limit=10 ** 6)
+    assert cached._snapshot.top
+    for prefix in PREFIXES:
+        assert ids(cached.complete(prefix)) == ids(scanned.complete(prefix)), prefix
+
+def test_apply_matches_a_fresh_rebuild():
+    rng = random.Random(11)
+    engine = StubEngine(catalog(300))
+    index = PrefixIndex(engine, scan_limit=8, rebuild_ratio=1.0)
+    index.rebuild()
+    for step in range(20):
+        for _ in range(5):
+            n = rng.randrange(330)
+            choice = rng.random()
+            if choice < 0.1 and f'id{n}' in engine.rows:
+                engine.delete(f'id{n}')
+            elif choice < 0.3:
+                engine.put(product(n, 'alpha ' + rng.choice(['blue', 'glass', 'amber']), rng.randint(0, 40)))
+            elif choice < 0.5:
+                engine.put(product(n, 'gamma', is_active=False))
+            else:
+                engine.put(product(n, rng.choice(['beta', 'alpine', 'glass']) + f' {step}', rng.randint(0, 40)))
+        assert index.refresh() > 0
+        fresh = build([row for row, _ in engine.rows.values()], scan_limit=8)
+        for prefix in PREFIXES:
+            assert ids(index.complete(prefix)) == ids(fresh.complete(prefix)), (step, prefix)
+    assert index.rebuilds == 1 and index.updates > 0
+
+def test_apply_publishes_a_new_snapshot_without_touching_the_current_one():
+    engine = StubEngine(catalog(50))
+    index = PrefixIndex(engine, rebuild_ratio=1.0)
+    index.rebuild()
+    before = index._snapshot
+    products, slots = dict(before.products), dict(before.slots)
+    engine.put(product(0, 'zebra', 99))
+    engine.put(product(1, 'gamma', is_active=False))
+    engine.put(product(500, 'zeta', 1))
+    index.refresh()
+    assert before.products == products and before.slots == slots
+    after = index._snapshot
+    assert after is not before
+    assert 'id1' not in after.slots and after.slots['id500'] == before.next_slot
+    assert ids(index.complete('ze')) == ['id0', 'id500']
+
+def test_deleted_products_disappear_without_a_rebuild():
+    engine = StubEngine([product(1, 'Alpha Mug', 3), product(2, 'Alpha Cup', 1)])
+    index = PrefixIndex(engine, rebuild_ratio=1.0)
+    index.rebuild()
+    engine.delete('id1')
+    assert index.refresh() == 1
+    assert ids(index.complete('alpha')) == ['id2']
+    assert index.complete('sku1') == []
+    assert index.rebuilds == 1
+
+def test_patch_rankings_moves_a_product_and_drops_short_rankings():
+    index = PrefixIndex(StubEngine(), max_results=2)
+    products = {0: ('a', 'ab', 'S0', 5.0), 1: ('b', 'ac', 'S1', 3.0), 2: ('c', 'ad', 'S2', 1.0)}
+    top = {'a': (0, 1, 2)}
+    products[2] = ('c', 'ad', 'S2', 10.0)
+    index._patch_rankings(top, products, 2, ['ad'], ['ad'])
+    assert top['a'] == (2, 0, 1)
+
+    del products[2]
+    index._patch_rankings(top, products, 2, ['ad'], [])
+    assert top['a'] == (0, 1)
+    del products[1]
+    index._patch_rankings(top, products, 1, ['ac'], [])
+    assert 'a' not in top
+
+def test_rebuild_publishes_products_and_keys_together():
+    engine = StubEngine(catalog(300))
+    index = PrefixIndex(engine, scan_limit=8)
+    index.rebuild()
+    expected = {prefix: ids(index.complete(prefix)) for prefix in PREFIXES}
+
+    # New rows reach the index in a different order, renumbering every slot
+    engine.rows = dict(reversed(list(engine.rows.items())))
+    during = {}
+    warm = index._warm
+
+    def observe_then_warm(snapshot, *args):
+        if not args:
+            during.update({prefix: ids(index.complete(prefix)) for prefix in PREFIXES})
+        warm(snapshot, *args)
+
+    index._warm = observe_then_warm
+    index.rebuild()
+    assert during == expected
+    assert {prefix: ids(index.complete(prefix)) for prefix in PREFIXES} == expected
+
+def test_large_refresh_rebuilds():
+    engine = StubEngine(catalog(100))
+    index = PrefixIndex(engine, rebuild_ratio=0.05)
+    index.rebuild()
+    for n in range(10):
+        engine.put(product(n, 'omega', 1))
+    assert index.refresh() == 100
+    assert index.rebuilds == 2
+    assert len(index.complete('omega')) == 10
+
+@pytest.mark.parametrize('limit, expected', [(0, 1), (3, 3), (50, 10)])
+def test_limit_is_clamped(limit, expected):
+    index = build([product(n, f'alpha {n}') for n in range(20)])
+    assert len(index.complete('alpha', limit=limit)) == expected
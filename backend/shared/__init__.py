@@ -0,0 +1 @@
+# Shared infrastructure modules for the E-Commerce Platform Flask services
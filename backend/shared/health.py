@@ -0,0 +1,134 @@
+# Liveness/readiness probes backed by a cached health snapshot
+# A background thread checks the database at a fixed interval; probes only read the snapshot.
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+
+from flask_restful import Resource
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """Periodically refresh a health snapshot for the /readyz probe
+
+    Components register gauges (callables returning a dict); a gauge may report
+    `'ready': False` to mark the worker as not ready to take traffic.
+    """
+
+    def __init__(self, service: str, engine, interval: float = 10.0, version: str = '1.0.0'):
+        self.service = service
+        self.engine = engine
+        self.interval = interval
+        self.version = version
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._snapshot: Dict[str, Any] = {'ready': False, 'checked_at': None}
+        self._checked_monotonic = 0.0
+        self._started_at = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, name: str, gauge: Callable[[], Dict[str, Any]]):
+        """Register a component gauge reported under `name`"""
+        self._gauges[name] = gauge
+
+    def start(self):
+        """Start the background checker (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f'{self.service}-health', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def check_database(self) -> Dict[str, Any]:
+        """Run a trivial query and report latency plus connection pool state"""
+        started = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+            result = {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            logger.warning("Database health check failed: %s", e)
+            result = {'ok': False, 'error': type(e).__name__}
+        result['pool'] = self.pool_state()
+        return result
+
+    def pool_state(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        state = {'status': pool.status()}
+        for attr in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if hasattr(pool, attr):
+                state[attr] = getattr(pool, attr)()
+        return state
+
+    def refresh(self) -> Dict[str, Any]:
+        """Collect a fresh snapshot; called from the background thread"""
+        database = self.check_database()
+        components = {}
+        ready = database['ok']
+        for name, gauge in self._gauges.items():
+            try:
+                components[name] = gauge()
+            except Exception as e:
+                components[name] = {'ready': False, 'error': type(e).__name__}
+            ready = ready and components[name].get('ready', True)
+
+        self._snapshot = {
+            'ready': ready,
+            'service': self.service,
+            'version': self.version,
+            'checked_at': datetime.utcnow().isoformat(),
+            'database': database,
+            'components': components,
+        }
+        self._checked_monotonic = time.monotonic()
+        return self._snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the cached snapshot; a stale snapshot is reported as not ready"""
+        snapshot = dict(self._snapshot)
+        age = time.monotonic() - self._checked_monotonic
+        snapshot['age_seconds'] = round(age, 2)
+        if self._checked_monotonic and age > self.interval * 3:
+            snapshot['ready'] = False
+            snapshot['stale'] = True
+        return snapshot
+
+    def uptime(self) -> float:
+        return time.monotonic() - self._started_at
+
+class LivenessResource(Resource):
+    """Liveness probe: the process is up and serving requests, no dependencies checked"""
+
+    def __init__(self, monitor: HealthMonitor):
+        self.monitor = monitor
+
+    def get(self):
+        return {
+            'status': 'alive',
+            'service': self.monitor.service,
+            'uptime_seconds': round(self.monitor.uptime(), 1)
+        }, 200
+
+class ReadinessResource(Resource):
+    """Readiness probe: serves the cached snapshot, 503 when not ready"""
+
+    def __init__(self, monitor: HealthMonitor):
+        self.monitor = monitor
+
+    def get(self):
+        snapshot = self.monitor.snapshot()
+        snapshot['status'] = 'ready' if snapshot['ready'] else 'not_ready'
+        return snapshot, 200 if snapshot['ready'] else 503
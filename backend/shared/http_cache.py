@@ -0,0 +1,217 @@
+# Cached, precompressed HTTP responses for reference data
+# A cached GET handler runs once per (route, query, locale, currency); its JSON body is
+# stored serialized together with gzip (and brotli, when installed) encodings and a
+# strong ETag. Hits do no database or serialization work and conditional requests get
+# 304. Entries are tagged with the data they were built from: writers invalidate a tag
+# in-process, and a watcher thread invalidates tags whose table fingerprint changed.
+import gzip
+import hashlib
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Response, g, request
+from flask_restful.representations.json import output_json
+from flask_restful.utils import unpack
+from sqlalchemy import text
+
+from shared.cache import TTLCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_UNSEEN = object()
+
+class _Entry:
+    __slots__ = ('generations', 'etag', 'bodies', 'headers')
+
+    def __init__(self, generations: Tuple[Tuple[str, int], ...], etag: str,
+                 bodies: Dict[str, bytes], headers: Dict[str, str]):
+        self.generations = generations
+        self.etag = etag
+        self.bodies = bodies
+        self.headers = headers
+
+class ResponseCache:
+    """Serve cached, precompressed JSON responses with strong ETags
+
+    Args:
+        engine: database the watched fingerprints are read from
+        max_age: default Cache-Control max-age in seconds
+        ttl: seconds an entry lives even if no invalidation reaches it
+        max_entries: bound on cached representations
+        min_compress_size: bodies smaller than this are only stored uncompressed
+        watch_interval: seconds between fingerprint checks of the watcher thread
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        max_age: int = 60,
+        ttl: float = 300.0,
+        max_entries: int = 1024,
+        min_compress_size: int = 512,
+        watch_interval: float = 5.0
+    ):
+        self.engine = engine
+        self.max_age = max_age
+        self.min_compress_size = min_compress_size
+        self.watch_interval = watch_interval
+        self._entries = TTLCache(ttl=ttl, max_entries=max_entries)
+        # tag -> generation; an entry is valid while every tag it was built under is unchanged
+        self._generations: Dict[str, int] = {}
+        self._generation_lock = threading.Lock()
+        # tag -> fingerprint query, and the last fingerprint seen
+        self._watched: Dict[str, str] = {}
+        self._fingerprints: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.last_error: Optional[str] = None
+
+    # Invalidation
+    def invalidate(self, *tags: str):
+        """Drop every entry built from any of `tags` (O(1): entries are checked lazily)"""
+        with self._generation_lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+        self.invalidations += len(tags)
+
+    def watch(self, tag: str, fingerprint_sql: str):
+        """Invalidate `tag` whenever the single value returned by `fingerprint_sql` changes"""
+        self._watched[tag] = fingerprint_sql
+
+    def check(self) -> int:
+        """Compare every watched fingerprint once; returns the number of tags invalidated"""
+        if not self._watched:
+            return 0
+        with self.engine.connect() as conn:
+            current = {tag: conn.execute(text(sql)).scalar() for tag, sql in self._watched.items()}
+        # The first check invalidates too: entries may predate the first fingerprint
+        changed = [tag for tag, value in current.items() if self._fingerprints.get(tag, _UNSEEN) != value]
+        self._fingerprints = current
+        if changed:
+            self.invalidate(*changed)
+            logger.info("Reference data changed, invalidated cached responses: %s", ', '.join(changed))
+        return len(changed)
+
+    def start(self):
+        """Watch fingerprints in the background (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='response-cache', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Response cache fingerprint check failed: %s", e)
+            self._stop.wait(self.watch_interval)
+
+    # Serving
+    def _encode(self, body: bytes) -> Dict[str, bytes]:
+        bodies = {'identity': body}
+        if len(body) >= self.min_compress_size:
+            bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                bodies['br'] = brotli.compress(body, quality=11)
+        return bodies
+
+    @staticmethod
+    def _negotiate(bodies: Dict[str, bytes]) -> str:
+        accepted = request.accept_encodings
+        best, best_size = 'identity', len(bodies['identity'])
+        for encoding in ('br', 'gzip'):
+            body = bodies.get(encoding)
+            if body is not None and accepted[encoding] and len(body) < best_size:
+                best, best_size = encoding, len(body)
+        return best
+
+    def cached(self, *tags: str, max_age: Optional[int] = None, vary_currency: bool = False):
+        """Decorate a Resource GET handler whose JSON output depends only on `tags`
+
+        The key is the route, the query string, the negotiated locale (g.locale) and,
+        with vary_currency, the X-Currency header. Only 200 responses are cached.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        vary = 'Accept-Encoding, X-Currency' if vary_currency else 'Accept-Encoding'
+
+        def decorator(handler: Callable):
+            @wraps(handler)
+            def wrapper(*args, **kwargs):
+                key = (
+                    request.path,
+                    tuple(sorted(request.args.items(multi=True))),
+                    getattr(g, 'locale', None),
+                    request.headers.get('X-Currency', '').upper() if vary_currency else None
+                )
+                generations = self._generations
+                entry = self._entries.get(key)
+                if entry is None or any(generations.get(tag, 0) != seen for tag, seen in entry.generations):
+                    self.misses += 1
+                    # Captured before the handler runs, so an invalidation during the build wins
+                    built_under = tuple((tag, generations.get(tag, 0)) for tag in tags)
+                    result = handler(*args, **kwargs)
+                    if isinstance(result, Response):
+                        return result
+                    data, status, headers = unpack(result)
+                    response = output_json(data, status, headers)
+                    response.headers['Content-Type'] = 'application/json'
+                    if status != 200:
+                        return response
+                    body = response.get_data()
+                    entry = _Entry(
+                        built_under,
+                        hashlib.blake2b(body, digest_size=16).hexdigest(),
+                        self._encode(body),
+                        {name: value for name, value in response.headers.items() if name != 'Content-Length'}
+                    )
+                    self._entries.set(key, entry)
+                else:
+                    self.hits += 1
+
+                encoding = self._negotiate(entry.bodies)
+                # Strong ETags are per representation, so each encoding gets its own
+                etag = entry.etag if encoding == 'identity' else f'{entry.etag}-{encoding}'
+                if request.if_none_match.contains_weak(etag):
+                    self.not_modified += 1
+                    response = Response(status=304)
+                else:
+                    response = Response(entry.bodies[encoding], status=200, headers=entry.headers)
+                    if encoding != 'identity':
+                        response.headers['Content-Encoding'] = encoding
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = f'public, max-age={max_age}'
+                response.vary.update(part.strip() for part in vary.split(','))
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'invalidations': self.invalidations,
+            'watched': sorted(self._watched),
+            'brotli': brotli is not None,
+            'last_error': self.last_error,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
@@ -0,0 +1,164 @@
+# Backend translation catalogs
+# Catalogs are nested JSON files (<locale>.json) compiled once into flat, read-only
+# dicts keyed by dotted path. Missing translations are filled from the default locale
+# at compile time, so a lookup on the request path is a single dict access.
+import os
+import json
+import logging
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+
+def flatten(tree: dict, prefix: str = '') -> Dict[str, str]:
+    """{'auth': {'x': 'X'}} -> {'auth.x': 'X'}"""
+    flat = {}
+    for key, value in tree.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{path}.'))
+        else:
+            flat[path] = str(value)
+    return flat
+
+@lru_cache(maxsize=1024)
+def parse_accept_language(header: str) -> Tuple[str, ...]:
+    """Language tags of an Accept-Language header, best first, q=0 dropped"""
+    ranked = []
+    for position, item in enumerate(header.split(',')):
+        tag, _, params = item.strip().partition(';')
+        tag = tag.strip().lower()
+        if not tag:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, position, tag))
+    return tuple(tag for _, _, tag in sorted(ranked))
+
+class Translator:
+    """Compiled per-locale catalogs with hot reload
+
+    Args:
+        directory: folder of <locale>.json catalogs
+        default_locale: fallback locale; its catalog fills gaps in the others
+        reload_interval: seconds between catalog mtime checks of the watcher thread
+    """
+
+    def __init__(self, directory: str = LOCALES_DIR, default_locale: str = 'en', reload_interval: float = 5.0):
+        self.directory = directory
+        self.default_locale = default_locale
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._catalogs: Mapping[str, Mapping[str, str]] = MappingProxyType({})
+        self._mtimes: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.negotiate = lru_cache(maxsize=1024)(self._negotiate)
+        self.load()
+
+    # Compilation
+    def _scan(self) -> Dict[str, float]:
+        return {
+            entry.name[:-5]: entry.stat().st_mtime
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith('.json') and entry.is_file()
+        }
+
+    def load(self):
+        """Compile every catalog and swap them in at once"""
+        mtimes = self._scan()
+        trees = {}
+        for locale in mtimes:
+            with open(os.path.join(self.directory, f'{locale}.json'), encoding='utf-8') as f:
+                trees[locale] = flatten(json.load(f))
+        base = trees.get(self.default_locale, {})
+        self._catalogs = MappingProxyType({
+            locale: MappingProxyType({**base, **messages}) for locale, messages in trees.items()
+        })
+        self._mtimes = mtimes
+        self.negotiate.cache_clear()
+        self.reloads += 1
+        logger.info("Loaded translation catalogs: %s", ', '.join(sorted(trees)))
+
+    def start(self):
+        """Start the catalog watcher (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='i18n-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                if self._scan() != self._mtimes:
+                    self.load()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the previous catalogs until the files are fixed
+                self.last_error = str(e)
+                logger.error("Translation catalog reload failed: %s", e)
+
+    # Lookups
+    @property
+    def locales(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._catalogs))
+
+    def catalog(self, locale: str) -> Mapping[str, str]:
+        return self._catalogs.get(locale) or self._catalogs.get(self.default_locale, MappingProxyType({}))
+
+    def _negotiate(self, header: Optional[str]) -> str:
+        if header:
+            for tag in parse_accept_language(header):
+                if tag in self._catalogs:
+                    return tag
+                primary = tag.split('-', 1)[0]
+                if primary in self._catalogs:
+                    return primary
+        return self.default_locale
+
+    def translate(self, locale: str, key: str, **params) -> str:
+        message = self.catalog(locale).get(key, key)
+        return message.format(**params) if params else message
+
+    # Flask integration
+    def init_app(self, app):
+        """Negotiate the request locale once per request and label responses with it"""
+        @app.before_request
+        def _negotiate_locale():
+            g.locale = self.negotiate(request.headers.get('Accept-Language'))
+
+        @app.after_request
+        def _content_language(response):
+            response.headers.setdefault('Content-Language', g.get('locale', self.default_locale))
+            response.vary.add('Accept-Language')
+            return response
+
+    def gettext(self, key: str, **params) -> str:
+        """Translate `key` into the current request's locale"""
+        return self.translate(g.get('locale', self.default_locale), key, **params)
+
+    def stats(self) -> dict:
+        return {
+            'locales': list(self.locales),
+            'reloads': self.reloads,
+            'negotiation_cache': self.negotiate.cache_info().currsize,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,158 @@
+# Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY
+# Writers call publish() inside the transaction that changes the data; PostgreSQL
+# delivers the notification to every listening worker only if that transaction
+# commits. Each worker runs one listener thread that hands (entity, key, version)
+# to the callbacks subscribed for the entity. Notifications sent while a listener
+# is disconnected are lost, so every reconnect resets the subscribed caches.
+import select
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'cache_invalidation'
+
+# The version defaults to the writing transaction's id, so one commit is one version
+PUBLISH_SQL = text(
+    "SELECT pg_notify(:channel, :entity || ':' || :key || ':' || COALESCE(:version, pg_current_xact_id()::text))"
+)
+
+def parse_payload(payload: str):
+    """(entity, key, version) of a 'entity:key:version' payload; keys may contain ':'"""
+    entity, _, rest = payload.partition(':')
+    key, _, version = rest.rpartition(':')
+    return entity, key, version
+
+class InvalidationBus:
+    """Publish and receive cache invalidations on a PostgreSQL channel
+
+    Args:
+        engines: databases writers publish on (one listening connection each, e.g. every shard)
+        channel: NOTIFY channel shared by the publishing and listening services
+        reconnect_delay: seconds before a dropped listening connection is reopened
+        poll_timeout: seconds the listener blocks waiting for notifications
+    """
+
+    def __init__(
+        self,
+        engines: Iterable,
+        channel: str = DEFAULT_CHANNEL,
+        reconnect_delay: float = 1.0,
+        poll_timeout: float = 5.0
+    ):
+        # Shards that share a database also share its notifications
+        self.engines = list({id(engine): engine for engine in engines}.values())
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.poll_timeout = poll_timeout
+        self._handlers: Dict[str, List[Callable[[str, str], None]]] = {}
+        self._resets: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listening = False
+        self.received = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+
+    # Writers
+    def publish(self, conn, entity: str, key, version: Optional[str] = None):
+        """Queue a notification in the caller's open transaction (Session or Connection)
+
+        Identical notifications in one transaction are delivered once.
+        """
+        conn.execute(PUBLISH_SQL, {
+            'channel': self.channel, 'entity': entity, 'key': str(key),
+            'version': None if version is None else str(version)
+        })
+
+    # Readers
+    def subscribe(self, entity: str, handler: Callable[[str, str], None], reset: Optional[Callable[[], None]] = None):
+        """Call handler(key, version) for every notification about `entity`
+
+        `reset` is called whenever notifications may have been missed (at connect
+        and after every reconnect) and should drop everything the handler guards.
+        """
+        self._handlers.setdefault(entity, []).append(handler)
+        if reset is not None:
+            self._resets.append(reset)
+
+    def dispatch(self, payload: str):
+        entity, key, version = parse_payload(payload)
+        self.received += 1
+        for handler in self._handlers.get(entity, ()):
+            try:
+                handler(key, version)
+            except Exception as e:
+                logger.error("Invalidation handler for %s failed: %s", entity, e)
+
+    def start(self):
+        """Listen in the background (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='invalidation-bus', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _connect(self) -> list:
+        connections = []
+        for engine in self.engines:
+            # Detached from the pool: the connection stays in LISTEN for the life of the worker
+            connection = engine.raw_connection()
+            raw = connection.driver_connection
+            connection.detach()
+            raw.autocommit = True
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            connections.append(raw)
+        return connections
+
+    def _run(self):
+        connections = []
+        while not self._stop.is_set():
+            try:
+                connections = self._connect()
+                self._listening = True
+                # Anything committed before LISTEN took effect was never delivered
+                for reset in self._resets:
+                    reset()
+                self.last_error = None
+                while not self._stop.is_set():
+                    readable, _, _ = select.select(connections, [], [], self.poll_timeout)
+                    for raw in readable:
+                        raw.poll()
+                        while raw.notifies:
+                            self.dispatch(raw.notifies.pop(0).payload)
+                    if not readable:
+                        # Detects a dead connection even when the channel is quiet
+                        for raw in connections:
+                            with raw.cursor() as cursor:
+                                cursor.execute('SELECT 1')
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Invalidation listener failed, reconnecting: %s", e)
+                self.reconnects += 1
+            finally:
+                self._listening = False
+                for raw in connections:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+                connections = []
+            self._stop.wait(self.reconnect_delay)
+
+    def stats(self) -> dict:
+        return {
+            'channel': self.channel,
+            'databases': len(self.engines),
+            'listening': self._listening,
+            'received': self.received,
+            'reconnects': self.reconnects,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,149 @@
+# Non-blocking structured logging pipeline
+# Request threads only enqueue log records; a background listener formats and writes them.
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Dict
+
+# Attributes present on every LogRecord; anything else was passed via `extra=`
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'taskName'
+}
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON documents"""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'service': self.service,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in N records of high-volume events; WARNING and above always pass"""
+
+    def __init__(self, sample_rates: Dict[str, int]):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = getattr(record, 'event', None) or record.name
+        every = self.sample_rates.get(key)
+        if not every or every <= 1:
+            return True
+        with self._lock:
+            count = self._counters.get(key, 0)
+            self._counters[key] = count + 1
+        if count % every:
+            return False
+        record.sample_rate = every
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that defers message formatting to the listener thread
+
+    The stdlib QueueHandler renders `msg % args` in the calling thread; here the
+    record is enqueued untouched so request threads never pay for formatting.
+    When the queue is full the record is dropped and counted instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def shutdown_logging():
+    """Stop the background listener after draining pending records"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown_logging)
+
+def parse_mapping(value: Optional[str]) -> Dict[str, str]:
+    """Parse 'key=value,key=value' environment settings"""
+    result = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            key, _, val = item.partition('=')
+            result[key.strip()] = val.strip()
+    return result
+
+def configure_logging(
+    service: str,
+    level: str = 'INFO',
+    logger_levels: Optional[Dict[str, str]] = None,
+    sample_rates: Optional[Dict[str, int]] = None,
+    queue_size: int = 10000,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """Install the queue-based JSON pipeline on the root logger
+
+    Environment overrides:
+        LOG_LEVEL: root level (e.g. INFO)
+        LOG_LEVELS: per-logger levels, e.g. 'sqlalchemy.engine=WARNING,__main__=DEBUG'
+        LOG_SAMPLE_RATES: keep 1 in N INFO records per event, e.g. 'auth.login=10'
+        LOG_QUEUE_SIZE: maximum number of pending records before dropping
+    """
+    level = os.getenv('LOG_LEVEL', level).upper()
+    levels = dict(logger_levels or {})
+    levels.update(parse_mapping(os.getenv('LOG_LEVELS')))
+    rates = dict(sample_rates or {})
+    rates.update({k: int(v) for k, v in parse_mapping(os.getenv('LOG_SAMPLE_RATES')).items()})
+    queue_size = int(os.getenv('LOG_QUEUE_SIZE', queue_size))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(rates))
+
+    output_handler = logging.StreamHandler(stream or sys.stdout)
+    output_handler.setFormatter(JsonFormatter(service))
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    global _listener
+    _listener = logging.handlers.QueueListener(log_queue, output_handler)
+    _listener.start()
+    return _listener
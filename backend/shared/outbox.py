@@ -0,0 +1,127 @@
+# Transactional outbox relay
+# Services insert events into an outbox table in the same transaction as their writes;
+# a background thread claims unpublished rows with SKIP LOCKED and hands them to a publisher.
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, Any, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+def log_publisher(event: Dict[str, Any]):
+    """Default publisher: emit the event to the log pipeline"""
+    logger.info(
+        "Outbox event %s for %s", event['event_type'], event['aggregate_id'],
+        extra={'event': 'outbox.publish', 'payload': json.dumps(event['payload'], default=str)}
+    )
+
+class OutboxRelay:
+    """Publish outbox rows in id order, at least once
+
+    Args:
+        engine: engine of the database holding the outbox table
+        table: schema-qualified outbox table
+        publish: callable receiving one event dict; raising leaves the batch unpublished
+        batch_size: rows claimed per transaction
+        interval: seconds to sleep when the outbox is drained
+        retention_hours: published rows older than this are purged
+    """
+
+    def __init__(
+        self,
+        engine,
+        table: str,
+        publish: Optional[Callable[[Dict[str, Any]], None]] = None,
+        batch_size: int = 200,
+        interval: float = 0.5,
+        retention_hours: float = 24.0
+    ):
+        self.engine = engine
+        self.table = table
+        self.publish = publish or log_publisher
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retention_hours = retention_hours
+        self.published = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._last_purge = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the relay thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='outbox-relay', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                relayed = self.relay_once()
+                self._maybe_purge()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error("Outbox relay error: %s", e)
+                relayed = 0
+            # Drain a backlog without sleeping; poll slowly when idle
+            if relayed < self.batch_size:
+                self._stop.wait(self.interval)
+
+    def relay_once(self) -> int:
+        """Claim, publish and mark one batch; returns the number of events published"""
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                f"SELECT id, aggregate_type, aggregate_id, event_type, payload, created_at "
+                f"FROM {self.table} WHERE published_at IS NULL "
+                f"ORDER BY id LIMIT :limit FOR UPDATE SKIP LOCKED"
+            ), {'limit': self.batch_size}).all()
+            if not rows:
+                return 0
+            for row in rows:
+                self.publish({
+                    'id': row.id,
+                    'aggregate_type': row.aggregate_type,
+                    'aggregate_id': str(row.aggregate_id),
+                    'event_type': row.event_type,
+                    'payload': row.payload,
+                    'created_at': row.created_at.isoformat()
+                })
+            conn.execute(
+                text(f"UPDATE {self.table} SET published_at = NOW() WHERE id = ANY(:ids)"),
+                {'ids': [row.id for row in rows]}
+            )
+        self.published += len(rows)
+        return len(rows)
+
+    def _maybe_purge(self):
+        if time.monotonic() - self._last_purge < 3600:
+            return
+        self._last_purge = time.monotonic()
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"DELETE FROM {self.table} WHERE published_at < NOW() - (:hours * INTERVAL '1 hour')"
+            ), {'hours': self.retention_hours})
+
+    def pending(self) -> int:
+        """Unpublished events (served by the partial index on unpublished rows)"""
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT count(*) FROM {self.table} WHERE published_at IS NULL")).scalar()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': self.pending(),
+            'published': self.published,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
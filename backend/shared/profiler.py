@@ -0,0 +1,436 @@
+# On-demand request profiler with flamegraph export
+# A request is profiled when it carries a valid admin-signed X-Profile-Signature header
+# (minted by admin-service for one method and path) or when it is the Nth request of the
+# 1-in-N sample. While any request is profiled a sampler thread records the stacks of
+# the threads serving it, and cursor events time its SQL; at the end of the request both
+# are written to the output directory as a speedscope document (speedscope.app) or as
+# collapsed stacks (flamegraph.pl, inferno) plus a TSV of queries. Unprofiled requests
+# pay one header lookup and one counter increment; with neither a secret nor sampling
+# configured init_app installs nothing.
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import hashlib
+import logging
+import itertools
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Signature'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+FORMATS = ('speedscope', 'collapsed')
+# Seconds a signed header stays valid
+SIGNATURE_TOLERANCE = 300
+
+# Stacks start at the Flask dispatch; frames above it belong to the WSGI server
+_WSGI_CODE = Flask.wsgi_app.__code__
+
+class SignatureError(Exception):
+    """Profiling signature missing, malformed, stale or wrong"""
+
+def sign_request(secret: str, method: str, path: str, timestamp: Optional[int] = None) -> str:
+    """Header value that profiles `method path`: 't=<unix time>,v1=<hex hmac-sha256>'"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    message = f'{timestamp}.{method.upper()} {path}'.encode()
+    return f't={timestamp},v1={hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()}'
+
+def verify_request(secret: str, method: str, path: str, header: Optional[str], tolerance: float = SIGNATURE_TOLERANCE):
+    """Check the HMAC for this method and path and reject signatures older than `tolerance` seconds"""
+    try:
+        parts = dict(item.split('=', 1) for item in (header or '').split(','))
+        timestamp = int(parts['t'])
+        signature = parts['v1']
+    except (KeyError, ValueError):
+        raise SignatureError('Malformed signature header')
+    if abs(time.time() - timestamp) > tolerance:
+        raise SignatureError('Signature timestamp outside tolerance')
+    expected = sign_request(secret, method, path, timestamp).split('v1=', 1)[1]
+    if not hmac.compare_digest(expected, signature):
+        raise SignatureError('Signature mismatch')
+
+def _frame_name(frame) -> str:
+    """Display name of a stack element: a code object, or a label such as a thread name"""
+    if isinstance(frame, str):
+        return frame
+    qualname = getattr(frame, 'co_qualname', frame.co_name)
+    return f'{qualname} ({os.path.basename(frame.co_filename)}:{frame.co_firstlineno})'
+
+def _frame_file(frame) -> Tuple[str, int]:
+    if isinstance(frame, str):
+        return '', 0
+    return frame.co_filename, frame.co_firstlineno
+
+class _Profile:
+    """Samples and queries of one request"""
+
+    def __init__(self, trigger: str, method: str, path: str, endpoint: Optional[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint or 'unknown'
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.status: Optional[int] = None
+        # thread ident -> time of its last sample; a sample stands for the time since the
+        # thread's previous one (or since the request started)
+        self.last_sample: Dict[int, float] = {}
+        # stack (root first) -> sample count and sampled seconds
+        self.counts: Counter = Counter()
+        self.seconds: Dict[tuple, float] = {}
+        # (offset from request start, duration, statement, helper thread label) in seconds
+        self.queries: List[Tuple[float, float, str, Optional[str]]] = []
+
+    @property
+    def name(self) -> str:
+        return f'{self.method} {self.path}'
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+class RequestProfiler:
+    """Profile signed or sampled requests of a Flask app and write flamegraph files
+
+    Args:
+        service: service name used in file names
+        engines: databases whose queries are timed (e.g. every shard)
+        output_dir: directory the profile files are written to
+        secret: HMAC key shared with admin-service; None disables signed profiling
+        sample_every: profile 1 in N requests; 0 disables sampling
+        interval: seconds between stack samples while a request is profiled
+        output_format: 'speedscope' (one .speedscope.json) or 'collapsed' (.folded and .sql.tsv)
+        max_files: profiles kept in output_dir; the oldest are deleted
+        tolerance: seconds a signature stays valid
+    """
+
+    def __init__(
+        self,
+        service: str,
+        engines: Iterable = (),
+        output_dir: str = '/tmp/profiles',
+        secret: Optional[str] = None,
+        sample_every: int = 0,
+        interval: float = 0.005,
+        output_format: str = 'speedscope',
+        max_files: int = 200,
+        tolerance: float = SIGNATURE_TOLERANCE
+    ):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format {output_format}; expected one of {', '.join(FORMATS)}")
+        self.service = service
+        self.engines = list({id(engine): engine for engine in engines}.values())
+        self.output_dir = output_dir
+        self.secret = secret or None
+        self.sample_every = max(0, int(sample_every))
+        self.interval = interval
+        self.output_format = output_format
+        self.max_files = max_files
+        self.tolerance = tolerance
+        # thread ident -> (profile, label of a helper thread or None for the request thread)
+        self._active: Dict[int, Tuple[_Profile, Optional[str]]] = {}
+        self._counter = itertools.count()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self.signed = 0
+        self.sampled = 0
+        self.rejected = 0
+        self.written = 0
+        self.samples = 0
+        self.last_file: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret or self.sample_every)
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        logger.info(
+            "Request profiler enabled (signed: %s, 1 in %s sampled) writing %s to %s",
+            bool(self.secret), self.sample_every or 'no', self.output_format, self.output_dir
+        )
+
+    # Request hooks
+    def _trigger(self) -> Optional[str]:
+        header = request.headers.get(PROFILE_HEADER)
+        if header is not None and self.secret:
+            try:
+                verify_request(self.secret, request.method, request.path, header, self.tolerance)
+                return 'signed'
+            except SignatureError as e:
+                self.rejected += 1
+                logger.warning("Rejected profiling signature for %s %s: %s", request.method, request.path, e)
+        if self.sample_every and next(self._counter) % self.sample_every == 0:
+            return 'sampled'
+        return None
+
+    def _before_request(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+        if trigger == 'signed':
+            self.signed += 1
+        else:
+            self.sampled += 1
+        profile = _Profile(trigger, request.method, request.path, request.endpoint)
+        g.request_profile = profile
+        self._active[threading.get_ident()] = (profile, None)
+        self._ensure_sampler()
+        self._wake.set()
+
+    def _after_request(self, response):
+        profile = g.get('request_profile')
+        if profile is not None:
+            profile.status = response.status_code
+            if profile.trigger == 'signed':
+                response.headers[PROFILE_ID_HEADER] = self._file_stem(profile)
+        return response
+
+    def _teardown_request(self, exc=None):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return
+        self._active.pop(threading.get_ident(), None)
+        profile.finished = time.perf_counter()
+        # Wait out a sweep of the sampler that may still be adding to this profile
+        with self._sample_lock:
+            pass
+        if profile.status is None:
+            profile.status = 500
+        try:
+            self.last_file = self.write(profile)
+            self.written += 1
+            self.last_error = None
+            logger.info(
+                "Profiled %s in %.1f ms (%s, %d samples, %d queries): %s",
+                profile.name, profile.duration * 1000, profile.trigger,
+                sum(profile.counts.values()), len(profile.queries), self.last_file
+            )
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error("Writing request profile failed: %s", e)
+
+    def propagate(self, fn: Callable) -> Callable:
+        """Wrap `fn` so a worker thread running it on behalf of the current request is sampled too"""
+        profile = g.get('request_profile')
+        if profile is None:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            ident = threading.get_ident()
+            profile.last_sample[ident] = time.perf_counter()
+            self._active[ident] = (profile, f'[thread {threading.current_thread().name}] {fn.__name__}')
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._active.pop(ident, None)
+        return wrapper
+
+    # SQL timing
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._active and threading.get_ident() in self._active and context is not None:
+            context._profiler_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self._active:
+            return
+        entry = self._active.get(threading.get_ident())
+        started = getattr(context, '_profiler_started', None)
+        if entry is not None and started is not None:
+            profile, label = entry
+            profile.queries.append((started - profile.started, time.perf_counter() - started, statement, label))
+
+    # Stack sampling
+    def _ensure_sampler(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._active:
+                self._wake.clear()
+                # Re-checked after clear() so a request starting in between is not missed
+                if not self._active:
+                    self._wake.wait()
+                continue
+            with self._sample_lock:
+                now = time.perf_counter()
+                frames = sys._current_frames()
+                frame = None
+                for ident, (profile, label) in list(self._active.items()):
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(frame.f_code)
+                        if frame.f_code is _WSGI_CODE:
+                            break
+                        frame = frame.f_back
+                    if label is not None:
+                        stack.append(label)
+                    stack.reverse()
+                    stack = tuple(stack)
+                    profile.counts[stack] += 1
+                    since = profile.last_sample.get(ident, profile.started)
+                    profile.seconds[stack] = profile.seconds.get(stack, 0.0) + now - since
+                    profile.last_sample[ident] = now
+                    self.samples += 1
+                # Frames keep their locals alive
+                del frames, frame
+            time.sleep(self.interval)
+
+    # Export
+    def _file_stem(self, profile: _Profile) -> str:
+        endpoint = re.sub(r'[^A-Za-z0-9_-]+', '_', profile.endpoint)
+        return f"{self.service}-{profile.started_at:%Y%m%dT%H%M%S}-{profile.method}-{endpoint}-{profile.id}"
+
+    def write(self, profile: _Profile) -> str:
+        """Write one finished profile; returns the path of its main file"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(self.output_dir, self._file_stem(profile))
+        if self.output_format == 'speedscope':
+            path = f'{stem}.speedscope.json'
+            with open(path, 'w') as f:
+                json.dump(self.speedscope(profile), f)
+        else:
+            path = f'{stem}.folded'
+            with open(path, 'w') as f:
+                f.writelines(f'{line}\n' for line in self.collapsed(profile))
+            with open(f'{stem}.sql.tsv', 'w') as f:
+                f.write('offset_ms\tduration_ms\tthread\tstatement\n')
+                for offset, duration, statement, label in profile.queries:
+                    f.write(f"{offset * 1000:.3f}\t{duration * 1000:.3f}\t{label or 'request'}\t{' '.join(statement.split())}\n")
+        self._prune()
+        return path
+
+    @staticmethod
+    def collapsed(profile: _Profile) -> List[str]:
+        """'root;...;leaf count' lines as read by flamegraph.pl and inferno"""
+        return [
+            ';'.join(_frame_name(frame).replace(';', ':') for frame in stack) + f' {count}'
+            for stack, count in profile.counts.most_common()
+        ]
+
+    def speedscope(self, profile: _Profile) -> Dict[str, Any]:
+        """Speedscope document: sampled stacks, and the request's SQL on a timeline"""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[Any, int] = {}
+
+        def frame_index(frame) -> int:
+            if frame not in index:
+                index[frame] = len(frames)
+                filename, line = _frame_file(frame)
+                entry = {'name': _frame_name(frame)}
+                if filename:
+                    entry.update(file=filename, line=line)
+                frames.append(entry)
+            return index[frame]
+
+        stacks = list(profile.seconds.items())
+        duration_ms = profile.duration * 1000
+        # One SQL timeline per thread: queries of one thread never overlap, so events nest
+        timelines: Dict[Optional[str], List[Dict[str, Any]]] = {None: []}
+        for offset, duration, statement, label in sorted(profile.queries, key=lambda query: query[0]):
+            query = frame_index('SQL ' + ' '.join(statement.split())[:500])
+            timelines.setdefault(label, []).extend([
+                {'type': 'O', 'frame': query, 'at': offset * 1000},
+                {'type': 'C', 'frame': query, 'at': (offset + duration) * 1000}
+            ])
+        sql_profiles = []
+        for label, events in timelines.items():
+            root = frame_index(f'{profile.name} -> {profile.status}' if label is None else label)
+            queries = len(events) // 2
+            sql_profiles.append({
+                'type': 'evented',
+                'name': f"{label or profile.name} SQL ({queries} {'query' if queries == 1 else 'queries'})",
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': duration_ms,
+                'events': [{'type': 'O', 'frame': root, 'at': 0.0}, *events, {'type': 'C', 'frame': root, 'at': duration_ms}]
+            })
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f'{self.service} {profile.name} ({profile.trigger}, {duration_ms:.1f} ms)',
+            'exporter': f'{self.service} request profiler',
+            'activeProfileIndex': 0,
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': f'{profile.name} stacks',
+                    'unit': 'milliseconds',
+                    'startValue': 0,
+                    'endValue': sum(seconds for _, seconds in stacks) * 1000,
+                    'samples': [[frame_index(frame) for frame in stack] for stack, _ in stacks],
+                    'weights': [seconds * 1000 for _, seconds in stacks]
+                },
+                *sql_profiles
+            ]
+        }
+
+    def _prune(self):
+        if not self.max_files:
+            return
+        entries = [entry for entry in os.scandir(self.output_dir) if entry.name.startswith(f'{self.service}-')]
+        # A collapsed profile is two files sharing a stem
+        stems: Dict[str, float] = {}
+        for entry in entries:
+            stem = entry.name.split('.', 1)[0]
+            stems[stem] = max(stems.get(stem, 0.0), entry.stat().st_mtime)
+        for stem in sorted(stems, key=stems.get)[:max(0, len(stems) - self.max_files)]:
+            for entry in entries:
+                if entry.name.split('.', 1)[0] == stem:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'signed': self.signed,
+            'sampled': self.sampled,
+            'rejected': self.rejected,
+            'active': len(self._active),
+            'written': self.written,
+            'samples': self.samples,
+            'last_file': self.last_file,
+            'last_error': self.last_error,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
@@ -0,0 +1,186 @@
+# Point-in-time exchange-rate index
+# Every currency pair keeps its rates as parallel arrays sorted by effective date, so
+# "rate in effect at t" is a binary search instead of an ORDER BY ... LIMIT 1 query.
+# A refresher thread folds in rates inserted or updated since its watermark.
+import time
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from decimal import Decimal
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+Timestamp = Union[datetime, float]
+
+# Rows changed by transactions still in flight carry updated_at >= their start time,
+# so the next refresh starts at the oldest open transaction rather than at NOW()
+WATERMARK_SQL = '''
+SELECT LEAST(NOW(), (
+    SELECT MIN(xact_start) FROM pg_stat_activity
+    WHERE datname = current_database() AND backend_type = 'client backend' AND pid <> pg_backend_pid()
+))
+'''
+
+def epoch(at: Timestamp) -> float:
+    if isinstance(at, datetime):
+        return (at if at.tzinfo else at.replace(tzinfo=timezone.utc)).timestamp()
+    return at
+
+class RateIndex:
+    """In-process as-of lookups over localization_service.exchange_rates
+
+    Readers never lock: a pair's (timestamps, rates) arrays are only appended to in
+    place (rate first, so a visible timestamp always has its rate) and are replaced
+    wholesale when an older or corrected rate arrives.
+
+    Args:
+        engine: database holding localization_service
+        refresh_interval: seconds between incremental loads of the refresher thread
+        fetch_size: rows streamed per round trip while loading
+    """
+
+    def __init__(self, engine, refresh_interval: float = 5.0, fetch_size: int = 10000):
+        self.engine = engine
+        self.refresh_interval = refresh_interval
+        self.fetch_size = fetch_size
+        self._pairs: Dict[Pair, Tuple[array, List[Decimal]]] = {}
+        self._watermark: Optional[datetime] = None
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rates_loaded = 0
+        self.refreshes = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    # Loading
+    def refresh(self) -> int:
+        """Fold in rates changed since the last watermark; the first call loads everything"""
+        started = time.perf_counter()
+        applied = 0
+        with self._write_lock, self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, yield_per=self.fetch_size)
+            watermark = conn.execute(text(WATERMARK_SQL)).scalar()
+            if self._watermark is None:
+                rows = conn.execute(text(
+                    'SELECT from_currency, to_currency, effective_date, rate FROM localization_service.exchange_rates '
+                    'ORDER BY from_currency, to_currency, effective_date'
+                ))
+            else:
+                rows = conn.execute(text(
+                    'SELECT from_currency, to_currency, effective_date, rate FROM localization_service.exchange_rates '
+                    'WHERE updated_at >= :since ORDER BY from_currency, to_currency, effective_date'
+                ), {'since': self._watermark})
+            for row in rows:
+                self._apply((row.from_currency, row.to_currency), row.effective_date.timestamp(), row.rate)
+                applied += 1
+            self._watermark = watermark
+        self.rates_loaded += applied
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 1)
+        return applied
+
+    def _apply(self, pair: Pair, at: float, rate: Decimal):
+        entry = self._pairs.get(pair)
+        if entry is None:
+            self._pairs[pair] = (array('d', [at]), [rate])
+            return
+        timestamps, rates = entry
+        if at > timestamps[-1]:
+            rates.append(rate)
+            timestamps.append(at)
+            return
+        position = bisect_right(timestamps, at)
+        if position and timestamps[position - 1] == at:
+            if rates[position - 1] == rate:
+                return
+            rates = list(rates)
+            rates[position - 1] = rate
+        else:
+            timestamps = array('d', timestamps)
+            timestamps.insert(position, at)
+            rates = rates[:position] + [rate] + rates[position:]
+        self._pairs[pair] = (timestamps, rates)
+
+    def start(self):
+        """Load once, then refresh in the background (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rate-index', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Rate index refresh failed: %s", e)
+            self._stop.wait(self.refresh_interval)
+
+    # Lookups
+    def as_of(self, base: str, quote: str, at: Timestamp) -> Optional[Tuple[datetime, Decimal]]:
+        """(effective_date, rate) of the rate in effect at `at`, None before the first rate"""
+        if base == quote:
+            return datetime.fromtimestamp(0, tz=timezone.utc), Decimal(1)
+        entry = self._pairs.get((base, quote))
+        if entry is None:
+            return None
+        timestamps, rates = entry
+        position = bisect_right(timestamps, epoch(at), 0, len(timestamps))
+        if not position:
+            return None
+        return datetime.fromtimestamp(timestamps[position - 1], tz=timezone.utc), rates[position - 1]
+
+    def lookup_many(self, lookups: Iterable[Tuple[str, str, Timestamp]]) -> List[Optional[Decimal]]:
+        """Rates for many (base, quote, at) lookups at once, in input order
+
+        Lookups are grouped by pair so each pair's arrays are fetched once and every
+        lookup is a single C-level bisect.
+        """
+        lookups = list(lookups)
+        results: List[Optional[Decimal]] = [None] * len(lookups)
+        by_pair: Dict[Pair, List[int]] = {}
+        for i, (base, quote, _) in enumerate(lookups):
+            by_pair.setdefault((base, quote), []).append(i)
+        for (base, quote), indexes in by_pair.items():
+            if base == quote:
+                for i in indexes:
+                    results[i] = Decimal(1)
+                continue
+            entry = self._pairs.get((base, quote))
+            if entry is None:
+                continue
+            timestamps, rates = entry
+            size = len(timestamps)
+            for i in indexes:
+                position = bisect_right(timestamps, epoch(lookups[i][2]), 0, size)
+                if position:
+                    results[i] = rates[position - 1]
+        return results
+
+    def pairs(self) -> List[Pair]:
+        return sorted(self._pairs)
+
+    def stats(self) -> dict:
+        return {
+            'pairs': len(self._pairs),
+            'rates': sum(len(timestamps) for timestamps, _ in self._pairs.values()),
+            'refreshes': self.refreshes,
+            'last_refresh_ms': self.last_refresh_ms,
+            'watermark': self._watermark.isoformat() if self._watermark else None,
+            'last_error': self.last_error,
+            # Not ready until the first full load has completed
+            'ready': self._watermark is not None
+        }
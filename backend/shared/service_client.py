@@ -0,0 +1,207 @@
+# Pooled inter-service HTTP client
+# Keep-alive connection pool per upstream, per-call timeouts, bounded retries with jitter,
+# circuit breaker and request hedging for idempotent GETs.
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Dict, Any, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+Timeout = Union[float, Tuple[float, float]]
+
+class ServiceUnavailableError(Exception):
+    """Raised when an upstream cannot be reached after retries"""
+
+class CircuitOpenError(ServiceUnavailableError):
+    """Raised without touching the network while the circuit is open"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open -> closed)"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed; half-open lets a single probe through"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit opened after %d failures", self.failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+# Shared pool for hedged requests; hedges are short-lived and bounded by the callers
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+
+class ServiceClient:
+    """HTTP client for one upstream service
+
+    Args:
+        name: upstream name used in logs and stats
+        base_url: e.g. http://auth-service:5000
+        pool_size: keep-alive connections kept per upstream
+        timeout: default (connect, read) timeout in seconds
+        retries: extra attempts for idempotent calls on connection errors / 502-504
+        backoff: base delay for exponential backoff with full jitter
+        hedge_after: seconds before a duplicate GET is sent; None disables hedging
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        pool_size: int = 20,
+        timeout: Timeout = (0.5, 3.0),
+        retries: int = 2,
+        backoff: float = 0.05,
+        hedge_after: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool_size = pool_size
+        self.hedges = 0
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        timeout: Optional[Timeout] = None,
+        retries: Optional[int] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs
+    ) -> requests.Response:
+        """Send a request; 4xx responses are returned, upstream failures raise ServiceUnavailableError"""
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + ((self.retries if retries is None else retries) if idempotent else 0)
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        timeout = timeout or self.timeout
+        hedge = method == 'GET' and self.hedge_after is not None
+
+        last_error: Optional[BaseException] = None
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            try:
+                if hedge:
+                    response = self._hedged(url, timeout, kwargs)
+                else:
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.RequestException as e:
+                # Any transport failure (also e.g. ChunkedEncodingError) resolves a half-open probe
+                self.breaker.record_failure()
+                last_error = e
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                last_error = None
+                if attempt == attempts - 1:
+                    return response
+            if attempt < attempts - 1:
+                # Exponential backoff with full jitter
+                time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+        logger.warning("%s %s %s failed after %d attempts: %s", self.name, method, path, attempts, last_error)
+        raise ServiceUnavailableError(f"{self.name}: {last_error}") from last_error
+
+    def _hedged(self, url: str, timeout: Timeout, kwargs: Dict[str, Any]) -> requests.Response:
+        """Send a GET and, if it is slower than hedge_after, race a duplicate against it"""
+        futures = {_hedge_executor.submit(self.session.get, url, timeout=timeout, **kwargs)}
+        done, pending = wait(futures, timeout=self.hedge_after)
+        if not done:
+            self.hedges += 1
+            futures.add(_hedge_executor.submit(self.session.get, url, timeout=timeout, **kwargs))
+        error: Optional[BaseException] = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', path, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Circuit and pool state for the readiness probe"""
+        return {
+            'upstream': self.base_url,
+            'circuit': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'pool_size': self.pool_size,
+            'hedges': self.hedges,
+        }
+
+_clients: Dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(name: str, base_url: str, **kwargs) -> ServiceClient:
+    """Return the process-wide client for an upstream, creating it on first use"""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = ServiceClient(name, base_url, **kwargs)
+        return client
@@ -0,0 +1,230 @@
+# Shard routing for user-owned data
+# Users are hash-partitioned by user_id over a consistent hash ring; a directory on the
+# primary database maps email -> user_id for logins and records ranges moved by rebalancing.
+import os
+import time
+import bisect
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Iterator, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from shared.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+HASH_SPACE = 2 ** 32
+
+def key_hash(key) -> int:
+    """32-bit position of a key on the ring
+
+    Matches the SQL expression in HASH_SQL so rebalancing can select rows in a range.
+    """
+    return int(hashlib.md5(str(key).encode()).hexdigest()[:8], 16)
+
+# Same hash computed by PostgreSQL for a uuid column
+HASH_SQL = "('x' || substr(md5({column}::text), 1, 8))::bit(32)::bigint"
+
+class ConsistentHashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, nodes: List[str], vnodes: int = 128):
+        points = []
+        for node in nodes:
+            for i in range(vnodes):
+                points.append((key_hash(f'{node}#{i}'), node))
+        points.sort()
+        self._positions = [position for position, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for_hash(self, h: int) -> str:
+        index = bisect.bisect_right(self._positions, h) % len(self._positions)
+        return self._nodes[index]
+
+    def ranges(self) -> List[Tuple[int, int, str]]:
+        """(start, end, node) ranges owned by each virtual node, end exclusive"""
+        result, start = [], 0
+        for position, node in zip(self._positions, self._nodes):
+            result.append((start, position, node))
+            start = position
+        result.append((start, HASH_SPACE, self._nodes[0]))
+        return result
+
+def parse_shard_urls(value: Optional[str]) -> Dict[str, str]:
+    """Parse SHARD_URLS='shard0=postgresql://...,shard1=postgresql://...'"""
+    shards = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, _, url = item.partition('=')
+            shards[name.strip()] = url.strip()
+    return shards
+
+class ShardRouter:
+    """Route sessions to the shard that owns a user
+
+    Args:
+        shard_urls: shard name -> database URL
+        directory_url: primary database holding auth_service.user_directory and shard_ranges
+        vnodes: virtual nodes per shard on the ring
+        reload_interval: seconds between reloads of moved ranges
+    """
+
+    def __init__(
+        self,
+        shard_urls: Dict[str, str],
+        directory_url: str,
+        vnodes: int = 128,
+        reload_interval: float = 30.0,
+        **engine_kwargs
+    ):
+        self.directory_engine = create_engine(directory_url, **engine_kwargs)
+        self.engines = {}
+        for name, url in shard_urls.items():
+            self.engines[name] = (
+                self.directory_engine if url == directory_url else create_engine(url, **engine_kwargs)
+            )
+        self.sessions = {
+            name: scoped_session(sessionmaker(bind=engine)) for name, engine in self.engines.items()
+        }
+        self.ring = ConsistentHashRing(sorted(self.engines), vnodes)
+        self.reload_interval = reload_interval
+        self._range_starts: List[int] = []
+        self._ranges: List[Tuple[int, int, str]] = []
+        self._loaded_at: Optional[float] = None
+        self._reload_lock = threading.Lock()
+        self._email_cache = TTLCache(ttl=300, max_entries=100000)
+        # Moved ranges must apply from the first request, not after the first reload interval
+        if self.sharded:
+            try:
+                self.reload_ranges()
+            except Exception as e:
+                logger.warning("Loading moved shard ranges failed, retrying on first use: %s", e)
+
+    @classmethod
+    def from_env(cls, database_url: str, **engine_kwargs) -> 'ShardRouter':
+        """Build from SHARD_URLS; without it the single DATABASE_URL is the only shard"""
+        shards = parse_shard_urls(os.getenv('SHARD_URLS')) or {'default': database_url}
+        return cls(
+            shards,
+            os.getenv('SHARD_DIRECTORY_URL', database_url),
+            vnodes=int(os.getenv('SHARD_VNODES', 128)),
+            reload_interval=float(os.getenv('SHARD_RANGES_RELOAD_INTERVAL', 30)),
+            **engine_kwargs
+        )
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.engines) > 1
+
+    def reload_ranges(self):
+        """Load ranges moved by the rebalancing tool from the directory"""
+        with self.directory_engine.connect() as conn:
+            rows = conn.execute(text(
+                'SELECT range_start, range_end, shard FROM auth_service.shard_ranges ORDER BY range_start'
+            )).all()
+        self._ranges = [(row.range_start, row.range_end, row.shard) for row in rows]
+        self._range_starts = [start for start, _, _ in self._ranges]
+        self._loaded_at = time.monotonic()
+
+    def _maybe_reload(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.reload_interval:
+            return
+        if self._reload_lock.acquire(blocking=False):
+            try:
+                self.reload_ranges()
+            finally:
+                self._reload_lock.release()
+
+    def shard_for_user(self, user_id) -> str:
+        if not self.sharded:
+            return next(iter(self.engines))
+        self._maybe_reload()
+        h = key_hash(user_id)
+        index = bisect.bisect_right(self._range_starts, h) - 1
+        if index >= 0:
+            start, end, shard = self._ranges[index]
+            if start <= h < end:
+                return shard
+        return self.ring.node_for_hash(h)
+
+    def session_for_user(self, user_id):
+        """Session bound to the shard owning `user_id` (close it like any other session)"""
+        return self.sessions[self.shard_for_user(user_id)]()
+
+    def user_id_for_email(self, email: str) -> Optional[str]:
+        """Look up a user id in the email directory (cached)"""
+        user_id = self._email_cache.get(email)
+        if user_id is None:
+            with self.directory_engine.connect() as conn:
+                user_id = conn.execute(
+                    text('SELECT user_id FROM auth_service.user_directory WHERE email = :email'),
+                    {'email': email}
+                ).scalar()
+            if user_id is not None:
+                user_id = str(user_id)
+                self._email_cache.set(email, user_id)
+        return user_id
+
+    def session_for_email(self, email: str):
+        """Session on the shard holding the user with `email`
+
+        Unsharded deployments skip the directory. Unknown emails get a session on
+        the shard the email itself hashes to, where the lookup simply finds nothing.
+        """
+        if not self.sharded:
+            return self.session_for_user(None)
+        user_id = self.user_id_for_email(email)
+        return self.session_for_user(user_id or email)
+
+    def session_where(self, model, **filters):
+        """Session on the shard holding a `model` row matching `filters` (scatter query)
+
+        For rare lookups by non-routing columns such as one-time tokens; falls back
+        to the first shard when no shard has a match.
+        """
+        if not self.sharded:
+            return self.session_for_user(None)
+        sessions = list(self.all_sessions())
+        for session in sessions:
+            if session.query(model.id).filter_by(**filters).first() is not None:
+                break
+        else:
+            session = sessions[0]
+        for other in sessions:
+            if other is not session:
+                other.close()
+        return session
+
+    def register_email(self, email: str, user_id) -> bool:
+        """Claim an email in the directory; False if it is already taken"""
+        if not self.sharded:
+            return True
+        with self.directory_engine.begin() as conn:
+            inserted = conn.execute(text(
+                'INSERT INTO auth_service.user_directory (email, user_id) VALUES (:email, :user_id) '
+                'ON CONFLICT (email) DO NOTHING'
+            ), {'email': email, 'user_id': str(user_id)}).rowcount
+        return bool(inserted)
+
+    def unregister_email(self, email: str):
+        if not self.sharded:
+            return
+        self._email_cache.invalidate(email)
+        with self.directory_engine.begin() as conn:
+            conn.execute(
+                text('DELETE FROM auth_service.user_directory WHERE email = :email'), {'email': email}
+            )
+
+    def all_sessions(self) -> Iterator:
+        """One session per shard, for rare scatter queries (e.g. lookups by one-time token)"""
+        for session_factory in self.sessions.values():
+            yield session_factory()
+
+    def stats(self) -> Dict[str, dict]:
+        """Connection pool state of every shard"""
+        return {
+            name: {'pool': engine.pool.status()} for name, engine in self.engines.items()
+        }
@@ -0,0 +1,93 @@
+# Prebuilt statements for hot ORM lookups
+# A hot lookup is built once at import as a select() with named bind parameters, so
+# requests skip query construction and hit SQLAlchemy's compiled cache. With `prepare`,
+# each statement is also PREPAREd once per database connection and later executions
+# send only EXECUTE name(...), so PostgreSQL skips parsing and planning as well.
+# psycopg2 has no driver-level prepared statements, hence the explicit PREPARE.
+import re
+import threading
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Result
+
+BIND_PATTERN = re.compile(r'%\((\w+)\)s')
+
+class HotStatement:
+    """One prebuilt select, run with `execute(session, **params)` like session.execute"""
+
+    def __init__(self, cache: 'StatementCache', name: str, statement):
+        self.cache = cache
+        self.name = name
+        self.statement = statement
+        self._prepare_sql = None
+        self._binds: List[str] = []
+        self._defaults: Dict[str, Any] = {}
+        self._execute = None
+        self._compile_lock = threading.Lock()
+
+    def _compile(self, dialect):
+        """PREPARE text with $n placeholders, and the EXECUTE statement mapped onto the select's columns"""
+        with self._compile_lock:
+            if self._execute is not None:
+                return
+            compiled = self.statement.compile(dialect=dialect)
+            binds: List[str] = []
+
+            def placeholder(match):
+                if match.group(1) not in binds:
+                    binds.append(match.group(1))
+                return f'${binds.index(match.group(1)) + 1}'
+
+            body = BIND_PATTERN.sub(placeholder, compiled.string).replace('%%', '%')
+            self._prepare_sql = f'PREPARE {self.name} AS {body}'
+            self._binds = binds
+            # Binds the statement supplies itself (e.g. LIMIT values) are sent with every EXECUTE
+            self._defaults = {name: value for name, value in compiled.params.items() if value is not None}
+            arguments = ', '.join(f':{name}' for name in binds)
+            # Keep the column types of the binds so values are processed as in the select, and
+            # map result columns by position so rows are not matched up by name on every call
+            execute = text(f'EXECUTE {self.name}({arguments})').bindparams(
+                *(bindparam(name, type_=compiled.binds[name].type) for name in binds)
+            ).columns(*self.statement.selected_columns)
+            self._execute = self.statement.from_statement(execute)
+
+    def execute(self, session, **params) -> Result:
+        if not self.cache.prepare:
+            return session.execute(self.statement, params)
+        connection = session.connection()
+        if self._execute is None:
+            self._compile(connection.dialect)
+        # Prepared statements live as long as the pooled DBAPI connection
+        prepared = connection.connection.info.setdefault('prepared_statements', set())
+        if self.name not in prepared:
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(self._prepare_sql)
+            finally:
+                cursor.close()
+            prepared.add(self.name)
+            self.cache.prepares += 1
+        return session.execute(self._execute, {**self._defaults, **params})
+
+class StatementCache:
+    """Registry of hot statements of one service
+
+    Args:
+        prepare: PREPARE statements per connection and EXECUTE them; turn off behind
+            transaction-pooling proxies (PgBouncer) that do not keep session state
+    """
+
+    def __init__(self, prepare: bool = True):
+        self.prepare = prepare
+        self.prepares = 0
+        self._statements: Dict[str, HotStatement] = {}
+
+    def add(self, name: str, statement) -> HotStatement:
+        if name in self._statements:
+            raise ValueError(f"Statement {name} is already defined")
+        hot = self._statements[name] = HotStatement(self, name, statement)
+        return hot
+
+    def stats(self) -> Dict[str, Any]:
+        return {'statements': len(self._statements), 'prepare': self.prepare, 'prepares': self.prepares}
@@ -0,0 +1,89 @@
+# Access-token checks shared by every service that accepts JWTs
+# Access tokens carry the user's token generation as the 'ver' claim; "log out everywhere"
+# bumps auth_service.users.token_version, which revokes every token minted before it.
+# Each worker caches versions for `ttl` seconds, so a revocation reaches a service within
+# the TTL, or at once where the cache is subscribed to the 'user' invalidation.
+from typing import Any, Callable, Dict, Optional
+
+from flask_restful import Api
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import text
+
+from shared.cache import TTLCache
+
+TOKEN_VERSION_SQL = text('SELECT token_version FROM auth_service.users WHERE id = :user_id')
+
+class JWTApi(Api):
+    """flask-restful Api that leaves token errors to the handlers of JWTManager
+
+    flask-restful turns every exception raised in a resource into a 500; re-raising
+    here falls through to Flask, which dispatches to the 401/422 handlers registered
+    by flask-jwt-extended. Other errors keep the JSON 500 of the service.
+    """
+
+    def handle_error(self, e):
+        if isinstance(e, (JWTExtendedException, PyJWTError)):
+            raise e
+        return super().handle_error(e)
+
+class TokenVersions:
+    """Current token_version per user, read from the user's shard
+
+    Args:
+        router: ShardRouter locating the shard of auth_service.users rows
+        ttl: seconds a version is trusted without re-reading it
+        max_entries: bound on cached users
+        load: user_id -> version override (e.g. a prepared statement in auth-service)
+    """
+
+    def __init__(
+        self,
+        router,
+        ttl: float = 30.0,
+        max_entries: int = 100000,
+        load: Optional[Callable[[str], Optional[int]]] = None
+    ):
+        self.router = router
+        self._cache = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._load = load or self._query
+
+    def _query(self, user_id: str) -> Optional[int]:
+        session = self.router.session_for_user(user_id)
+        try:
+            return session.execute(TOKEN_VERSION_SQL, {'user_id': user_id}).scalar()
+        finally:
+            session.close()
+
+    def get(self, user_id: str) -> Optional[int]:
+        """Current token version of a user, None if the user no longer exists"""
+        version = self._cache.get(user_id)
+        if version is None:
+            version = self._load(user_id)
+            if version is not None:
+                self._cache.set(user_id, version)
+        return version
+
+    def set(self, user_id: str, version: int):
+        self._cache.set(user_id, version)
+
+    def invalidate(self, user_id: str):
+        self._cache.invalidate(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def is_revoked(self, jwt_payload: Dict[str, Any]) -> bool:
+        current = self.get(jwt_payload['sub'])
+        return current is None or jwt_payload.get('ver', 0) != current
+
+    def subscribe(self, bus):
+        """Drop cached versions on the 'user' invalidation published when a version is bumped"""
+        bus.subscribe('user', lambda user_id, version: self.invalidate(user_id), reset=self.clear)
+
+    def init_jwt(self, jwt):
+        """Reject tokens of deleted users and tokens older than the user's token version"""
+        jwt.token_in_blocklist_loader(lambda jwt_header, jwt_payload: self.is_revoked(jwt_payload))
+
+    def stats(self) -> Dict[str, Any]:
+        return {'cached': len(self._cache)}
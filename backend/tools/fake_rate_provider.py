@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an exchange-rate provider
+Generates a deterministic random walk of rates per currency pair and streams it as
+CSV (/rates.csv) or provider snapshots in JSON lines (/rates.jsonl), or writes the
+same feed to a file. Use it to exercise tools/ingest_rates.py without network access.
+
+Usage:
+    python backend/tools/fake_rate_provider.py --port 8090 --years 5 --interval 3600
+    python backend/tools/fake_rate_provider.py --dump rates.csv --years 10
+"""
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Opening mid rate per base -> quote
+PAIRS = {
+    'USD': {'EUR': 0.85, 'CNY': 6.50},
+    'EUR': {'USD': 1.18, 'CNY': 7.65},
+    'CNY': {'USD': 0.154, 'EUR': 0.131},
+}
+
+def snapshots(years: float, interval: int, seed: int = 7):
+    """(timestamp, base, {quote: rate}) from `years` ago until now, every `interval` seconds"""
+    rng = random.Random(seed)
+    rates = {base: dict(quotes) for base, quotes in PAIRS.items()}
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    at = end - timedelta(days=365 * years)
+    step = timedelta(seconds=interval)
+    while at <= end:
+        for base, quotes in rates.items():
+            for quote in quotes:
+                quotes[quote] *= 1 + rng.gauss(0, 0.001)
+            yield at, base, {quote: round(rate, 8) for quote, rate in quotes.items()}
+        at += step
+
+def csv_lines(years: float, interval: int):
+    yield 'from_currency,to_currency,rate,effective_date,source\n'
+    for at, base, quotes in snapshots(years, interval):
+        stamp = at.isoformat()
+        for quote, rate in quotes.items():
+            yield f'{base},{quote},{rate},{stamp},fake-provider\n'
+
+def json_lines(years: float, interval: int):
+    for at, base, quotes in snapshots(years, interval):
+        yield json.dumps({'base': base, 'timestamp': int(at.timestamp()), 'rates': quotes, 'source': 'fake-provider'}) + '\n'
+
+def make_handler(years: float, interval: int):
+    class RateFeedHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.0'
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path not in ('/rates.csv', '/rates.jsonl'):
+                self.send_error(404)
+                return
+            lines = csv_lines(years, interval) if path.endswith('.csv') else json_lines(years, interval)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8' if path.endswith('.csv') else 'application/x-ndjson')
+            self.end_headers()
+            # No Content-Length: the feed is streamed and ends when the connection closes
+            batch = []
+            for line in lines:
+                batch.append(line)
+                if len(batch) >= 1000:
+                    self.wfile.write(''.join(batch).encode())
+                    batch = []
+            self.wfile.write(''.join(batch).encode())
+
+        def log_message(self, format, *args):
+            sys.stderr.write(f"{self.address_string()} {format % args}\n")
+
+    return RateFeedHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--interval', type=int, default=3600, help='seconds between ticks')
+    parser.add_argument('--dump', help='write the feed to this file (.csv or .jsonl) instead of serving it')
+    args = parser.parse_args()
+
+    if args.dump:
+        lines = json_lines(args.years, args.interval) if args.dump.endswith('.jsonl') else csv_lines(args.years, args.interval)
+        with open(args.dump, 'w') as f:
+            f.writelines(lines)
+        print(f"📝 Wrote {args.dump}")
+        return
+
+    print(f"💱 Serving {args.years} years of ticks every {args.interval}s on http://localhost:{args.port}/rates.csv")
+    ThreadingHTTPServer(('0.0.0.0', args.port), make_handler(args.years, args.interval)).serve_forever()
+
+if __name__ == "__main__":
+    main()
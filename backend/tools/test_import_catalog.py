@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Catalog import tests
+Cover the per-row processing (validation, cleaning, slugs, COPY encoding); no database needed.
+
+Usage:
+    python -m pytest backend/tools/test_import_catalog.py
+"""
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from import_catalog import assign_slugs, clean_description, copy_value, normalize_image, prepare_batch, slugify
+
+def products(*names):
+    return [(f'SKU{n}', name, None, Decimal('1.00'), True, []) for n, name in enumerate(names)]
+
+@pytest.mark.parametrize('names, expected', [
+    (['Mug', 'Mug', 'Mug 2'], ['mug', 'mug-2', 'mug-2-2']),
+    (['Mug 2', 'Mug', 'Mug'], ['mug-2', 'mug', 'mug-3']),
+    (['Mug', 'mug!', 'MUG', 'Cup'], ['mug', 'mug-2', 'mug-3', 'cup']),
+    (['Café Crème', 'Cafe Creme'], ['cafe-creme', 'cafe-creme-2']),
+    (['***', '日本'], ['product', 'product-2']),
+])
+def test_assign_slugs_are_unique_within_a_batch(names, expected):
+    slugs = assign_slugs(products(*names))
+    assert slugs == expected
+    assert len(set(slugs)) == len(slugs)
+
+def test_slugify_truncates_long_names():
+    assert slugify('a' * 300) == 'a' * 200
+
+def test_prepare_batch_rejects_invalid_rows():
+    valid, rejected = prepare_batch([
+        {'sku': 'A1', 'name': '  Blue   Mug ', 'base_price': '12.346', 'description': '<b>Big</b> &amp; blue',
+         'images': ['HTTP://Example.COM/a b.png', 'http://example.com/a%20b.png', 'ftp://x/y.png'], 'is_active': 'no'},
+        {'sku': '', 'name': 'No SKU', 'base_price': '1'},
+        {'sku': 'A2', 'name': '   ', 'base_price': '1'},
+        {'sku': 'X' * 101, 'name': 'Long SKU', 'base_price': '1'},
+        {'sku': 'A3', 'name': 'No price'},
+        {'sku': 'A4', 'name': 'Text price', 'base_price': 'twelve'},
+        {'sku': 'A5', 'name': 'Negative', 'base_price': '-1'},
+        {'sku': 'A6', 'name': 'Infinite', 'base_price': 'Infinity'},
+        {'sku': 'A7', 'name': 'Too big', 'base_price': '10000000000'},
+        {'sku': 'A8', 'name': 'Single image', 'base_price': 0, 'images': 'https://cdn.example.com/x.png'},
+        {},
+    ])
+    assert rejected == {'missing_sku_or_name': 4, 'bad_price': 5}
+    assert valid == [
+        ('A1', 'Blue Mug', 'Big & blue', Decimal('12.35'), False, ['https://example.com/a%20b.png']),
+        ('A8', 'Single image', None, Decimal('0.00'), True, ['https://cdn.example.com/x.png']),
+    ]
+
+def test_clean_description():
+    assert clean_description('<p>Hot&nbsp;<i>tea</i></p>\n\n cup') == 'Hot tea cup'
+    assert clean_description('<br/>') is None
+    assert clean_description(None) is None
+
+@pytest.mark.parametrize('url, expected', [
+    ('http://Example.com/img/a.png', 'https://example.com/img/a.png'),
+    (' https://EXAMPLE.com:8443/a b.png?size=2#top ', 'https://example.com:8443/a%20b.png?size=2'),
+    ('https://example.com/caf%C3%A9.png', 'https://example.com/caf%C3%A9.png'),
+    ('//example.com/a.png', None),
+    ('ftp://example.com/a.png', None),
+    ('javascript:alert(1)', None),
+    ('https:///no-host.png', None),
+    ('http://[::1', None),
+    (None, None),
+])
+def test_normalize_image(url, expected):
+    assert normalize_image(url) == expected
+
+@pytest.mark.parametrize('value, expected', [
+    (None, '\\N'),
+    (True, 't'),
+    (False, 'f'),
+    (Decimal('9.90'), '9.90'),
+    ('tab\there', 'tab\\there'),
+    ('line\nbreak\r', 'line\\nbreak\\r'),
+    ('back\\slash', 'back\\\\slash'),
+    ('\\N', '\\\\N'),
+    ([], '{}'),
+    (['https://a/x.png', 'https://a/"q".png'], '{"https://a/x.png","https://a/\\\\"q\\\\".png"}'),
+    (['https://a/back\\slash.png'], '{"https://a/back\\\\\\\\slash.png"}'),
+])
+def test_copy_value_escapes_for_copy_text_format(value, expected):
+    assert copy_value(value) == expected
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Schema migration runner tests
+Parsing and retry tests need no database. Backfill and lock-timeout tests run against a
+dedicated, disposable PostgreSQL database and only touch public.migrate_test_* tables.
+
+Usage:
+    MIGRATE_TEST_URL=postgresql://.../migrate_test python -m pytest backend/tools/test_migrate.py
+"""
+import os
+import sys
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import migrate
+from migrate import Migrator, Statement, parse_statements, load_migrations, MIGRATIONS_DIR
+
+MIGRATE_TEST_URL = os.getenv('MIGRATE_TEST_URL')
+needs_db = pytest.mark.skipif(not MIGRATE_TEST_URL, reason='MIGRATE_TEST_URL is not set')
+
+FIXTURE = """
+-- A comment line is dropped
+CREATE TABLE IF NOT EXISTS shop.items (
+    id INTEGER PRIMARY KEY,
+    slug VARCHAR(50)
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_items_slug ON shop.items (slug);
+CREATE UNIQUE INDEX CONCURRENTLY idx_items_id ON ONLY shop.items (id);
+
+CREATE OR REPLACE FUNCTION shop.touch() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.slug := lower(NEW.slug); RETURN NEW; END $$;
+
+-- migrate: backfill batch_size=250 pause=0.5
+UPDATE shop.items
+SET slug = 'item-' || id
+WHERE slug IS NULL;
+"""
+
+def test_parse_statements_classifies_each_statement():
+    statements = parse_statements(FIXTURE)
+    assert [s.kind for s in statements] == ['ddl', 'concurrent_index', 'concurrent_index', 'ddl', 'backfill']
+    assert statements[0].sql.startswith('CREATE TABLE') and '--' not in statements[0].sql
+    assert migrate.CONCURRENT_INDEX.match(statements[1].sql).groups() == ('idx_items_slug', 'shop')
+    assert migrate.CONCURRENT_INDEX.match(statements[2].sql).groups() == ('idx_items_id', 'shop')
+    # Semicolons inside a one-line function body do not end the statement
+    assert statements[3].sql.endswith('RETURN NEW; END $$')
+    assert statements[4].options == {'batch_size': 250.0, 'pause': 0.5}
+    assert migrate.BACKFILL_UPDATE.match(statements[4].sql).groups() == (
+        'shop.items', "slug = 'item-' || id", 'slug IS NULL'
+    )
+
+@pytest.mark.parametrize('sql, message', [
+    ('-- migrate: backfill\nDELETE FROM shop.items WHERE id > 1;', 'backfill directive'),
+    ('-- migrate: backfill\nUPDATE shop.items SET slug = NULL;', 'backfill directive'),
+    ('-- migrate: rewrite\nUPDATE shop.items SET slug = NULL WHERE id = 1;', 'Unknown migration directive'),
+])
+def test_parse_statements_rejects_bad_directives(sql, message):
+    with pytest.raises(ValueError, match=message):
+        parse_statements(sql)
+
+def test_shipped_migrations_parse():
+    migrations = load_migrations(MIGRATIONS_DIR)
+    assert [version for version, _, _ in migrations] == sorted(version for version, _, _ in migrations)
+    for version, name, sql in migrations:
+        assert parse_statements(sql), f'{version}_{name}'
+
+class PgError(Exception):
+    def __init__(self, pgcode):
+        self.pgcode = pgcode
+
+def failing(pgcode: str, calls: list, succeed_after: int = None):
+    """An attempt raising a driver error with `pgcode` until call number `succeed_after`"""
+    def attempt():
+        calls.append(1)
+        if succeed_after is not None and len(calls) >= succeed_after:
+            return 'done'
+        raise DBAPIError('ALTER TABLE', {}, PgError(pgcode))
+    return attempt
+
+def test_with_retries_retries_lock_timeouts_and_deadlocks_only(monkeypatch):
+    monkeypatch.setattr(migrate.time, 'sleep', lambda seconds: None)
+    migrator = Migrator(engine=None, retries=3)
+
+    calls = []
+    assert migrator._with_retries('flaky', failing(migrate.LOCK_NOT_AVAILABLE, calls, succeed_after=3)) == 'done'
+    assert len(calls) == 3
+
+    calls = []
+    with pytest.raises(DBAPIError):
+        migrator._with_retries('busy', failing(migrate.DEADLOCK_DETECTED, calls))
+    assert len(calls) == 3
+
+    calls = []
+    with pytest.raises(DBAPIError):
+        migrator._with_retries('broken', failing('42P01', calls))
+    assert len(calls) == 1
+
+@pytest.fixture
+def engine():
+    engine = create_engine(MIGRATE_TEST_URL)
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS public.migrate_test_items'))
+        conn.execute(text('CREATE TABLE public.migrate_test_items (id INTEGER PRIMARY KEY, slug VARCHAR(50))'))
+        conn.execute(text('INSERT INTO public.migrate_test_items (id) SELECT generate_series(1, 5000)'))
+        conn.execute(text('ANALYZE public.migrate_test_items'))
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS public.migrate_test_items'))
+    engine.dispose()
+
+def count(engine, condition: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f'SELECT COUNT(*) FROM public.migrate_test_items WHERE {condition}')).scalar()
+
+BACKFILL = (
+    "-- migrate: backfill batch_size=400 pause=0.01\n"
+    "UPDATE public.migrate_test_items SET slug = 'item-' || id WHERE slug IS NULL;"
+)
+
+@needs_db
+def test_backfill_updates_every_matching_row_in_batches(engine, monkeypatch):
+    pauses = []
+    monkeypatch.setattr(migrate.time, 'sleep', pauses.append)
+    statement, = parse_statements(BACKFILL)
+    Migrator(engine).run(statement)
+    assert count(engine, 'slug IS NULL') == 0
+    assert count(engine, "slug = 'item-' || id") == 5000
+    assert len(pauses) > 5000 // 400 and set(pauses) == {0.01}
+
+    # A rerun after a partial failure finds nothing left to do
+    Migrator(engine).run(statement)
+    assert count(engine, "slug = 'item-' || id") == 5000
+
+@needs_db
+def test_backfill_sweeps_rows_written_during_the_walk(engine, monkeypatch):
+    def insert_once(seconds):
+        # Rows appended while the walk runs land past the blocks it planned to visit
+        if not inserted:
+            inserted.append(seconds)
+            with engine.begin() as conn:
+                conn.execute(text('INSERT INTO public.migrate_test_items (id) SELECT generate_series(5001, 6000)'))
+    inserted = []
+    monkeypatch.setattr(migrate.time, 'sleep', insert_once)
+    statement, = parse_statements(BACKFILL)
+    Migrator(engine).run(statement)
+    assert inserted
+    assert count(engine, 'slug IS NULL') == 0
+    assert count(engine, "slug = 'item-' || id") == 6000
+
+@needs_db
+def test_ddl_waits_out_a_held_lock_with_retries(engine):
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with engine.begin() as conn:
+            conn.execute(text('LOCK TABLE public.migrate_test_items IN ACCESS EXCLUSIVE MODE'))
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait(5)
+    threading.Timer(0.5, release.set).start()
+    try:
+        Migrator(engine, lock_timeout=0.1, retries=10).run(
+            Statement('ALTER TABLE public.migrate_test_items ADD COLUMN IF NOT EXISTS note TEXT', 'ddl', {})
+        )
+    finally:
+        release.set()
+        holder.join()
+    with engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'migrate_test_items' AND column_name = 'note'"
+        )).scalar() == 1
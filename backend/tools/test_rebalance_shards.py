@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Shard routing and rebalancing tests
+Run against two or more dedicated, disposable PostgreSQL databases; the first one also
+holds the directory. init.sql is applied to databases that do not have the schema yet,
+and every moved range is removed afterwards.
+
+Usage:
+    SHARD_TEST_URLS=shard0=postgresql://.../shard_test0,shard1=postgresql://.../shard_test1 \\
+    python -m pytest backend/tools/test_rebalance_shards.py
+"""
+import os
+import sys
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.sharding import ShardRouter, parse_shard_urls, key_hash, HASH_SPACE
+import rebalance_shards
+
+SHARD_URLS = parse_shard_urls(os.getenv('SHARD_TEST_URLS'))
+INIT_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'database', 'init.sql')
+EMAIL_DOMAIN = 'shard-test.invalid'
+
+pytestmark = pytest.mark.skipif(len(SHARD_URLS) < 2, reason='SHARD_TEST_URLS with two or more databases is not set')
+
+def new_router(**kwargs) -> ShardRouter:
+    return ShardRouter(SHARD_URLS, next(iter(SHARD_URLS.values())), **kwargs)
+
+def ensure_schema(engine):
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass('auth_service.users')")).scalar()
+    if exists is None:
+        raw = engine.raw_connection()
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute(open(INIT_SQL).read())
+            raw.commit()
+        finally:
+            raw.close()
+
+def cleanup(router: ShardRouter):
+    pattern = f'%@{EMAIL_DOMAIN}'
+    for engine in {id(engine): engine for engine in router.engines.values()}.values():
+        with engine.begin() as conn:
+            users = 'SELECT id FROM auth_service.users WHERE email LIKE :pattern'
+            conn.execute(text(f'DELETE FROM user_service.addresses WHERE user_id IN ({users})'), {'pattern': pattern})
+            conn.execute(text(f'DELETE FROM user_service.profiles WHERE user_id IN ({users})'), {'pattern': pattern})
+            conn.execute(text(f'DELETE FROM auth_service.refresh_tokens WHERE user_id IN ({users})'), {'pattern': pattern})
+            conn.execute(text('DELETE FROM auth_service.users WHERE email LIKE :pattern'), {'pattern': pattern})
+    with router.directory_engine.begin() as conn:
+        conn.execute(text('DELETE FROM auth_service.user_directory WHERE email LIKE :pattern'), {'pattern': pattern})
+        conn.execute(text('DELETE FROM auth_service.shard_ranges'))
+
+def create_users(router: ShardRouter, count: int, register: bool = True) -> list:
+    """(user_id, email) of new users with profiles, written to the shards that own them"""
+    users = []
+    for _ in range(count):
+        user_id, email = str(uuid.uuid4()), f'{uuid.uuid4().hex}@{EMAIL_DOMAIN}'
+        session = router.session_for_user(user_id)
+        try:
+            session.execute(text(
+                "INSERT INTO auth_service.users (id, email, password_hash) VALUES (:id, :email, 'x')"
+            ), {'id': user_id, 'email': email})
+            session.execute(text('INSERT INTO user_service.profiles (user_id) VALUES (:id)'), {'id': user_id})
+            session.commit()
+        finally:
+            session.close()
+        if register:
+            assert router.register_email(email, user_id)
+        users.append((user_id, email))
+    return users
+
+def shards_holding(router: ShardRouter, table: str, column: str, user_id: str) -> set:
+    holding = set()
+    for shard, engine in router.engines.items():
+        with engine.connect() as conn:
+            if conn.execute(text(f'SELECT 1 FROM {table} WHERE {column} = :id'), {'id': user_id}).first():
+                holding.add(shard)
+    return holding
+
+def has_user(session, email: str) -> bool:
+    try:
+        return session.execute(
+            text('SELECT 1 FROM auth_service.users WHERE email = :email'), {'email': email}
+        ).first() is not None
+    finally:
+        session.close()
+
+@pytest.fixture
+def router():
+    router = new_router(reload_interval=0)
+    for engine in router.engines.values():
+        ensure_schema(engine)
+    cleanup(router)
+    yield router
+    cleanup(router)
+
+def test_users_route_to_their_ring_owner(router):
+    placements = {}
+    for _ in range(2000):
+        user_id = str(uuid.uuid4())
+        shard = router.shard_for_user(user_id)
+        assert shard == router.ring.node_for_hash(key_hash(user_id))
+        placements[shard] = placements.get(shard, 0) + 1
+    assert set(placements) == set(SHARD_URLS)
+
+def test_logins_find_users_through_the_directory(router):
+    for user_id, email in create_users(router, 40):
+        assert router.user_id_for_email(email) == user_id
+        assert has_user(router.session_for_email(email), email)
+    assert not has_user(router.session_for_email(f'nobody@{EMAIL_DOMAIN}'), f'nobody@{EMAIL_DOMAIN}')
+
+def test_backfill_registers_existing_users(router):
+    users = create_users(router, 40, register=False)
+    # Without directory entries, emails hashing to another shard than their user cannot log in
+    assert not all(has_user(router.session_for_email(email), email) for _, email in users)
+
+    assert rebalance_shards.backfill_directory(router, batch_size=16, pause=0) >= len(users)
+    assert rebalance_shards.backfill_directory(router, batch_size=16, pause=0) == 0
+    fresh = new_router()
+    for user_id, email in users:
+        assert fresh.user_id_for_email(email) == user_id
+        assert has_user(fresh.session_for_email(email), email)
+
+def test_rebalance_moves_a_range_and_keeps_logins_working(router):
+    users = create_users(router, 200)
+    target = sorted(SHARD_URLS)[-1]
+    elsewhere = next(user_id for user_id, _ in users if router.shard_for_user(user_id) != target)
+    start = max(0, key_hash(elsewhere) - 2 ** 29)
+    end = min(HASH_SPACE, key_hash(elsewhere) + 2 ** 29)
+    in_range = [(user_id, email) for user_id, email in users if start <= key_hash(user_id) < end]
+    moved = {user_id for user_id, _ in in_range}
+    outside = {user_id: router.shard_for_user(user_id) for user_id, _ in users if user_id not in moved}
+
+    rebalance_shards.copy_range(router, target, start, end, batch_size=50, pause=0)
+    rebalance_shards.record_range(router, target, start, end)
+    rebalance_shards.copy_range(router, target, start, end, batch_size=50, pause=0)
+    rebalance_shards.delete_range(router, target, start, end, batch_size=50, pause=0)
+
+    for user_id, email in in_range:
+        assert router.shard_for_user(user_id) == target
+        assert shards_holding(router, 'auth_service.users', 'id', user_id) == {target}
+        assert shards_holding(router, 'user_service.profiles', 'user_id', user_id) == {target}
+        assert has_user(router.session_for_email(email), email)
+    for user_id, shard in outside.items():
+        assert router.shard_for_user(user_id) == shard
+        assert shards_holding(router, 'auth_service.users', 'id', user_id) == {shard}
+
+    # A worker started right after boot (monotonic clock below the reload interval)
+    # routes the moved range from its first request
+    fresh = new_router(reload_interval=time.monotonic() + 3600)
+    assert fresh.shard_for_user(elsewhere) == target
+
+def test_catch_up_takes_changes_made_before_the_flip(router):
+    target = sorted(SHARD_URLS)[-1]
+    user_id, _ = next(
+        (user_id, email) for user_id, email in create_users(router, 40) if router.shard_for_user(user_id) != target
+    )
+    start, end = key_hash(user_id), key_hash(user_id) + 1
+    source = router.engines[router.shard_for_user(user_id)]
+    kept_token, revoked_token, address = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    with source.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO auth_service.refresh_tokens (id, user_id, token_hash, expires_at) "
+            "VALUES (:kept, :user_id, 'x', NOW() + INTERVAL '1 day'), (:revoked, :user_id, 'y', NOW() + INTERVAL '1 day')"
+        ), {'kept': kept_token, 'revoked': revoked_token, 'user_id': user_id})
+        conn.execute(text(
+            "INSERT INTO user_service.addresses (id, user_id, type, first_name, last_name, address_line_1, "
+            "city, postal_code, country_code) VALUES (:id, :user_id, 'shipping', 'A', 'B', 'Old Street 1', 'C', '1', 'US')"
+        ), {'id': address, 'user_id': user_id})
+
+    rebalance_shards.copy_range(router, target, start, end, batch_size=50, pause=0)
+    # Written to the old shard between the first copy and the flip
+    with source.begin() as conn:
+        conn.execute(text('UPDATE auth_service.refresh_tokens SET is_revoked = TRUE WHERE id = :id'), {'id': kept_token})
+        conn.execute(text("UPDATE user_service.addresses SET address_line_1 = 'New Street 2' WHERE id = :id"), {'id': address})
+    rebalance_shards.record_range(router, target, start, end)
+    # Written to the target after the flip
+    with router.engines[target].begin() as conn:
+        conn.execute(text('UPDATE auth_service.refresh_tokens SET is_revoked = TRUE WHERE id = :id'), {'id': revoked_token})
+    rebalance_shards.copy_range(router, target, start, end, batch_size=50, pause=0)
+
+    with router.engines[target].connect() as conn:
+        revoked = dict(conn.execute(text(
+            'SELECT id::text, is_revoked FROM auth_service.refresh_tokens WHERE user_id = :user_id'
+        ), {'user_id': user_id}).all())
+        line = conn.execute(text(
+            'SELECT address_line_1 FROM user_service.addresses WHERE id = :id'
+        ), {'id': address}).scalar()
+    assert revoked == {kept_token: True, revoked_token: True}
+    assert line == 'New Street 2'
+
+def test_overlapping_ranges_are_rejected(router):
+    rebalance_shards.record_range(router, sorted(SHARD_URLS)[0], 0, 2 ** 20)
+    with pytest.raises(SystemExit):
+        rebalance_shards.record_range(router, sorted(SHARD_URLS)[-1], 2 ** 19, 2 ** 21)
@@ -11,6 +11,7 @@ CREATE SCHEMA IF NOT EXISTS auth_service;
 CREATE SCHEMA IF NOT EXISTS user_service;
 CREATE SCHEMA IF NOT EXISTS product_service;
 CREATE SCHEMA IF NOT EXISTS order_service;
+CREATE SCHEMA IF NOT EXISTS cart_service;
 CREATE SCHEMA IF NOT EXISTS payment_service;
 CREATE SCHEMA IF NOT EXISTS localization_service;
 CREATE SCHEMA IF NOT EXISTS admin_service;
@@ -47,6 +48,7 @@ CREATE TABLE localization_service.exchange_rates (
     effective_date TIMESTAMPTZ NOT NULL,
     source VARCHAR(50) NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(from_currency, to_currency, effective_date)
 );
 
@@ -67,6 +69,7 @@ CREATE TABLE auth_service.users (
     last_login TIMESTAMPTZ,
     failed_login_attempts INTEGER DEFAULT 0,
     account_locked_until TIMESTAMPTZ,
+    token_version INTEGER NOT NULL DEFAULT 0, -- Bumped to revoke all sessions of the user
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -78,9 +81,37 @@ CREATE TABLE auth_service.refresh_tokens (
     token_hash VARCHAR(255) NOT NULL,
     expires_at TIMESTAMPTZ NOT NULL,
     is_revoked BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Every UPDATE bumps updated_at; shard rebalancing uses it to keep the newer copy of a row
+CREATE FUNCTION auth_service.touch_updated_at() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.updated_at := NOW(); RETURN NEW; END $$;
+
+CREATE TRIGGER users_touch_updated_at BEFORE UPDATE ON auth_service.users
+    FOR EACH ROW EXECUTE FUNCTION auth_service.touch_updated_at();
+
+CREATE TRIGGER refresh_tokens_touch_updated_at BEFORE UPDATE ON auth_service.refresh_tokens
+    FOR EACH ROW EXECUTE FUNCTION auth_service.touch_updated_at();
+
+-- Shard directory (used on the directory database when SHARD_URLS is set)
+-- Email -> user_id lookup for logins; the owning shard is derived from user_id
+CREATE TABLE auth_service.user_directory (
+    email VARCHAR(255) PRIMARY KEY,
+    user_id UUID NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Hash ranges moved off their consistent-hash owner by the rebalancing tool
+CREATE TABLE auth_service.shard_ranges (
+    range_start BIGINT PRIMARY KEY,
+    range_end BIGINT NOT NULL,
+    shard VARCHAR(50) NOT NULL,
+    moved_at TIMESTAMPTZ DEFAULT NOW(),
+    CHECK (range_start < range_end)
+);
+
 -- ==============================================
 -- USER SERVICE SCHEMA
 -- ==============================================
@@ -114,6 +145,16 @@ CREATE TABLE user_service.addresses (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Every UPDATE bumps updated_at; shard rebalancing uses it to keep the newer copy of a row
+CREATE FUNCTION user_service.touch_updated_at() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.updated_at := NOW(); RETURN NEW; END $$;
+
+CREATE TRIGGER profiles_touch_updated_at BEFORE UPDATE ON user_service.profiles
+    FOR EACH ROW EXECUTE FUNCTION user_service.touch_updated_at();
+
+CREATE TRIGGER addresses_touch_updated_at BEFORE UPDATE ON user_service.addresses
+    FOR EACH ROW EXECUTE FUNCTION user_service.touch_updated_at();
+
 -- ==============================================
 -- PRODUCT SERVICE SCHEMA
 -- ==============================================
@@ -144,6 +185,204 @@ CREATE TABLE product_service.products (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Every UPDATE bumps updated_at, which drives incremental repricing and autocomplete
+CREATE FUNCTION product_service.touch_updated_at() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.updated_at := NOW(); RETURN NEW; END $$;
+
+CREATE TRIGGER products_touch_updated_at BEFORE UPDATE ON product_service.products
+    FOR EACH ROW EXECUTE FUNCTION product_service.touch_updated_at();
+
+-- Deleted products, so incremental readers (autocomplete) can drop them without a rebuild
+CREATE TABLE product_service.product_tombstones (
+    product_id UUID PRIMARY KEY,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE FUNCTION product_service.record_tombstone() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN INSERT INTO product_service.product_tombstones (product_id) VALUES (OLD.id) ON CONFLICT (product_id) DO UPDATE SET deleted_at = NOW(); RETURN OLD; END $$;
+
+CREATE TRIGGER products_record_tombstone AFTER DELETE ON product_service.products
+    FOR EACH ROW EXECUTE FUNCTION product_service.record_tombstone();
+
+-- Product images in display order
+CREATE TABLE product_service.product_images (
+    product_id UUID NOT NULL REFERENCES product_service.products(id) ON DELETE CASCADE,
+    position SMALLINT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (product_id, position)
+);
+
+-- Stock counters: each product's stock is split across slots so checkouts lock different rows
+CREATE TABLE product_service.inventory_slots (
+    product_id UUID NOT NULL REFERENCES product_service.products(id) ON DELETE CASCADE,
+    slot_no SMALLINT NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity >= 0),
+    PRIMARY KEY (product_id, slot_no)
+);
+
+-- Stock held for in-flight orders; confirmed orders delete their rows, expired ones return to their slot
+CREATE TABLE product_service.stock_reservations (
+    order_id UUID NOT NULL,
+    product_id UUID NOT NULL,
+    slot_no SMALLINT NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    status VARCHAR(20) NOT NULL DEFAULT 'held' CHECK (status IN ('held', 'committed')),
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (order_id, product_id, slot_no)
+);
+
+-- ==============================================
+-- ORDER SERVICE SCHEMA
+-- ==============================================
+
+-- Orders; (user_id, idempotency_key) makes retried placements return the original order
+CREATE TABLE order_service.orders (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL, -- References auth_service.users.id
+    idempotency_key VARCHAR(100),
+    request_hash VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'paid', 'shipped', 'cancelled')),
+    currency VARCHAR(3) NOT NULL REFERENCES localization_service.currencies(code),
+    total_amount DECIMAL(12,2) NOT NULL,
+    item_count INTEGER NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(user_id, idempotency_key)
+);
+
+-- Order lines, clustered by order for single-range reads
+CREATE TABLE order_service.order_items (
+    order_id UUID NOT NULL REFERENCES order_service.orders(id) ON DELETE CASCADE,
+    line_no SMALLINT NOT NULL,
+    product_id UUID NOT NULL, -- References product_service.products.id
+    sku VARCHAR(100) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    unit_price DECIMAL(12,2) NOT NULL,
+    PRIMARY KEY (order_id, line_no)
+);
+
+-- Transactional outbox: events written with the order, relayed asynchronously
+CREATE TABLE order_service.outbox (
+    id BIGSERIAL PRIMARY KEY,
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id UUID NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    published_at TIMESTAMPTZ
+);
+
+-- ==============================================
+-- PAYMENT SERVICE SCHEMA
+-- ==============================================
+
+-- Payments as reported by the gateway; last_event_seq orders out-of-order deliveries
+CREATE TABLE payment_service.payments (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    gateway_payment_id VARCHAR(100) UNIQUE NOT NULL,
+    order_id UUID, -- References order_service.orders.id
+    amount DECIMAL(12,2),
+    currency VARCHAR(3),
+    status VARCHAR(20) NOT NULL CHECK (status IN ('pending', 'succeeded', 'failed', 'refunded')),
+    last_event_seq NUMERIC NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Raw webhook deliveries, stored before acknowledging and processed asynchronously
+CREATE TABLE payment_service.webhook_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_id VARCHAR(100) UNIQUE NOT NULL, -- Gateway event id, deduplicates retried deliveries
+    payment_ref VARCHAR(100) NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    received_at TIMESTAMPTZ DEFAULT NOW(),
+    claimed_until TIMESTAMPTZ,
+    processed_at TIMESTAMPTZ,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+
+-- Payment status changes for downstream services
+CREATE TABLE payment_service.outbox (
+    id BIGSERIAL PRIMARY KEY,
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id UUID NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    published_at TIMESTAMPTZ
+);
+
+-- ==============================================
+-- CART SERVICE SCHEMA
+-- ==============================================
+
+-- Carts written behind from the cart service's in-memory working set
+-- owner_key is the user id, or 'guest:<id>' for carts created before login
+CREATE TABLE cart_service.carts (
+    owner_key VARCHAR(80) PRIMARY KEY,
+    items JSONB NOT NULL DEFAULT '{}', -- product_id -> quantity
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- ==============================================
+-- ADMIN SERVICE SCHEMA
+-- ==============================================
+
+-- Progress of each incremental rollup per source database (shard)
+CREATE TABLE admin_service.rollup_watermarks (
+    rollup VARCHAR(50) NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    position TIMESTAMPTZ NOT NULL, -- Source rows created up to here are counted
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (rollup, source)
+);
+
+CREATE TABLE admin_service.signups_daily (
+    day DATE PRIMARY KEY,
+    signups INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE admin_service.logins_hourly (
+    hour TIMESTAMP PRIMARY KEY, -- UTC
+    logins INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE admin_service.revenue_daily (
+    day DATE NOT NULL,
+    currency VARCHAR(3) NOT NULL,
+    orders INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, currency)
+);
+
+-- ==============================================
+-- LOCALIZED PRICE LISTS (localization service, after products)
+-- ==============================================
+
+-- Per-currency state of the materialized price list: the rate its prices were computed with
+CREATE TABLE localization_service.price_lists (
+    currency VARCHAR(3) PRIMARY KEY REFERENCES localization_service.currencies(code),
+    rate DECIMAL(20,8),
+    rate_effective_date TIMESTAMPTZ,
+    decimal_places INTEGER,
+    products_watermark TIMESTAMPTZ,
+    refreshed_at TIMESTAMPTZ
+);
+
+-- base_price converted and rounded per currency, maintained incrementally
+CREATE TABLE localization_service.product_prices (
+    currency VARCHAR(3) NOT NULL REFERENCES localization_service.price_lists(currency) ON DELETE CASCADE,
+    product_id UUID NOT NULL REFERENCES product_service.products(id) ON DELETE CASCADE,
+    price DECIMAL(14,4) NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (currency, product_id)
+);
+
 -- ==============================================
 -- SAMPLE DATA
 -- ==============================================
@@ -179,8 +418,25 @@ INSERT INTO product_service.categories (name, slug, description, is_active, sort
 CREATE INDEX idx_users_email ON auth_service.users(email);
 CREATE INDEX idx_users_active ON auth_service.users(is_active);
 CREATE INDEX idx_refresh_tokens_user ON auth_service.refresh_tokens(user_id);
+CREATE INDEX idx_users_created_at ON auth_service.users(created_at);
+CREATE INDEX idx_users_verification_token ON auth_service.users(verification_token) WHERE verification_token IS NOT NULL;
+CREATE INDEX idx_users_reset_token ON auth_service.users(reset_token) WHERE reset_token IS NOT NULL;
+CREATE INDEX idx_refresh_tokens_created_at ON auth_service.refresh_tokens(created_at);
 CREATE INDEX idx_profiles_user_id ON user_service.profiles(user_id);
 CREATE INDEX idx_addresses_user_id ON user_service.addresses(user_id);
 CREATE INDEX idx_products_active ON product_service.products(is_active);
 CREATE INDEX idx_products_slug ON product_service.products(slug);
 CREATE INDEX idx_categories_parent ON product_service.categories(parent_id);
+
+-- Order history: keyset pagination served by an index-only scan
+CREATE INDEX idx_orders_user_history ON order_service.orders(user_id, created_at DESC, id DESC)
+    INCLUDE (status, currency, total_amount, item_count);
+CREATE INDEX idx_orders_created_at ON order_service.orders(created_at);
+CREATE INDEX idx_reservations_expiry ON product_service.stock_reservations(expires_at) WHERE status = 'held';
+CREATE INDEX idx_outbox_unpublished ON order_service.outbox(id) WHERE published_at IS NULL;
+CREATE INDEX idx_webhook_events_pending ON payment_service.webhook_events(id) WHERE processed_at IS NULL;
+CREATE INDEX idx_payment_outbox_unpublished ON payment_service.outbox(id) WHERE published_at IS NULL;
+CREATE INDEX idx_exchange_rates_updated_at ON localization_service.exchange_rates(updated_at);
+CREATE INDEX idx_products_updated_at ON product_service.products(updated_at);
+CREATE INDEX idx_product_tombstones_deleted_at ON product_service.product_tombstones(deleted_at);
+CREATE INDEX idx_product_prices_product ON localization_service.product_prices(product_id);
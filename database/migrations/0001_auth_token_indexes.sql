@@ -0,0 +1,7 @@
+-- One-time token lookups (email verification, password reset) scanned auth_service.users
+-- Partial: only users with an outstanding token are indexed
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_verification_token
+    ON auth_service.users(verification_token) WHERE verification_token IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_reset_token
+    ON auth_service.users(reset_token) WHERE reset_token IS NOT NULL;
@@ -0,0 +1,7 @@
+-- exchange_rates.updated_at drives incremental refreshes of the in-process rate index
+-- NOW() is evaluated once and stored as the column's fast default: existing rows read
+-- that value without a table rewrite, and rows inserted afterwards get their own
+ALTER TABLE localization_service.exchange_rates ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_exchange_rates_updated_at
+    ON localization_service.exchange_rates(updated_at);
@@ -0,0 +1,30 @@
+-- Materialized per-currency price lists and ordered product images
+CREATE TABLE IF NOT EXISTS localization_service.price_lists (
+    currency VARCHAR(3) PRIMARY KEY REFERENCES localization_service.currencies(code),
+    rate DECIMAL(20,8),
+    rate_effective_date TIMESTAMPTZ,
+    decimal_places INTEGER,
+    products_watermark TIMESTAMPTZ,
+    refreshed_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS localization_service.product_prices (
+    currency VARCHAR(3) NOT NULL REFERENCES localization_service.price_lists(currency) ON DELETE CASCADE,
+    product_id UUID NOT NULL REFERENCES product_service.products(id) ON DELETE CASCADE,
+    price DECIMAL(14,4) NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (currency, product_id)
+);
+
+CREATE TABLE IF NOT EXISTS product_service.product_images (
+    product_id UUID NOT NULL REFERENCES product_service.products(id) ON DELETE CASCADE,
+    position SMALLINT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (product_id, position)
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_updated_at
+    ON product_service.products(updated_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_prices_product
+    ON localization_service.product_prices(product_id);
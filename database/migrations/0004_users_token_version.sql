@@ -0,0 +1,3 @@
+-- Per-user token generation checked against the 'ver' claim of access tokens
+-- A constant default is stored in the catalog, so no row is rewritten
+ALTER TABLE auth_service.users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,14 @@
+-- Shard directory (used on the directory database when SHARD_URLS is set)
+CREATE TABLE IF NOT EXISTS auth_service.user_directory (
+    email VARCHAR(255) PRIMARY KEY,
+    user_id UUID NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS auth_service.shard_ranges (
+    range_start BIGINT PRIMARY KEY,
+    range_end BIGINT NOT NULL,
+    shard VARCHAR(50) NOT NULL,
+    moved_at TIMESTAMPTZ DEFAULT NOW(),
+    CHECK (range_start < range_end)
+);
@@ -0,0 +1,21 @@
+-- Slotted stock counters and the reservations held against them
+CREATE TABLE IF NOT EXISTS product_service.inventory_slots (
+    product_id UUID NOT NULL REFERENCES product_service.products(id) ON DELETE CASCADE,
+    slot_no SMALLINT NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity >= 0),
+    PRIMARY KEY (product_id, slot_no)
+);
+
+CREATE TABLE IF NOT EXISTS product_service.stock_reservations (
+    order_id UUID NOT NULL,
+    product_id UUID NOT NULL,
+    slot_no SMALLINT NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    status VARCHAR(20) NOT NULL DEFAULT 'held' CHECK (status IN ('held', 'committed')),
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (order_id, product_id, slot_no)
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reservations_expiry
+    ON product_service.stock_reservations(expires_at) WHERE status = 'held';
@@ -0,0 +1,86 @@
+-- Orders with their outbox, and the payment webhook pipeline
+CREATE TABLE IF NOT EXISTS order_service.orders (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL,
+    idempotency_key VARCHAR(100),
+    request_hash VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'paid', 'shipped', 'cancelled')),
+    currency VARCHAR(3) NOT NULL REFERENCES localization_service.currencies(code),
+    total_amount DECIMAL(12,2) NOT NULL,
+    item_count INTEGER NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(user_id, idempotency_key)
+);
+
+CREATE TABLE IF NOT EXISTS order_service.order_items (
+    order_id UUID NOT NULL REFERENCES order_service.orders(id) ON DELETE CASCADE,
+    line_no SMALLINT NOT NULL,
+    product_id UUID NOT NULL,
+    sku VARCHAR(100) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    unit_price DECIMAL(12,2) NOT NULL,
+    PRIMARY KEY (order_id, line_no)
+);
+
+CREATE TABLE IF NOT EXISTS order_service.outbox (
+    id BIGSERIAL PRIMARY KEY,
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id UUID NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    published_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS payment_service.payments (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    gateway_payment_id VARCHAR(100) UNIQUE NOT NULL,
+    order_id UUID,
+    amount DECIMAL(12,2),
+    currency VARCHAR(3),
+    status VARCHAR(20) NOT NULL CHECK (status IN ('pending', 'succeeded', 'failed', 'refunded')),
+    last_event_seq NUMERIC NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS payment_service.webhook_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_id VARCHAR(100) UNIQUE NOT NULL,
+    payment_ref VARCHAR(100) NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    received_at TIMESTAMPTZ DEFAULT NOW(),
+    claimed_until TIMESTAMPTZ,
+    processed_at TIMESTAMPTZ,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS payment_service.outbox (
+    id BIGSERIAL PRIMARY KEY,
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id UUID NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    published_at TIMESTAMPTZ
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_user_history
+    ON order_service.orders(user_id, created_at DESC, id DESC)
+    INCLUDE (status, currency, total_amount, item_count);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_created_at
+    ON order_service.orders(created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_outbox_unpublished
+    ON order_service.outbox(id) WHERE published_at IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_webhook_events_pending
+    ON payment_service.webhook_events(id) WHERE processed_at IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payment_outbox_unpublished
+    ON payment_service.outbox(id) WHERE published_at IS NULL;
@@ -0,0 +1,35 @@
+-- Write-behind carts and the admin dashboard rollups
+CREATE SCHEMA IF NOT EXISTS cart_service;
+
+CREATE TABLE IF NOT EXISTS cart_service.carts (
+    owner_key VARCHAR(80) PRIMARY KEY,
+    items JSONB NOT NULL DEFAULT '{}',
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS admin_service.rollup_watermarks (
+    rollup VARCHAR(50) NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    position TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (rollup, source)
+);
+
+CREATE TABLE IF NOT EXISTS admin_service.signups_daily (
+    day DATE PRIMARY KEY,
+    signups INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS admin_service.logins_hourly (
+    hour TIMESTAMP PRIMARY KEY,
+    logins INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS admin_service.revenue_daily (
+    day DATE NOT NULL,
+    currency VARCHAR(3) NOT NULL,
+    orders INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, currency)
+);
@@ -0,0 +1,6 @@
+-- Incremental signup and login rollups read new users and refresh tokens by created_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at
+    ON auth_service.users(created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_refresh_tokens_created_at
+    ON auth_service.refresh_tokens(created_at);
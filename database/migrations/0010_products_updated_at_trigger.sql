@@ -0,0 +1,7 @@
+-- products.updated_at drives incremental repricing and autocomplete, but only the
+-- catalog import set it; every UPDATE now bumps it
+CREATE OR REPLACE FUNCTION product_service.touch_updated_at() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.updated_at := NOW(); RETURN NEW; END $$;
+
+CREATE OR REPLACE TRIGGER products_touch_updated_at BEFORE UPDATE ON product_service.products
+    FOR EACH ROW EXECUTE FUNCTION product_service.touch_updated_at();
@@ -0,0 +1,15 @@
+-- Deleted products never match an updated_at scan; a trigger leaves a tombstone that
+-- incremental readers (autocomplete) pick up, pruned once no reader can need it
+CREATE TABLE IF NOT EXISTS product_service.product_tombstones (
+    product_id UUID PRIMARY KEY,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION product_service.record_tombstone() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN INSERT INTO product_service.product_tombstones (product_id) VALUES (OLD.id) ON CONFLICT (product_id) DO UPDATE SET deleted_at = NOW(); RETURN OLD; END $$;
+
+CREATE OR REPLACE TRIGGER products_record_tombstone AFTER DELETE ON product_service.products
+    FOR EACH ROW EXECUTE FUNCTION product_service.record_tombstone();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_tombstones_deleted_at
+    ON product_service.product_tombstones(deleted_at);
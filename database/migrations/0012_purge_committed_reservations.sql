@@ -0,0 +1,2 @@
+-- Confirmed orders now delete their reservations; drop the committed rows kept so far
+DELETE FROM product_service.stock_reservations WHERE status = 'committed';
@@ -0,0 +1,21 @@
+-- Shard rebalancing resolves catch-up conflicts by updated_at, so every table it moves
+-- needs one that every UPDATE bumps (refresh_tokens had none, addresses was never bumped)
+ALTER TABLE auth_service.refresh_tokens ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION auth_service.touch_updated_at() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.updated_at := NOW(); RETURN NEW; END $$;
+
+CREATE OR REPLACE TRIGGER users_touch_updated_at BEFORE UPDATE ON auth_service.users
+    FOR EACH ROW EXECUTE FUNCTION auth_service.touch_updated_at();
+
+CREATE OR REPLACE TRIGGER refresh_tokens_touch_updated_at BEFORE UPDATE ON auth_service.refresh_tokens
+    FOR EACH ROW EXECUTE FUNCTION auth_service.touch_updated_at();
+
+CREATE OR REPLACE FUNCTION user_service.touch_updated_at() RETURNS trigger LANGUAGE plpgsql AS
+$$ BEGIN NEW.updated_at := NOW(); RETURN NEW; END $$;
+
+CREATE OR REPLACE TRIGGER profiles_touch_updated_at BEFORE UPDATE ON user_service.profiles
+    FOR EACH ROW EXECUTE FUNCTION user_service.touch_updated_at();
+
+CREATE OR REPLACE TRIGGER addresses_touch_updated_at BEFORE UPDATE ON user_service.addresses
+    FOR EACH ROW EXECUTE FUNCTION user_service.touch_updated_at();
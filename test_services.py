@@ -11,15 +11,18 @@ import sys
 AUTH_SERVICE_URL = "http://localhost:5000"
 USER_SERVICE_URL = "http://localhost:5001"
 
+# One keep-alive session for all calls instead of a new TCP connection per request
+http = requests.Session()
+
 def test_service_health():
     """Test service health endpoints"""
     print("🔍 Testing service health...")
     
     try:
-        auth_response = requests.get(f"{AUTH_SERVICE_URL}/health", timeout=5)
+        auth_response = http.get(f"{AUTH_SERVICE_URL}/health", timeout=5)
         print(f"✅ Auth Service Health: {auth_response.status_code}")
         
-        user_response = requests.get(f"{USER_SERVICE_URL}/health", timeout=5)
+        user_response = http.get(f"{USER_SERVICE_URL}/health", timeout=5)
         print(f"✅ User Service Health: {user_response.status_code}")
         
         return auth_response.status_code == 200 and user_response.status_code == 200
@@ -27,6 +30,23 @@ def test_service_health():
         print(f"❌ Health check failed: {e}")
         return False
 
+def test_probes():
+    """Test liveness/readiness probes"""
+    print("\n🔍 Testing liveness/readiness probes...")
+    
+    try:
+        healthy = True
+        for name, base_url in (("Auth", AUTH_SERVICE_URL), ("User", USER_SERVICE_URL)):
+            live = http.get(f"{base_url}/livez", timeout=5)
+            ready = http.get(f"{base_url}/readyz", timeout=5)
+            print(f"✅ {name} Service /livez: {live.status_code}, /readyz: {ready.status_code}")
+            print(f"   database: {ready.json().get('database')}")
+            healthy = healthy and live.status_code == 200 and ready.status_code == 200
+        return healthy
+    except Exception as e:
+        print(f"❌ Probe check failed: {e}")
+        return False
+
 def test_user_registration():
     """Test user registration flow"""
     print("\n🔍 Testing user registration...")
@@ -38,7 +58,7 @@ def test_user_registration():
             "confirm_password": "securepassword123"
         }
         
-        response = requests.post(f"{AUTH_SERVICE_URL}/register", json=user_data)
+        response = http.post(f"{AUTH_SERVICE_URL}/register", json=user_data)
         print(f"Registration response: {response.status_code}")
         
         if response.status_code == 201:
@@ -66,7 +86,7 @@ def test_user_login():
             "password": "securepassword123"
         }
         
-        response = requests.post(f"{AUTH_SERVICE_URL}/login", json=login_data)
+        response = http.post(f"{AUTH_SERVICE_URL}/login", json=login_data)
         print(f"Login response: {response.status_code}")
         
         if response.status_code == 200:
@@ -97,7 +117,7 @@ def test_profile_management(token):
         headers = {"Authorization": f"Bearer {token}"}
         
         # Get profile
-        response = requests.get(f"{USER_SERVICE_URL}/profile", headers=headers)
+        response = http.get(f"{USER_SERVICE_URL}/profile", headers=headers)
         print(f"Get profile response: {response.status_code}")
         
         if response.status_code == 200:
@@ -111,7 +131,7 @@ def test_profile_management(token):
                 "preferred_currency": "USD"
             }
             
-            response = requests.put(f"{USER_SERVICE_URL}/profile", 
+            response = http.put(f"{USER_SERVICE_URL}/profile", 
                                   headers=headers, json=profile_data)
             print(f"Update profile response: {response.status_code}")
             
@@ -125,6 +145,28 @@ def test_profile_management(token):
     except Exception as e:
         print(f"❌ Profile management error: {e}")
 
+def test_session_bootstrap(token=None):
+    """Test aggregated /me bootstrap endpoint"""
+    if not token or token == "email_verification_required":
+        print("\n⚠️ Skipping /me test - no valid token")
+        return
+        
+    print("\n🔍 Testing session bootstrap...")
+    
+    try:
+        headers = {"Authorization": f"Bearer {token}"}
+        response = http.get(f"{USER_SERVICE_URL}/me", headers=headers)
+        print(f"Bootstrap response: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ /me returned user, profile and {len(data.get('addresses', []))} addresses")
+        else:
+            print(f"❌ Bootstrap failed: {response.text}")
+            
+    except Exception as e:
+        print(f"❌ Bootstrap error: {e}")
+
 def run_integration_tests():
     """Run all integration tests"""
     print("🚀 E-Commerce Platform Integration Tests")
@@ -135,6 +177,9 @@ def run_integration_tests():
         print("❌ Services not healthy - stopping tests")
         return False
     
+    # Test 1b: Liveness/readiness probes
+    test_probes()
+    
     # Test 2: User Registration
     user_id = test_user_registration()
     
@@ -144,6 +189,9 @@ def run_integration_tests():
     # Test 4: Profile Management
     test_profile_management(token)
     
+    # Test 5: Session bootstrap (/me)
+    test_session_bootstrap(token)
+    
     print("\n" + "=" * 50)
     print("✅ Integration tests completed!")
     print("\n📋 Test Summary:")